@@ -0,0 +1,276 @@
+# api_guard.py
+import re
+import threading
+import time
+from collections import Counter
+
+import requests
+
+import log_pipeline
+import market_data
+import token_manager
+
+# ==============================================================================
+# 🚦 API 보호막 (오류 코드로 호출 속도 조절 + 엔드포인트별 차단기)
+# ==============================================================================
+# ⏱️ 속도 조절 (AIMD: 초당 건수 초과 응답이면 속도를 절반으로, 정상 응답마다 조금씩 회복)
+BACKOFF_FACTOR = 0.5        # 초과 응답 시 호출 속도 배율
+BACKOFF_HOLD = 1.0          # 이 시간(초) 안의 초과 응답은 한 번으로 취급 (동시에 나간 요청이 함께 거절되므로)
+RECOVER_STEP = 0.02         # 정상 응답마다 원래 속도의 이 비율만큼 회복
+MIN_RATE_RATIO = 0.1        # 원래 속도의 이 비율 아래로는 줄이지 않음
+
+# 🔌 차단기 (같은 엔드포인트가 연속으로 실패하면 잠시 요청을 보내지 않음)
+FAIL_THRESHOLD = 5          # 연속 실패 이 횟수면 차단
+OPEN_SECONDS = 5.0          # 첫 차단 시간(초) — 다시 실패할 때마다 두 배
+MAX_OPEN_SECONDS = 60.0     # 차단 시간 상한(초)
+NEVER_BLOCK_ENDPOINTS = {"hashkey"}     # 매도 주문에 필요한 호출 — 차단 중에도 보냄 (결과는 기록)
+
+# 응답 분류
+OK = "ok"                   # 정상 (rt_cd가 0이 아닌 업무 거절 — 잔고 부족 등 — 도 통신은 정상)
+THROTTLE = "throttle"       # 초당 거래건수 초과
+AUTH = "auth"               # 토큰 만료/무효
+SERVER = "server"           # 게이트웨이/서버 오류
+TIMEOUT = "timeout"         # 응답 없음/연결 실패
+
+THROTTLE_CODES = {"EGW00201"}               # 초당 거래건수를 초과하였습니다
+AUTH_CODES = {"EGW00121", "EGW00123"}       # 유효하지 않은 토큰 / 기간이 만료된 토큰
+FAILURES = (AUTH, SERVER, TIMEOUT)
+
+_MSG_CD = re.compile(rb'"msg_cd"\s*:\s*"([A-Z0-9]+)"')
+
+
+class CircuitOpen(requests.exceptions.RequestException):
+    """차단 중인 엔드포인트 — 네트워크로 나가지 않고 바로 실패 (KisApi 메서드의 except에서 None/[] 처리)"""
+
+
+def classify(status_code, body):
+    """(HTTP 상태, 응답 본문 bytes) → (분류, msg_cd). 정상 응답은 본문을 해석하지 않음"""
+    if status_code == 200 and b'EGW' not in body:
+        return OK, None
+    m = _MSG_CD.search(body)
+    msg_cd = m.group(1).decode() if m else None
+    if status_code == 429 or msg_cd in THROTTLE_CODES:
+        return THROTTLE, msg_cd
+    if msg_cd in AUTH_CODES:
+        return AUTH, msg_cd
+    if status_code >= 400 or (msg_cd or "").startswith("EGW"):
+        return SERVER, msg_cd or f"HTTP {status_code}"
+    return OK, msg_cd
+
+
+def endpoint_of(url):
+    """'.../quotations/inquire-price?...' → 'inquire-price'"""
+    return url.split('?', 1)[0].rstrip('/').rsplit('/', 1)[-1]
+
+
+def group_of(url):
+    """주문/잔고(trading, hashkey)는 TRADE, 나머지는 DATA — KisApi.limiters 구분과 같음"""
+    return "TRADE" if "/trading/" in url or url.endswith("/hashkey") else "DATA"
+
+
+class AdaptiveLimiter(market_data.IntervalLimiter):
+    """
+    IntervalLimiter + AIMD. 초당 건수 초과 응답(backoff)이면 간격을 늘리고,
+    정상 응답(recover)마다 원래 간격까지 조금씩 되돌립니다.
+    """
+
+    def __init__(self, min_interval):
+        super().__init__(min_interval)
+        self.base_interval = min_interval
+        self._last_backoff = 0.0
+
+    @property
+    def rate_ratio(self):
+        """원래 속도 대비 현재 속도 (1.0이면 정상)"""
+        return self.base_interval / self.min_interval if self.min_interval else 1.0
+
+    def backoff(self):
+        """속도를 BACKOFF_FACTOR배로. 이미 줄인 지 BACKOFF_HOLD초 안이면 무시. 줄였으면 True"""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_backoff < BACKOFF_HOLD:
+                return False
+            self._last_backoff = now
+            ratio = max(self.rate_ratio * BACKOFF_FACTOR, MIN_RATE_RATIO)
+            self.min_interval = self.base_interval / ratio
+            # 이미 잡아둔 순번도 늦춰서 거절된 직후 몰려가지 않게
+            self._next = max(self._next, now + self.min_interval)
+            return True
+
+    def recover(self):
+        if self.min_interval <= self.base_interval:
+            return
+        with self._lock:
+            ratio = min(self.rate_ratio + RECOVER_STEP, 1.0)
+            self.min_interval = self.base_interval / ratio
+
+
+class CircuitBreaker:
+    """
+    엔드포인트 하나의 차단기. 닫힘(정상) → 연속 FAIL_THRESHOLD회 실패 → 열림(차단) →
+    차단 시간이 지나면 한 요청만 시험 삼아 보내고(반열림), 성공하면 닫히고 실패하면 더 길게 다시 열림.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.failures = 0
+        self.open_until = 0.0
+        self.open_seconds = OPEN_SECONDS
+        self.tripped = False        # 열림/반열림 상태
+        self.probing = False        # 반열림 시험 요청이 나가 있음
+        self.last_error = None
+
+    def allow(self, now):
+        if not self.tripped:
+            return True
+        if now < self.open_until or self.probing:
+            return False
+        self.probing = True
+        return True
+
+    def success(self):
+        """복구됐으면 True"""
+        recovered = self.tripped
+        self.failures = 0
+        self.tripped = False
+        self.probing = False
+        self.open_seconds = OPEN_SECONDS
+        return recovered
+
+    def failure(self, now, error):
+        """새로 차단됐으면 True"""
+        self.failures += 1
+        self.last_error = error
+        if self.tripped:
+            # 반열림 시험 요청 실패 → 더 길게 차단
+            self.probing = False
+            self.open_seconds = min(self.open_seconds * 2, MAX_OPEN_SECONDS)
+            self.open_until = now + self.open_seconds
+            return False
+        if self.failures >= FAIL_THRESHOLD:
+            self.tripped = True
+            self.open_until = now + self.open_seconds
+            return True
+        return False
+
+
+class ApiGuard:
+    """프로세스 전체 공용. 요청 전 before(), 응답 후 record()로 차단기/속도를 갱신합니다."""
+
+    def __init__(self):
+        self.breakers = {}          # 엔드포인트 -> CircuitBreaker
+        self.limiters = {}          # 이름 -> AdaptiveLimiter (상태 표시용)
+        self.counts = Counter()     # 분류별 응답 수
+        self._lock = threading.Lock()
+
+    def register(self, name, limiter):
+        self.limiters[name] = limiter
+
+    def before(self, endpoint):
+        """차단 중이면 CircuitOpen"""
+        with self._lock:
+            br = self.breakers.get(endpoint)
+            if br is None or br.allow(time.monotonic()):
+                return
+            wait = br.open_until - time.monotonic()
+        raise CircuitOpen(f"{endpoint} 차단 중 ({max(wait, 0):.0f}초 남음, 마지막 오류 {br.last_error})")
+
+    def record(self, endpoint, outcome, limiter=None, error=None):
+        self.counts[outcome] += 1
+        if outcome == THROTTLE:
+            # 초과는 엔드포인트 고장이 아니라 속도 문제 → 차단기는 그대로 (시험 요청이었다면 다음 요청이 다시 시험)
+            if limiter is not None and limiter.backoff():
+                log_pipeline.print_repeat(f"🐢 [API 속도조절] {endpoint} {error or '초과'} → 속도 {limiter.rate_ratio * 100:.0f}%")
+            br = self.breakers.get(endpoint)
+            if br is not None:
+                br.probing = False
+            return
+        if limiter is not None and outcome == OK:
+            limiter.recover()
+
+        with self._lock:
+            br = self.breakers.get(endpoint)
+            if outcome in FAILURES:
+                if br is None:
+                    br = self.breakers[endpoint] = CircuitBreaker(endpoint)
+                if br.failure(time.monotonic(), error or outcome):
+                    print(f"🔌 [API 차단] {endpoint} 연속 실패 {br.failures}회 ({error or outcome}) → {br.open_seconds:.0f}초 차단")
+            elif br is not None and br.success():
+                print(f"✅ [API 복구] {endpoint}")
+
+    # ------------------------------------------------------------------
+    # 📊 상태 (봇이 보고 속도를 낮추거나 건너뜀)
+    # ------------------------------------------------------------------
+    def is_open(self, endpoint):
+        br = self.breakers.get(endpoint)
+        return br is not None and br.tripped
+
+    def retry_in(self, endpoint):
+        """차단 해제까지 남은 시간(초), 차단 중이 아니면 0"""
+        br = self.breakers.get(endpoint)
+        if br is None or not br.tripped:
+            return 0.0
+        return max(br.open_until - time.monotonic(), 0.0)
+
+    def status(self):
+        return {
+            'rates': {name: lim.rate_ratio for name, lim in self.limiters.items()},
+            'open': {ep: self.retry_in(ep) for ep, br in list(self.breakers.items()) if br.tripped},
+            'counts': dict(self.counts),
+        }
+
+    def summary(self):
+        """정상이면 None, 아니면 '🚦 API 속도 DATA 50% | 차단 inquire-price(12초)' 형식"""
+        st = self.status()
+        parts = []
+        slow = [f"{name} {ratio * 100:.0f}%" for name, ratio in st['rates'].items() if ratio < 1.0]
+        if slow:
+            parts.append("속도 " + ", ".join(slow))
+        if st['open']:
+            parts.append("차단 " + ", ".join(f"{ep}({sec:.0f}초)" for ep, sec in st['open'].items()))
+        if not parts:
+            return None
+        return "🚦 API " + " | ".join(parts)
+
+
+class GuardedAdapter(requests.adapters.HTTPAdapter):
+    """
+    KisApi 세션에 붙이는 어댑터. 모든 요청을 엔드포인트별로 차단 확인 → 전송 → 응답 분류합니다.
+    :param limiters: {"DATA": ..., "TRADE": ...} — 초과 응답이면 해당 그룹 제한기 속도를 낮춤
+    :param account: 계좌 이름 — TRADE 차단기는 '계좌명:엔드포인트'로 따로 (한 계좌 장애가 다른 계좌 주문을 막지 않게)
+    :param never_block_tr_ids: 차단 중에도 보내는 tr_id (매도 주문 — 청산은 막지 않음)
+    """
+
+    def __init__(self, limiters, guard=None, account=None, never_block_tr_ids=(), **kwargs):
+        super().__init__(**kwargs)
+        self.limiters = limiters
+        self.guard = guard or get_guard()
+        self.account = account
+        self.never_block_tr_ids = set(never_block_tr_ids)
+
+    def send(self, request, **kwargs):
+        endpoint = endpoint_of(request.url)
+        group = group_of(request.url)
+        limiter = self.limiters.get(group)
+        exempt = endpoint in NEVER_BLOCK_ENDPOINTS or request.headers.get('tr_id') in self.never_block_tr_ids
+        if group == "TRADE" and self.account:
+            endpoint = f"{self.account}:{endpoint}"
+        if not exempt:
+            self.guard.before(endpoint)
+        try:
+            res = super().send(request, **kwargs)
+        except requests.exceptions.RequestException as e:
+            self.guard.record(endpoint, TIMEOUT, limiter, type(e).__name__)
+            raise
+        outcome, msg_cd = classify(res.status_code, res.content)
+        self.guard.record(endpoint, outcome, limiter, msg_cd)
+        if outcome == AUTH:
+            # 무효/만료 토큰 → 캐시에서 빼고 다음 요청부터 새 토큰 (브로커/파일에 남은 같은 토큰도 쓰지 않음)
+            token_manager.invalidate(request.headers.get('authorization', '').replace('Bearer ', '', 1))
+        return res
+
+
+_guard = ApiGuard()
+
+def get_guard():
+    return _guard
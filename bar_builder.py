@@ -0,0 +1,179 @@
+# bar_builder.py
+import threading
+import time
+
+import numpy as np
+
+# ==============================================================================
+# 🕯️ 장중 분봉 집계 (조회/피드로 들어온 시세 → 1분/5분 OHLCV, 차트 API 호출 없음)
+# ==============================================================================
+TIMEFRAMES = {60: 400, 300: 80}    # 봉 길이(초) -> 보관할 봉 수 (정규장 390분 + 여유)
+MAX_SYMBOLS = 128                   # 동시에 집계하는 종목 수 (넘으면 가장 오래 갱신 안 된 종목 자리를 재사용)
+
+# 종목 × 봉 수 크기로 미리 잡아두는 링 버퍼 (종목당 메모리 고정)
+BAR_DTYPE = np.dtype([
+    ('start', '<i8'),       # 봉 시작 시각 (epoch 초, 0이면 빈 칸)
+    ('open', '<i8'), ('high', '<i8'), ('low', '<i8'), ('close', '<i8'),
+    ('volume', '<i8'),      # 봉 안의 거래량 (누적거래량 차이)
+    ('value', '<f8'),       # 봉 안의 거래대금 추정 (체결가 × 거래량 증가분) — VWAP 계산용
+    ('ticks', '<i4'),       # 관측한 시세 수
+])
+
+
+def wick_of(open_, high, close):
+    """윗꼬리 비율 — fetch_price_detail의 wick_ratio와 같은 정의 ((고가 - max(종가, 시가)) / (고가 - 시가))"""
+    if high <= open_:
+        return 0.0
+    return (high - max(close, open_)) / (high - open_)
+
+
+class BarBuilder:
+    """
+    종목별로 관측한 모든 시세(현재가, 누적거래량)를 봉 길이마다 OHLCV로 합칩니다.
+    MarketData / RemoteMarketData의 시세 리스너(on_quote)로 붙이면 추가 API 호출 없이 쌓입니다.
+    관측 사이에 체결된 거래량은 다음 관측 가격으로 잡히므로 VWAP는 근사치입니다.
+    """
+
+    def __init__(self, timeframes=None, max_symbols=MAX_SYMBOLS):
+        self.timeframes = dict(timeframes or TIMEFRAMES)
+        self.max_symbols = max_symbols
+        self.rings = {tf: np.zeros((max_symbols, n), dtype=BAR_DTYPE) for tf, n in self.timeframes.items()}
+        self._slot = {}                             # code -> 종목 칸 번호
+        self._last_ts = np.zeros(max_symbols)       # 종목 칸별 마지막 관측 시각
+        self._last_vol = np.zeros(max_symbols, dtype=np.int64)
+        self._day_vol = np.zeros(max_symbols, dtype=np.int64)
+        self._day_value = np.zeros(max_symbols)
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # 📥 집계
+    # ------------------------------------------------------------------
+    def on_quote(self, code, ts, quote):
+        """시세 리스너 (code, 조회 시각, quote)"""
+        if quote and quote.get('price', 0) > 0:
+            self.add(code, ts, quote['price'], quote.get('acml_vol', 0))
+
+    def add(self, code, ts, price, acml_vol):
+        with self._lock:
+            i = self._symbol(code)
+            if ts <= self._last_ts[i]:
+                return  # 늦게 도착한 시세 (피드/요청 응답 순서 뒤바뀜)
+            if self._last_ts[i] and time.localtime(ts)[:3] != time.localtime(self._last_ts[i])[:3]:
+                self._clear(i)  # 날짜가 바뀜 (누적거래량도 새로 시작)
+            prev_vol = self._last_vol[i]
+            dvol = acml_vol - prev_vol if self._last_ts[i] and acml_vol >= prev_vol else 0
+            self._last_ts[i] = ts
+            self._last_vol[i] = acml_vol
+            self._day_vol[i] += dvol
+            self._day_value[i] += price * dvol
+
+            for tf, ring in self.rings.items():
+                start = int(ts // tf) * tf
+                bar = ring[i, (start // tf) % ring.shape[1]]
+                if bar['start'] != start:
+                    bar['start'] = start
+                    bar['open'] = bar['high'] = bar['low'] = price
+                    bar['volume'] = 0
+                    bar['value'] = 0.0
+                    bar['ticks'] = 0
+                else:
+                    if price > bar['high']: bar['high'] = price
+                    if price < bar['low']: bar['low'] = price
+                bar['close'] = price
+                bar['volume'] += dvol
+                bar['value'] += price * dvol
+                bar['ticks'] += 1
+
+    def _symbol(self, code):
+        i = self._slot.get(code)
+        if i is not None:
+            return i
+        if len(self._slot) < self.max_symbols:
+            i = len(self._slot)
+        else:
+            i = int(np.argmin(self._last_ts))
+            old = next(c for c, s in self._slot.items() if s == i)
+            del self._slot[old]
+            self._clear(i)
+        self._slot[code] = i
+        return i
+
+    def _clear(self, i):
+        for ring in self.rings.values():
+            ring[i] = 0
+        self._last_ts[i] = 0
+        self._last_vol[i] = 0
+        self._day_vol[i] = 0
+        self._day_value[i] = 0.0
+
+    # ------------------------------------------------------------------
+    # 📊 조회
+    # ------------------------------------------------------------------
+    def bars(self, code, tf=60, n=None):
+        """완성/진행 중인 봉을 시간순으로 (구조체 배열 복사본, 없으면 빈 배열)"""
+        with self._lock:
+            i = self._slot.get(code)
+            if i is None:
+                return np.zeros(0, dtype=BAR_DTYPE)
+            rows = self.rings[tf][i]
+            rows = rows[rows['start'] > 0]
+            rows = rows[np.argsort(rows['start'])]
+        return rows[-n:] if n else rows
+
+    def last(self, code, tf=60):
+        """진행 중인 봉 하나 (dict, 없으면 None)"""
+        rows = self.bars(code, tf, n=1)
+        if not len(rows):
+            return None
+        bar = {k: rows[0][k].item() for k in BAR_DTYPE.names}
+        bar['vwap'] = bar['value'] / bar['volume'] if bar['volume'] else float(bar['close'])
+        bar['wick_ratio'] = wick_of(bar['open'], bar['high'], bar['close'])
+        return bar
+
+    def vwap(self, code, tf=None, n=1):
+        """최근 n개 봉의 VWAP (tf=None이면 관측 시작 이후 당일 누적). 거래량이 없으면 None"""
+        if tf is None:
+            with self._lock:
+                i = self._slot.get(code)
+                if i is None or not self._day_vol[i]:
+                    return None
+                return float(self._day_value[i] / self._day_vol[i])
+        rows = self.bars(code, tf, n)
+        vol = rows['volume'].sum()
+        return float(rows['value'].sum() / vol) if vol else None
+
+    def wick_ratio(self, code, tf=60, n=1):
+        """최근 n개 봉을 하나로 합친 캔들의 윗꼬리 비율 (봉이 없으면 None)"""
+        rows = self.bars(code, tf, n)
+        if not len(rows):
+            return None
+        return wick_of(int(rows['open'][0]), int(rows['high'].max()), int(rows['close'][-1]))
+
+    def fade(self, code, tf=60, n=30):
+        """최근 n개 봉 고점 대비 현재가 밀림 비율 (고가-현재가)/(고가-저가) — 장 후반 밀림 확인용"""
+        rows = self.bars(code, tf, n)
+        if not len(rows):
+            return None
+        high, low = int(rows['high'].max()), int(rows['low'].min())
+        if high <= low:
+            return 0.0
+        return (high - int(rows['close'][-1])) / (high - low)
+
+    def summary(self, code, tf=300, n=6):
+        """'5분봉 6개 윗꼬리 0.35 / 밀림 0.42 / VWAP 대비 +1.2%' 형식 (봉이 없으면 None)"""
+        rows = self.bars(code, tf, n)
+        if not len(rows):
+            return None
+        close = int(rows['close'][-1])
+        vwap = self.vwap(code)
+        text = (f"{tf // 60}분봉 {len(rows)}개 윗꼬리 {self.wick_ratio(code, tf, n):.2f}"
+                f" / 밀림 {self.fade(code, tf, n):.2f}")
+        if vwap:
+            text += f" / VWAP 대비 {(close - vwap) / vwap * 100:+.1f}%"
+        return text
+
+
+_builder = BarBuilder()
+
+def get_builder():
+    return _builder
@@ -0,0 +1,121 @@
+# bench_quote.py
+import json
+import sys
+import time
+import tracemalloc
+
+import instrument_master
+import orderbook
+import quote_codec
+
+# =========================================================
+# ⏱️ [벤치마크] 시세 응답 해석: 기존 dict 방식 vs quote_codec.Quote
+#    python3 bench_quote.py [반복 횟수]   (API 호출 없음 — 실제 응답 모양의 샘플 본문 사용)
+# =========================================================
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+CODE = "005930"
+
+# inquire-price output은 80여 개 필드 — 쓰는 필드 + 나머지는 비슷한 길이의 값으로 채움
+_PRICE_OUT = {
+    "stck_prpr": "71500", "stck_oprc": "70100", "stck_hgpr": "72000", "stck_lwpr": "69900",
+    "stck_mxpr": "91100", "prdy_ctrt": "2.14", "pgtr_ntby_qty": "-152340", "acml_vol": "18234567",
+    "hts_kor_isnm": "삼성전자", "rprs_mant_kor_name": "삼성전자",
+}
+_PRICE_OUT.update({f"fld_{i:02d}": str(123450 + i) for i in range(70)})
+PRICE_BODY = json.dumps({"rt_cd": "0", "msg_cd": "MCA00000", "msg1": "정상처리 되었습니다.",
+                         "output": _PRICE_OUT}, ensure_ascii=False).encode('utf-8')
+
+_HOGA_OUT1 = {k: str(71500 + i * 100) if "rsqn" not in k else str(1000 * (i + 1))
+              for i, k in enumerate(orderbook._KEYS)}
+_HOGA_OUT1.update({"total_askp_rsqn": "512345", "total_bidp_rsqn": "498765", "aspr_acpt_hour": "152959"})
+_HOGA_OUT1.update({f"fld_{i:02d}": str(i) for i in range(20)})
+HOGA_BODY = json.dumps({"rt_cd": "0", "msg_cd": "MCA00000", "msg1": "정상처리 되었습니다.",
+                        "output1": _HOGA_OUT1,
+                        "output2": {"antc_cnpr": "71600", "antc_cnqn": "12345",
+                                    **{f"fld_{i:02d}": str(i) for i in range(15)}}},
+                       ensure_ascii=False).encode('utf-8')
+
+
+# ---------------------------------------------------------
+# 기존 방식 (res.json() 두 번 + 변환마다 str → replace → float → int)
+# ---------------------------------------------------------
+def _legacy_safe_int(val):
+    try:
+        if val is None: return 0
+        s_val = str(val).strip().replace(',', '')
+        if not s_val: return 0
+        return int(float(s_val))
+    except:
+        return 0
+
+
+def legacy_decode(code, price_body, hoga_body):
+    res1 = json.loads(price_body.decode('utf-8'))
+    if res1['rt_cd'] != '0': return None
+    out1 = res1['output']
+    final_name = instrument_master.get_master().name(code) or out1.get('rprs_mant_kor_name', out1.get('hts_kor_isnm'))
+    program_buy = int(out1.get('pgtr_ntby_qty', 0))
+    current_price = int(out1.get('stck_prpr', 0))
+    res2 = json.loads(hoga_body.decode('utf-8'))
+    out_exp = res2.get('output2') or {}
+    exp_price = _legacy_safe_int(out_exp.get('antc_cnpr'))
+    exp_qty = _legacy_safe_int(out_exp.get('antc_cnqn'))
+    book = orderbook.OrderBook.from_kis(code, res2['output1'])
+    data = {
+        'code': code, 'name': final_name, 'price': current_price, 'ask_price': book.best_ask or current_price,
+        'open': int(out1.get('stck_oprc', 0)), 'high': int(out1.get('stck_hgpr', 0)),
+        'low': int(out1.get('stck_lwpr', 0)), 'max_price': int(out1.get('stck_mxpr', 0)),
+        'rate': float(out1.get('prdy_ctrt', 0.0)), 'program_buy': program_buy,
+        'total_ask': book.total_ask, 'total_bid': book.total_bid, 'acml_vol': int(out1.get('acml_vol', 0)),
+        'ask_rsqn1': int(book.ask_qty[0]), 'bid_rsqn1': int(book.bid_qty[0]),
+        'bid_ask_ratio': 0.0, 'wick_ratio': 0.0, 'exp_price': exp_price, 'exp_qty': exp_qty, 'book': book,
+    }
+    if data['total_ask'] > 0:
+        data['bid_ask_ratio'] = (data['total_bid'] / data['total_ask']) * 100
+    if data['high'] > data['open']:
+        data['wick_ratio'] = (data['high'] - max(data['price'], data['open'])) / (data['high'] - data['open'])
+    return data
+
+
+def new_decode(code, price_body, hoga_body):
+    return quote_codec.decode_price_detail(code, price_body, lambda: hoga_body)
+
+
+# ---------------------------------------------------------
+# 측정
+# ---------------------------------------------------------
+def measure(label, fn):
+    fn(CODE, PRICE_BODY, HOGA_BODY)     # 워밍업
+    t0 = time.perf_counter()
+    for _ in range(N):
+        fn(CODE, PRICE_BODY, HOGA_BODY)
+    us = (time.perf_counter() - t0) / N * 1e6
+
+    # 시세 1건 해석 중 할당 (최대 사용량 / 블록 수) + 결과로 남는 크기
+    tracemalloc.start()
+    snap0 = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    result = fn(CODE, PRICE_BODY, HOGA_BODY)
+    peak = tracemalloc.get_traced_memory()[1] - base
+    snap1 = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    kept = sum(s.size_diff for s in snap1.compare_to(snap0, 'filename'))
+    blocks = sum(s.count_diff for s in snap1.compare_to(snap0, 'filename'))
+
+    print(f"{label:<22} | {us:>8.1f}µs | 해석 중 최대 {peak / 1024:>6.1f}KB | "
+          f"결과 {kept / 1024:>5.1f}KB ({blocks}블록) | 본체 {sys.getsizeof(result)}B")
+    return result
+
+
+if __name__ == "__main__":
+    print(f"시세 {N:,}건 해석 (JSON 백엔드: {quote_codec.JSON_BACKEND}, 본문 {len(PRICE_BODY) + len(HOGA_BODY):,}B)")
+    print("-" * 96)
+    old = measure("기존 (dict)", legacy_decode)
+    new = measure("quote_codec.Quote", new_decode)
+    print("-" * 96)
+
+    # 같은 값인지 확인 (book 제외)
+    diff = [k for k in new.keys() if k != 'book' and old[k] != new[k]]
+    print("값 일치" if not diff else f"⚠️ 값 불일치: {diff}")
+    print(f"to_int('18234567') 기존 {_legacy_safe_int('18234567')} / 신규 {quote_codec.to_int('18234567')}")
@@ -0,0 +1,131 @@
+# broker_clock.py
+import datetime
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+# ==============================================================================
+# ⏱️ 증권사 서버 시각 동기화
+# ==============================================================================
+MAX_SAMPLES = 64            # 오프셋 추정에 쓰는 최근 응답 수
+SAMPLE_MAX_AGE = 600        # 이 시간(초)보다 오래된 표본은 버림 (로컬 시계 드리프트 대응)
+SPIN_BEFORE = 0.02          # 목표 시각 이 시간(초) 전부터는 sleep 대신 바쁜 대기
+JITTER_HISTORY = 100        # 보관할 발사 지터 기록 수
+
+
+class BrokerClock:
+    """
+    KIS 응답의 Date 헤더(1초 단위)와 요청/응답 로컬 시각으로 '서버 시각 - 로컬 시각' 오프셋을 추정합니다.
+
+    표본 하나는 "서버가 D초(~D+1초)를 찍은 순간이 로컬 [보낸 시각, 받은 시각] 사이"라는 뜻이므로
+    오프셋은 [D - 받은 시각, D + 1 - 보낸 시각] 구간 안에 있습니다. 여러 표본의 구간을 교집합하면
+    응답이 쌓일수록 1초 해상도보다 훨씬 좁게(대략 RTT 수준) 좁혀집니다.
+    """
+
+    def __init__(self):
+        self._samples = deque(maxlen=MAX_SAMPLES)   # (받은 시각, 하한, 상한, rtt)
+        self._lock = threading.Lock()
+        self.offset = 0.0
+        self.uncertainty = None     # 추정 오차 반폭(초). 표본 없으면 None
+        self.rtt = None
+        self.jitter = deque(maxlen=JITTER_HISTORY)  # (라벨, 목표 시각, 지터 ms)
+
+    # ------------------------------------------------------------------
+    # 📥 표본 수집
+    # ------------------------------------------------------------------
+    def observe(self, response, *args, **kwargs):
+        """requests 응답 훅 (session.hooks['response']에 등록)"""
+        date = response.headers.get('Date')
+        if not date:
+            return
+        try:
+            server_ts = parsedate_to_datetime(date).timestamp()
+        except (TypeError, ValueError):
+            return
+        recv = time.time()
+        self.add_sample(recv - response.elapsed.total_seconds(), recv, server_ts)
+
+    def add_sample(self, send, recv, server_ts):
+        with self._lock:
+            self._samples.append((recv, server_ts - recv, server_ts + 1.0 - send, recv - send))
+            self._estimate()
+
+    def _estimate(self):
+        cutoff = time.time() - SAMPLE_MAX_AGE
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+        samples = list(self._samples)
+        # 구간이 서로 안 맞으면(로컬 시계가 튐) 오래된 표본부터 버림
+        while samples:
+            lo = max(s[1] for s in samples)
+            hi = min(s[2] for s in samples)
+            if lo <= hi:
+                break
+            samples.pop(0)
+        if not samples:
+            return
+        if len(samples) < len(self._samples):
+            self._samples = deque(samples, maxlen=MAX_SAMPLES)
+        self.offset = (lo + hi) / 2
+        self.uncertainty = (hi - lo) / 2
+        rtts = sorted(s[3] for s in samples)
+        self.rtt = rtts[len(rtts) // 2]
+
+    def adopt(self, offset, uncertainty, rtt):
+        """다른 프로세스(시세 프로세스)가 추정한 값을 그대로 사용 (같은 머신이면 로컬 시계가 같음)"""
+        with self._lock:
+            self.offset = offset
+            self.uncertainty = uncertainty
+            self.rtt = rtt
+
+    # ------------------------------------------------------------------
+    # 🕰️ 서버 기준 시각
+    # ------------------------------------------------------------------
+    def time(self):
+        return time.time() + self.offset
+
+    def now(self):
+        """서버 시각 기준 datetime (로컬 시간대, naive — 기존 datetime.now() 대체)"""
+        return datetime.datetime.fromtimestamp(self.time())
+
+    def sleep_until(self, target, label=None):
+        """
+        서버 시각 target(datetime)까지 대기 후 실제 도달 시각(datetime)을 반환합니다.
+        label이 있으면 지터(실제 - 목표, ms)를 기록합니다.
+        """
+        target_ts = target.timestamp()
+        while True:
+            remaining = target_ts - self.time()
+            if remaining <= 0:
+                break
+            if remaining > SPIN_BEFORE:
+                time.sleep(remaining - SPIN_BEFORE)
+        actual = self.time()
+        if label:
+            jitter_ms = (actual - target_ts) * 1000
+            self.jitter.append((label, target, jitter_ms))
+            print(f"⏱️ [정시발사] {label} 목표 {target.strftime('%H:%M:%S.%f')[:-3]} "
+                  f"지터 {jitter_ms:+.1f}ms (오프셋 {self.offset*1000:+.0f}ms)")
+        return datetime.datetime.fromtimestamp(actual)
+
+    def dispatch_at(self, target, fn, *args, label="dispatch"):
+        """서버 시각 target에 fn(*args)를 실행하고 결과를 반환합니다. (호출 스레드에서 대기)"""
+        self.sleep_until(target, label=label)
+        return fn(*args)
+
+    def status(self):
+        jit = [j for _, _, j in self.jitter]
+        return {
+            'offset_ms': self.offset * 1000,
+            'uncertainty_ms': self.uncertainty * 1000 if self.uncertainty is not None else None,
+            'rtt_ms': self.rtt * 1000 if self.rtt is not None else None,
+            'samples': len(self._samples),
+            'jitter_max_ms': max((abs(j) for j in jit), default=None),
+        }
+
+
+_clock = BrokerClock()
+
+def get_clock():
+    return _clock
@@ -0,0 +1,106 @@
+# candidate_tracker.py
+import time
+
+# ==============================================================================
+# 🎯 매수 전 후보 추적기 (JONGGA_START_HOUR ~ 매수 시각)
+# ==============================================================================
+POLL_INTERVAL = 20      # 조건검색 재조회 주기(초)
+STALE_AFTER = 60        # 상세시세가 이 시간(초)보다 오래되면 다시 조회
+
+
+class CandidateTracker:
+    """
+    대기 시간 동안 'jongga' 조건검색 결과를 주기적으로 조회해 들어온/빠진 종목을 비교하고,
+    새로 들어왔거나 오래된 종목만 상세시세를 다시 조회해 판정 결과를 보관합니다.
+    매수 시각이 되면 ranked()가 API 호출 없이 바로 정렬된 후보를 돌려줍니다.
+
+    :param prescreen: (code, name, stock) -> bool. 상세조회 전에 거르는 로컬 검사 (이름/제외/블랙리스트,
+                      stock이 있으면 조건검색 행의 가격/거래량 기반 검사). ranked()에서는 stock 없이 다시 호출
+    :param evaluate: (stock, info) -> 후보 dict 또는 None. 상세시세 기반 선정 조건
+    :param quote: (code, name) -> 상세시세. 기본은 api.fetch_price_detail (공용 시세 캐시를 넘길 수 있음)
+    :param order: stock -> 정렬 키. 주면 큰 값부터 상세조회 (예: 예상 거래대금)
+    :param limit: 통과 종목이 이만큼 확보되면 이번 주기의 나머지 상세조회는 다음 주기로 미룸
+    """
+
+    def __init__(self, api, prescreen, evaluate, cond_name="jongga",
+                 poll_interval=POLL_INTERVAL, stale_after=STALE_AFTER, quote=None,
+                 order=None, limit=None):
+        self.api = api
+        self.quote = quote or api.fetch_price_detail
+        self.prescreen = prescreen
+        self.evaluate = evaluate
+        self.cond_name = cond_name
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.order = order
+        self.limit = limit
+        self.reset()
+
+    def reset(self):
+        self.members = {}       # code -> 조건검색 결과 행
+        self.results = {}       # code -> (판정 시각, 후보 dict 또는 None)
+        self.last_poll = 0
+        self.poll_count = 0
+
+    def is_ready(self):
+        return self.poll_count > 0
+
+    def poll(self, force=False):
+        """주기가 됐으면 조건검색을 다시 조회하고 변경분만 상세조회합니다. (조회했으면 True)"""
+        now = time.time()
+        if not force and now - self.last_poll < self.poll_interval:
+            return False
+        self.last_poll = now
+
+        rows = self.api.fetch_condition_stocks(self.cond_name)
+        if not rows:
+            return False  # 조회 실패(빈 결과)로 기존 후보를 지우지 않음
+        current = {r['stck_shrn_iscd']: r for r in rows}
+
+        entered = [c for c in current if c not in self.members]
+        exited = [c for c in self.members if c not in current]
+        for code in exited:
+            self.results.pop(code, None)
+        self.members = current
+
+        # 판정이 없거나(새로 편입/조회 실패/지난 주기에 미룸) 오래된 종목
+        refresh = [c for c in current
+                   if c not in self.results or now - self.results[c][0] >= self.stale_after]
+        if self.order:
+            refresh.sort(key=lambda c: self.order(current[c]), reverse=True)
+        passed = sum(1 for c, (_, cand) in self.results.items() if cand is not None and c not in refresh)
+
+        refreshed = 0
+        for code in refresh:
+            if self.limit and passed >= self.limit:
+                break
+            stock = current[code]
+            name = stock['hts_kor_isnm']
+            if not self.prescreen(code, name, stock):
+                self.results[code] = (now, None)
+                continue
+            info = self.quote(code, name)
+            if not info:
+                continue  # 다음 주기에 다시 시도
+            cand = self.evaluate(stock, info)
+            self.results[code] = (time.time(), cand)
+            refreshed += 1
+            if cand is not None:
+                passed += 1
+
+        self.poll_count += 1
+        if entered or exited:
+            print(f"🎯 [후보추적] 편입 {len(entered)} / 이탈 {len(exited)} / 재조회 {refreshed} "
+                  f"→ 통과 {len(self.ranked())}종목")
+        return True
+
+    def ranked(self, limit=None):
+        """
+        통과 종목을 거래대금 내림차순으로 반환 (API 호출 없음).
+        판정한 지 stale_after초가 지난 종목은 빠집니다 — limit에 걸려 재조회를 미룬 종목의 예전 '통과'로 매수하지 않도록
+        """
+        now = time.time()
+        passed = [cand for code, (ts, cand) in self.results.items()
+                  if cand is not None and now - ts < self.stale_after and self.prescreen(code, cand['name'])]
+        passed.sort(key=lambda x: x['trade_amt'], reverse=True)
+        return passed[:limit] if limit else passed
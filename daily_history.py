@@ -0,0 +1,330 @@
+# daily_history.py
+import datetime
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+import instrument_master
+
+# ==============================================================================
+# 🗄️ 일봉/프로그램 수급 이력 캐시 (컬럼별 memmap 파일 — 선정 시 네트워크 호출 없이 과거 데이터 사용)
+# ==============================================================================
+HISTORY_DIR = "history"
+META_FILE = "meta.json"
+MAX_CODES = 3000            # 종목 행 수 (KOSPI+KOSDAQ 보통주 전체가 들어가는 크기)
+MAX_DAYS = 250              # 보관 거래일 수 (넘으면 가장 오래된 날부터 밀어냄)
+BACKFILL_DAYS = 120         # 처음 받는 종목의 과거 거래일 수
+CALENDAR_CODE = "005930"    # 거래일 달력 기준 종목 (이 종목 일봉 날짜 = 거래일 축)
+UPDATE_WINDOWS = ((7, 9), (16, 24))   # 갱신 허용 시각(시) — 장중에는 시세 호출 한도를 뺏지 않음
+CLOSE_HOUR = 16             # 이 시각 이후면 오늘 일봉도 완성된 것으로 봄
+CHECK_INTERVAL = 600        # 갱신 스레드 확인 주기(초)
+RELOAD_INTERVAL = 60        # 읽는 쪽이 파일 변경을 확인하는 주기(초)
+CHART_PAGE = 100            # 일봉 API 1회 최대 행 수
+
+# 컬럼 하나 = (MAX_CODES, MAX_DAYS) int64 파일 하나. 0은 '데이터 없음'(거래정지/미수집)
+COLUMNS = ("open", "high", "low", "close", "volume", "value", "pg_qty", "pg_value")
+_CHART_COLUMNS = ("open", "high", "low", "close", "volume", "value")
+
+
+def _ymd(d):
+    return int(d.strftime("%Y%m%d"))
+
+
+def _to_date(ymd):
+    return datetime.date(ymd // 10000, ymd // 100 % 100, ymd % 100)
+
+
+def _last_complete_day(now=None):
+    """일봉이 확정된 마지막 날 (장 마감 전이면 어제)"""
+    now = now or datetime.datetime.now()
+    day = now.date() if now.hour >= CLOSE_HOUR else now.date() - datetime.timedelta(days=1)
+    return _ymd(day)
+
+
+class DailyHistory:
+    """
+    종목(행) × 거래일(열) 배열을 컬럼별 .npy memmap 파일로 보관합니다.
+    - 쓰는 쪽(writable=True, 프로세스 하나): update()로 모자란 날짜만 받아 덧붙임
+    - 읽는 쪽: window()/average()/highest()로 여러 종목 구간을 한 번에 조회 (파일은 OS 페이지 캐시 공유)
+    """
+
+    def __init__(self, directory=HISTORY_DIR, writable=False):
+        self.directory = directory
+        self.writable = writable
+        self.codes = {}     # code -> [행 번호, 마지막으로 채운 날짜(YYYYMMDD)]
+        self.dates = []     # 거래일 축 (오름차순, 길이 <= MAX_DAYS)
+        self.updated = None
+        self.cols = {}
+        self._mtime = 0
+        self._next_check = 0
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # 📂 파일
+    # ------------------------------------------------------------------
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def open(self):
+        """파일을 열어 메모리 매핑 (쓰는 쪽은 없으면 만듦). 읽을 수 없으면 False"""
+        meta_path = self._path(META_FILE)
+        if not os.path.exists(meta_path):
+            if not self.writable:
+                return False
+            os.makedirs(self.directory, exist_ok=True)
+            for col in COLUMNS:
+                np.lib.format.open_memmap(self._path(f"{col}.npy"), mode='w+',
+                                          dtype=np.int64, shape=(MAX_CODES, MAX_DAYS)).flush()
+            self._save_meta()
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            mode = 'r+' if self.writable else 'r'
+            cols = {col: np.load(self._path(f"{col}.npy"), mmap_mode=mode) for col in COLUMNS}
+        except Exception as e:
+            print(f"⚠️ [일봉이력] 파일 열기 실패: {e}")
+            return False
+        self.codes, self.dates, self.updated = meta["codes"], meta["dates"], meta.get("updated")
+        self.cols = cols
+        self._mtime = os.path.getmtime(meta_path)
+        return True
+
+    def _save_meta(self):
+        tmp = self._path(META_FILE + ".tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"codes": self.codes, "dates": self.dates, "updated": self.updated},
+                      f, separators=(',', ':'))
+        os.replace(tmp, self._path(META_FILE))
+
+    def reload_if_changed(self):
+        """읽는 쪽: 쓰는 프로세스가 갱신했으면 다시 매핑 (RELOAD_INTERVAL마다 한 번만 확인)"""
+        if self.writable or time.time() < self._next_check:
+            return
+        self._next_check = time.time() + RELOAD_INTERVAL
+        try:
+            mtime = os.path.getmtime(self._path(META_FILE))
+        except OSError:
+            return
+        if mtime != self._mtime:
+            with self._lock:
+                self.open()
+
+    # ------------------------------------------------------------------
+    # 📥 갱신 (쓰는 쪽)
+    # ------------------------------------------------------------------
+    def _append_dates(self, new_dates):
+        """거래일 축 끝에 날짜 추가. 가득 차면 전 컬럼을 왼쪽으로 밀어 오래된 날을 버림"""
+        new_dates = sorted(d for d in set(new_dates) if not self.dates or d > self.dates[-1])
+        if not new_dates:
+            return
+        overflow = len(self.dates) + len(new_dates) - MAX_DAYS
+        if overflow > 0:
+            keep = len(self.dates) - overflow
+            for arr in self.cols.values():
+                if keep > 0:
+                    arr[:, :keep] = arr[:, overflow:len(self.dates)]
+                arr[:, max(keep, 0):] = 0
+            self.dates = self.dates[overflow:] if keep > 0 else []
+            new_dates = new_dates[-MAX_DAYS:]
+        self.dates.extend(new_dates)
+
+    def _row(self, code):
+        entry = self.codes.get(code)
+        if entry:
+            return entry[0]
+        if len(self.codes) >= MAX_CODES:
+            return None
+        row = len(self.codes)
+        self.codes[code] = [row, 0]
+        return row
+
+    @staticmethod
+    def _fetch_pages(fetch, start, end, page_size=None):
+        """
+        fetch(end) 한 페이지씩 과거 방향으로 이어 붙여 start~end 전체 (날짜 오름차순).
+        중간 페이지라도 실패하면 None (일부만 받고 '채움'으로 표시하면 빠진 날을 다시 받지 않으므로)
+        """
+        rows = []
+        while True:
+            page = fetch(end)
+            if page is None:
+                return None     # 조회 실패 (다음 갱신에서 다시)
+            page = [r for r in page if r['date'] <= end]
+            if not page or (rows and page[0]['date'] >= rows[0]['date']):
+                break           # 더 과거 데이터 없음
+            rows = page + rows
+            if (page_size and len(page) < page_size) or page[0]['date'] <= start:
+                break
+            end = _ymd(_to_date(page[0]['date']) - datetime.timedelta(days=1))
+        return rows
+
+    def _fetch_chart(self, api, code, start, end):
+        """start~end 일봉 전체 (100일씩 끊어서 과거 방향으로). 조회 실패면 None"""
+        return self._fetch_pages(lambda e: api.fetch_daily_chart(code, str(start), str(e)), start, end, CHART_PAGE)
+
+    def _fetch_program(self, api, code, start, end):
+        """start~end 프로그램 일별 순매수 (API는 end 이전 최근 구간만 주므로 과거 방향으로 이어 받음). 실패면 None"""
+        return self._fetch_pages(lambda e: api.fetch_program_daily(code, str(e)), start, end)
+
+    def update_code(self, api, code):
+        """한 종목의 모자란 날짜만 받아 채움. 받은 날 수 반환 (조회 실패면 None)"""
+        row = self._row(code)
+        if row is None or not self.dates:
+            return 0
+        last = self.codes[code][1]
+        missing = [d for d in self.dates if d > last]
+        if not missing:
+            return 0
+        index = {d: i for i, d in enumerate(self.dates)}
+        chart = self._fetch_chart(api, code, missing[0], missing[-1])
+        program = self._fetch_program(api, code, missing[0], missing[-1]) if chart is not None else None
+        if chart is None or program is None:
+            return None     # 둘 다 받아야 '채움'으로 표시 (한쪽만 받으면 다음 갱신에서 다시)
+        for r in chart:
+            i = index.get(r['date'])
+            if i is not None and r['date'] > last:
+                for col in _CHART_COLUMNS:
+                    self.cols[col][row, i] = r[col]
+        for r in program:
+            i = index.get(r['date'])
+            if i is not None and r['date'] > last:
+                self.cols['pg_qty'][row, i] = r['pg_qty']
+                self.cols['pg_value'][row, i] = r['pg_value']
+        # 데이터가 없던 날(거래정지 등)도 채운 것으로 봄 → 다음 갱신에서 다시 받지 않음
+        self.codes[code][1] = missing[-1]
+        return len(missing)
+
+    def update(self, api, codes):
+        """거래일 축을 늘리고 codes의 모자란 날짜만 채웁니다. (처음 보는 종목은 BACKFILL_DAYS만큼)"""
+        end = _last_complete_day()
+        if self.dates:
+            start = _ymd(_to_date(self.dates[-1]) + datetime.timedelta(days=1))
+        else:
+            start = _ymd(_to_date(end) - datetime.timedelta(days=BACKFILL_DAYS * 7 // 5 + 14))
+        if start <= end:
+            calendar = self._fetch_chart(api, CALENDAR_CODE, start, end)
+            if calendar is None:
+                print("⚠️ [일봉이력] 거래일 달력 조회 실패 — 다음에 다시 시도")
+                return False
+            self._append_dates([r['date'] for r in calendar])
+        if not self.dates:
+            return False
+
+        # 처음 보는 종목이나 오래 안 받은 종목도 최근 BACKFILL_DAYS만 받음
+        floor = self.dates[-BACKFILL_DAYS - 1] if len(self.dates) > BACKFILL_DAYS else 0
+        t0, fetched, failed = time.time(), 0, 0
+        for code in codes:
+            if self._row(code) is None:
+                print(f"⚠️ [일봉이력] 종목 행 가득 참 (MAX_CODES={MAX_CODES}) — {code} 이후 생략")
+                break
+            entry = self.codes[code]
+            entry[1] = max(entry[1], floor)
+            n = self.update_code(api, code)
+            if n is None:
+                failed += 1
+            elif n:
+                fetched += 1
+        for arr in self.cols.values():
+            arr.flush()
+        self.updated = datetime.date.today().isoformat()
+        self._save_meta()
+        self._mtime = os.path.getmtime(self._path(META_FILE))
+        print(f"🗄️ [일봉이력] 갱신 완료: {fetched}종목 추가 / 실패 {failed} / "
+              f"{len(self.dates)}거래일 ({time.time() - t0:.0f}초)")
+        return True
+
+    # ------------------------------------------------------------------
+    # 📊 조회 (네트워크 호출 없음)
+    # ------------------------------------------------------------------
+    def window(self, codes, column, n=20):
+        """
+        최근 n거래일 (len(codes), n) 배열. 없는 종목/날은 0.
+        오늘 장중이면 '어제까지' 구간입니다 (오늘 값은 시세에서).
+        """
+        self.reload_if_changed()
+        rows = [self.codes.get(c, [None])[0] for c in codes]
+        out = np.zeros((len(codes), n), dtype=np.int64)
+        if not self.cols or not self.dates:
+            return out
+        days = min(n, len(self.dates))
+        lo, hi = len(self.dates) - days, len(self.dates)
+        known = [i for i, r in enumerate(rows) if r is not None]
+        if known:
+            out[known, n - days:] = self.cols[column][[rows[i] for i in known], lo:hi]
+        return out
+
+    def average(self, codes, column="volume", n=20):
+        """최근 n거래일 평균 (0인 날 제외). 데이터가 없는 종목은 0"""
+        w = self.window(codes, column, n)
+        cnt = (w != 0).sum(axis=1)
+        return np.where(cnt > 0, w.sum(axis=1) / np.maximum(cnt, 1), 0.0)
+
+    def highest(self, codes, n=20):
+        return self.window(codes, "high", n).max(axis=1)
+
+    def total(self, codes, column="pg_value", n=5):
+        return self.window(codes, column, n).sum(axis=1)
+
+    def ready(self):
+        return bool(self.cols) and bool(self.dates)
+
+
+# ==============================================================================
+# 🔄 하루 한 번 갱신 스레드 (시세 API를 가진 프로세스 하나에서만)
+# ==============================================================================
+def _in_update_window(now):
+    return any(lo <= now.hour < hi for lo, hi in UPDATE_WINDOWS)
+
+
+def _universe():
+    """갱신 대상: 종목 마스터의 매매 가능 보통주"""
+    master = instrument_master.get_master()
+    master.ensure_fresh()
+    return sorted(c for c in master.items if master.is_plain_stock(c))
+
+
+def start_updater(api, codes_fn=_universe):
+    """갱신 스레드 시작. 쓰는 쪽 DailyHistory 반환 (파일을 만들 수 없으면 None)"""
+    history = DailyHistory(writable=True)
+    try:
+        if not history.open():
+            return None
+    except OSError as e:
+        print(f"⚠️ [일봉이력] 캐시 파일 생성 실패: {e}")
+        return None
+
+    def loop():
+        while True:
+            now = datetime.datetime.now()
+            if history.updated != now.date().isoformat() and _in_update_window(now):
+                try:
+                    history.update(api, codes_fn())
+                except Exception as e:
+                    print(f"❌ [일봉이력] 갱신 실패: {e}")
+            time.sleep(CHECK_INTERVAL)
+
+    threading.Thread(target=loop, name="daily-history", daemon=True).start()
+    return history
+
+
+_reader = None
+
+def get_history():
+    """읽기 전용 이력 (파일이 아직 없으면 None — 다음 호출에서 다시 시도)"""
+    global _reader
+    if _reader is None:
+        reader = DailyHistory()
+        if reader.open():
+            _reader = reader
+    return _reader
+
+
+if __name__ == "__main__":
+    # 수동 백필: python3 daily_history.py
+    from jongga_bot import KisApi
+    h = DailyHistory(writable=True)
+    h.open()
+    h.update(KisApi(), _universe())
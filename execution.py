@@ -0,0 +1,258 @@
+# execution.py
+import time
+
+import trade_logger
+
+# ==============================================================================
+# ⚙️ 분할 매수 집행 설정
+# ==============================================================================
+SCHEDULE = "TWAP"           # "TWAP": 분마다 같은 금액 / "POV": 구간 거래대금의 일정 비율
+PARTICIPATION_RATE = 0.05   # POV 참여율 (매수 시작 후 누적 거래대금 대비)
+DEPTH_TAKE_RATIO = 0.5      # 자식 주문 수량은 허용가 이내 매도잔량의 이 비율까지만 (호가 먹어치우기 방지)
+MAX_SLIPPAGE = 0.005        # 도착가(첫 주문 시 1매도호가) 대비 이 비율까지만 가격 정정
+REPRICE_AFTER = 10          # 미체결이 이 시간(초) 이상 남아 있으면 정정 검토
+FILL_POLL_INTERVAL = 5      # 체결 조회 주기(초, 미체결 주문이 있을 때만)
+
+
+class ChildOrder:
+    """
+    실제로 나간 지정가 주문 1건.
+    정정하면 증권사 주문번호가 바뀌므로, 이전 주문번호에서 체결된 분량은 base_*에 누적해 둡니다.
+    """
+    __slots__ = ("order_no", "org_no", "qty", "price", "sent_at", "filled", "avg_price", "reprices",
+                 "base_filled", "base_money")
+
+    def __init__(self, order_no, org_no, qty, price):
+        self.order_no = order_no
+        self.org_no = org_no
+        self.qty = qty
+        self.price = price
+        self.sent_at = time.time()
+        self.filled = 0
+        self.avg_price = 0.0
+        self.reprices = 0
+        self.base_filled = 0
+        self.base_money = 0.0
+
+    def apply_fill(self, filled, avg_price):
+        """현재 주문번호의 체결 수량/평균가를 반영"""
+        total = self.base_filled + filled
+        money = self.base_money + filled * (avg_price or self.price)
+        self.filled = total
+        self.avg_price = money / total if total > 0 else 0.0
+
+    @property
+    def open_qty(self):
+        return max(self.qty - self.filled, 0)
+
+    def committed(self):
+        """체결분은 체결가, 미체결분은 주문가로 잡은 사용 금액"""
+        return self.filled * self.avg_price + self.open_qty * self.price
+
+
+class ParentOrder:
+    """종목 하나의 매수 목표 (예산을 매수 구간에 걸쳐 자식 주문으로 나눠 집행)"""
+
+    def __init__(self, code, name, budget, arrival_price, start_vol=0, restored_money=0):
+        self.code = code
+        self.name = name
+        self.budget = budget
+        self.arrival_price = arrival_price
+        self.start_vol = start_vol
+        self.restored_money = restored_money    # 재시작 전에 이미 나간 금액(추정)
+        self.children = []
+
+    def committed(self):
+        return self.restored_money + sum(c.committed() for c in self.children)
+
+    def filled_qty(self):
+        return sum(c.filled for c in self.children)
+
+    def filled_money(self):
+        return sum(c.filled * c.avg_price for c in self.children)
+
+    def open_children(self):
+        return [c for c in self.children if c.open_qty > 0]
+
+
+class SplitBuyExecutor:
+    """
+    종가 분할 매수 집행기.
+    - 스케줄(TWAP/POV)이 정한 누적 목표 금액과 실제 사용 금액의 차이만큼 자식 주문을 냅니다.
+    - 자식 주문 수량은 허용가(도착가 × (1+MAX_SLIPPAGE)) 이내에 보이는 매도잔량으로 제한하고,
+      그 수량이 닿는 마지막 매도호가 지정가로 냅니다. (10단계 호가가 없으면 1호가 기준)
+    - 일정 시간 미체결이면 새 1매도호가로 정정하되, 도착가 대비 MAX_SLIPPAGE를 넘기면 정정하지 않습니다.
+    - report()로 종목별 체결률과 도착가 대비 슬리피지를 보고합니다.
+    """
+
+    def __init__(self, bot, strategy_name, start_minute, slices, schedule=SCHEDULE):
+        self.bot = bot
+        self.strategy_name = strategy_name
+        self.start_minute = start_minute
+        self.slices = slices
+        self.schedule = schedule
+        self.parents = {}
+        self.last_fill_poll = 0
+        self.reported = False
+
+    def add(self, code, name, budget, quote):
+        # 재시작 시 이미 나간 주문 금액(저널 기록)만큼 빼고 이어서 집행
+        spent = self.bot.buy_spent.get(code)
+        if spent is None:
+            # 금액 기록이 없는 예전 저널 → 회차당 금액으로 추정
+            spent = budget * self.bot.buy_progress.get(code, 0) / self.slices
+        restored = min(budget, spent)
+        parent = ParentOrder(code, name, budget, quote['ask_price'],
+                             start_vol=quote.get('acml_vol', 0), restored_money=restored)
+        self.parents[code] = parent
+        return parent
+
+    # ------------------------------------------------------------------
+    # 📅 스케줄
+    # ------------------------------------------------------------------
+    def target_money(self, parent, now, quote):
+        """지금까지 써야 할 누적 금액"""
+        idx = now.minute - self.start_minute
+        if idx < 0:
+            return 0
+        last_slice = idx >= self.slices - 1
+        if self.schedule == "POV" and not last_slice:
+            traded = max(quote.get('acml_vol', 0) - parent.start_vol, 0) * quote['price']
+            return min(parent.budget, PARTICIPATION_RATE * traded)
+        # TWAP (POV도 마지막 회차에는 남은 예산을 채움)
+        return parent.budget * min(idx + 1, self.slices) / self.slices
+
+    # ------------------------------------------------------------------
+    # 🏃 집행
+    # ------------------------------------------------------------------
+    def step(self, now):
+        bot = self.bot
+        if any(p.open_children() for p in self.parents.values()):
+            self.poll_fills()
+
+        for code, parent in self.parents.items():
+            if code in bot.today_blacklist: continue
+
+            quote = bot.market.quote(code, parent.name, max_age=0.5)
+            if not quote: continue
+
+            if parent.open_children():
+                self._reprice(parent, quote)
+                continue  # 미체결이 남아 있으면 새 주문을 쌓지 않음
+
+            deficit = self.target_money(parent, now, quote) - parent.committed()
+            ask = quote['ask_price']
+            if ask <= 0 or deficit < ask: continue
+
+            qty = int(deficit / ask)
+            price, depth = ask, 1
+            book = quote.get('book')
+            if book is not None and book.best_ask > 0:
+                cap = max(parent.arrival_price * (1 + MAX_SLIPPAGE), book.best_ask)
+                avail = book.depth_within(cap)
+                if avail > 0:
+                    qty = min(qty, max(1, int(avail * DEPTH_TAKE_RATIO)))
+                    _, _, _, price = book.cost_to_fill(qty)
+                    depth = book.ask_px.tolist().index(price) + 1
+                    qty = min(qty, int(deficit / price))
+            elif quote.get('ask_rsqn1', 0) > 0:
+                qty = min(qty, max(1, int(quote['ask_rsqn1'] * DEPTH_TAKE_RATIO)))
+            if qty > 0:
+                self._send(parent, qty, price, depth)
+
+    def _record_spent(self, parent, money):
+        """주문 금액 누적을 저널에 기록 (재시작 시 add()가 이 금액만큼 이어서 집행)"""
+        bot = self.bot
+        bot.buy_spent[parent.code] = bot.buy_spent.get(parent.code, 0) + money
+        bot.journal.record('progress', parent.code, count=bot.buy_progress.get(parent.code, 0),
+                           money=bot.buy_spent[parent.code])
+
+    def _send(self, parent, qty, price, depth=1):
+        bot = self.bot
+        res = bot.api.send_order(parent.code, qty, is_buy=True, price=price)
+        if res.get('rt_cd') != '0':
+            print(f"⚠️ [집행] {parent.name} 주문 실패: {res.get('msg1')}")
+            return None
+
+        out = res.get('output') or {}
+        child = ChildOrder(out.get('ODNO'), out.get('KRX_FWDG_ORD_ORGNO'), qty, price)
+        parent.children.append(child)
+
+        level = bot.buy_progress.get(parent.code, 0) + 1
+        bot.buy_progress[parent.code] = level
+        self._record_spent(parent, qty * price)
+        bot.tag_position(parent.code, self.strategy_name)
+        bot.notify(f"💎 [종가매수 {level}차] {parent.name}\n수량: {qty}주 / 가격: {price:,}원 ({depth}호가)")
+        trade_logger.log_buy({
+            'code': parent.code, 'name': parent.name,
+            'strategy': self.strategy_name, 'level': level,
+            'price': price, # 로그는 주문가(자식 주문 지정가)로 기록
+            'qty': qty,
+            'pg_amt': 0, 'gap': 0, 'leader': ''
+        }, account=bot.account_name)
+        return child
+
+    def _reprice(self, parent, quote):
+        """오래된 미체결 주문을 허용 범위 안의 새 1매도호가로 정정"""
+        cap = parent.arrival_price * (1 + MAX_SLIPPAGE)
+        ask = quote['ask_price']
+        for child in parent.open_children():
+            if time.time() - child.sent_at < REPRICE_AFTER or ask <= child.price:
+                continue
+            if ask > cap:
+                continue  # 너무 올라감 → 기존 가격으로 대기 (체결 안 되면 종가 단일가에 맡김)
+            self.poll_fills(force=True) # 정정 직전 체결분 확정
+            if child.open_qty <= 0:
+                continue
+            res = self.bot.api.revise_order(child.org_no, child.order_no, child.open_qty, ask)
+            if res.get('rt_cd') == '0':
+                out = res.get('output') or {}
+                print(f"🔁 [정정] {parent.name} 잔량 {child.open_qty}주 {child.price:,} → {ask:,}원")
+                self._record_spent(parent, child.open_qty * (ask - child.price))
+                child.base_filled = child.filled
+                child.base_money = child.filled * child.avg_price
+                child.order_no = out.get('ODNO', child.order_no)
+                child.org_no = out.get('KRX_FWDG_ORD_ORGNO', child.org_no)
+                child.price = ask
+                child.sent_at = time.time()
+                child.reprices += 1
+
+    def poll_fills(self, force=False):
+        if not force and time.time() - self.last_fill_poll < FILL_POLL_INTERVAL:
+            return
+        self.last_fill_poll = time.time()
+        fills = self.bot.api.fetch_order_fills()
+        if fills is None:
+            return
+        for parent in self.parents.values():
+            for child in parent.children:
+                f = fills.get(child.order_no)
+                if f:
+                    child.apply_fill(f['filled'], f['avg_price'])
+
+    # ------------------------------------------------------------------
+    # 📊 보고
+    # ------------------------------------------------------------------
+    def report(self):
+        """종목별 체결률/슬리피지 보고 (텔레그램 + 로그)"""
+        self.poll_fills(force=True)
+        self.reported = True
+        if not self.parents:
+            return None
+
+        lines = ["📊 [종가매수 집행 결과]"]
+        for p in self.parents.values():
+            qty = p.filled_qty()
+            money = p.filled_money()
+            fill_rate = money / p.budget * 100 if p.budget > 0 else 0.0
+            if qty > 0 and p.arrival_price > 0:
+                avg = money / qty
+                slip_bp = (avg - p.arrival_price) / p.arrival_price * 10000
+                lines.append(f"- {p.name}: 체결 {qty}주 / 체결률 {fill_rate:.0f}% / "
+                             f"평균 {avg:,.0f}원 (도착가 대비 {slip_bp:+.0f}bp)")
+            else:
+                lines.append(f"- {p.name}: 체결 없음")
+        msg = "\n".join(lines)
+        print(msg)
+        self.bot.notify(msg)
+        return msg
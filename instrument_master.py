@@ -0,0 +1,255 @@
+# instrument_master.py
+import datetime
+import io
+import json
+import os
+import threading
+import time
+import zipfile
+
+import requests
+
+# ==============================================================================
+# ⚙️ 종목 마스터 설정
+# ==============================================================================
+MASTER_DIR = "master"
+INDEX_FILE = f"{MASTER_DIR}/instruments.json"
+REFRESH_HOUR = 7            # KIS 마스터 파일은 새벽에 갱신되므로 이 시각 이후 것을 그날 기준으로 사용
+RETRY_INTERVAL = 600        # 백그라운드 갱신 스레드 확인 주기(초) — 다운로드 실패 시 재시도 간격
+MASTER_URLS = {
+    "KOSPI": "https://new.real.download.dws.co.kr/common/master/kospi_code.mst.zip",
+    "KOSDAQ": "https://new.real.download.dws.co.kr/common/master/kosdaq_code.mst.zip",
+}
+
+# KIS 마스터 파일 뒷부분(고정폭) 필드 길이 — 공식 샘플(kis_kospi/kosdaq_code_mst.py) 기준
+_KOSPI_WIDTHS = [2, 1, 4, 4, 4] + [1] * 26 + [
+    9, 5, 5, 1, 1, 1, 2, 1, 1, 1, 2, 2, 2, 3, 1, 3, 12, 12, 8, 15, 21, 2, 7,
+    1, 1, 1, 1, 1, 9, 9, 9, 5, 9, 8, 9, 3, 1, 1, 1]
+_KOSDAQ_WIDTHS = [2, 1, 4, 4, 4] + [1] * 21 + [
+    9, 5, 5, 1, 1, 1, 2, 1, 1, 1, 2, 2, 2, 3, 1, 3, 12, 12, 8, 15, 21, 2, 7,
+    1, 1, 1, 1, 9, 9, 9, 5, 9, 8, 9, 3, 1, 1, 1]
+
+# 필드 위치 (widths 인덱스)
+_FIELDS = {
+    "KOSPI": {"group": 0, "spac": 19, "base_price": 31, "halt": 34, "liquidation": 35,
+              "admin": 36, "preferred": 54},
+    "KOSDAQ": {"group": 0, "spac": 14, "base_price": 26, "halt": 29, "liquidation": 30,
+               "admin": 31, "preferred": 49},
+}
+
+# 증권그룹코드 → 종목 유형
+_GROUP_KIND = {
+    "ST": "STOCK", "FS": "STOCK",          # 주권, 외국주권
+    "EF": "ETF", "FE": "ETF",              # ETF, 해외ETF
+    "EN": "ETN",
+    "RT": "REIT",
+    "MF": "FUND", "SC": "FUND", "IF": "FUND", "BC": "FUND",
+    "DR": "DR", "EW": "ELW", "SW": "RIGHTS", "SR": "RIGHTS",
+}
+
+# 마스터에 없는 종목(신규상장 당일 등)용 이름 기반 예비 판정
+FALLBACK_BAN_KEYWORDS = ["스팩", "ETN", "ETF", "리츠", "우B", "우(", "인버스", "레버리지", "선물", "채권"]
+
+
+def _master_day():
+    return (datetime.datetime.now() - datetime.timedelta(hours=REFRESH_HOUR)).date().isoformat()
+
+
+def _split_fixed(text, widths):
+    out, pos = [], 0
+    for w in widths:
+        out.append(text[pos:pos + w])
+        pos += w
+    return out
+
+
+def parse_master(raw_text, market):
+    """
+    마스터 파일(cp949 디코딩된 문자열)을 {code: [name, market, kind, status, base_price]}로 변환합니다.
+    - kind: STOCK / PREFERRED / SPAC / ETF / ETN / REIT / FUND / DR / ELW / RIGHTS / OTHER
+    - status: NORMAL / HALTED / LIQUIDATION / ADMIN
+    """
+    widths = _KOSPI_WIDTHS if market == "KOSPI" else _KOSDAQ_WIDTHS
+    tail_len = sum(widths)
+    f = _FIELDS[market]
+    items = {}
+
+    for line in raw_text.splitlines():
+        if len(line) <= tail_len + 21:
+            continue
+        head, tail = line[:-tail_len], line[-tail_len:]
+        code = head[0:9].strip()
+        name = head[21:].strip()
+        fields = _split_fixed(tail, widths)
+
+        kind = _GROUP_KIND.get(fields[f["group"]].strip(), "OTHER")
+        if kind == "STOCK":
+            if fields[f["spac"]] == "Y":
+                kind = "SPAC"
+            elif fields[f["preferred"]].strip() not in ("", "0"):
+                kind = "PREFERRED"
+
+        if fields[f["halt"]] == "Y":
+            status = "HALTED"
+        elif fields[f["liquidation"]] == "Y":
+            status = "LIQUIDATION"
+        elif fields[f["admin"]] == "Y":
+            status = "ADMIN"
+        else:
+            status = "NORMAL"
+
+        try:
+            base_price = int(fields[f["base_price"]].strip() or 0)
+        except ValueError:
+            base_price = 0
+
+        items[code] = [name, market, kind, status, base_price]
+    return items
+
+
+def tick_size(price, kind="STOCK"):
+    """KRX 호가단위 (2023.01 개편 기준, 유가/코스닥 공통)"""
+    if kind in ("ETF", "ETN"):
+        return 1 if price < 2000 else 5
+    if price < 2000: return 1
+    if price < 5000: return 5
+    if price < 20000: return 10
+    if price < 50000: return 50
+    if price < 200000: return 100
+    if price < 500000: return 500
+    return 1000
+
+
+# ==============================================================================
+# 📚 종목 마스터 인덱스
+# ==============================================================================
+class InstrumentMaster:
+    """
+    KIS 종목 마스터(KOSPI/KOSDAQ)를 하루 한 번 받아 code → (이름, 시장, 유형, 상태, 기준가)
+    인덱스 파일로 저장하고 메모리 dict로 조회합니다. (조회는 O(1), 문자열 검색 없음)
+    조회(get/name/kind/...)는 메모리만 읽습니다. 갱신은 봇 시작/아침의 ensure_fresh()와 start_refresher() 스레드만 합니다.
+    """
+
+    def __init__(self, index_file=INDEX_FILE):
+        self.index_file = index_file
+        self.date = None
+        self.items = {}
+        self._lock = threading.Lock()
+        self._next_retry = 0
+
+    def ensure_fresh(self):
+        """오늘 날짜 인덱스가 아니면 파일 → 다운로드 순으로 갱신합니다."""
+        today = _master_day()
+        if self.date == today or time.time() < self._next_retry:
+            return
+        with self._lock:
+            if self.date == today or time.time() < self._next_retry:
+                return
+            if self._load_file() and self.date == today:
+                return
+            if not self.refresh():
+                # 다운로드 실패 시 예전 인덱스라도 그대로 사용하고 잠시 후 재시도
+                self._next_retry = time.time() + RETRY_INTERVAL
+
+    def _load_file(self):
+        if not os.path.exists(self.index_file):
+            return False
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.items = data["items"]
+            self.date = data["date"]
+            return True
+        except Exception as e:
+            print(f"⚠️ [Master] 인덱스 파일 읽기 실패: {e}")
+            return False
+
+    def refresh(self):
+        items = {}
+        for market, url in MASTER_URLS.items():
+            try:
+                res = requests.get(url, timeout=30)
+                res.raise_for_status()
+                with zipfile.ZipFile(io.BytesIO(res.content)) as zf:
+                    raw = zf.read(zf.namelist()[0]).decode('cp949', errors='replace')
+                items.update(parse_master(raw, market))
+            except Exception as e:
+                print(f"❌ [Master] {market} 마스터 다운로드 실패: {e}")
+                return False
+
+        self.items = items
+        self.date = _master_day()
+
+        master_dir = os.path.dirname(self.index_file)
+        if master_dir and not os.path.exists(master_dir):
+            os.makedirs(master_dir)
+        tmp = self.index_file + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"date": self.date, "items": items}, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp, self.index_file)
+        print(f"📚 [Master] 종목 마스터 갱신 완료 ({len(items):,}종목)")
+        return True
+
+    # ------------------------------------------------------------------
+    # 🔎 조회
+    # ------------------------------------------------------------------
+    def get(self, code):
+        return self.items.get(code)
+
+    def name(self, code, default=None):
+        item = self.get(code)
+        return item[0] if item else default
+
+    def kind(self, code):
+        item = self.get(code)
+        return item[2] if item else None
+
+    def tick(self, code, price):
+        item = self.get(code)
+        return tick_size(price, item[2] if item else "STOCK")
+
+    def is_plain_stock(self, code, name=None):
+        """
+        매매 대상(거래정지/정리매매가 아닌 보통주)인지 판정합니다.
+        마스터에 없는 종목만 이름 키워드로 예비 판정합니다.
+        """
+        item = self.get(code)
+        if item is not None:
+            return item[2] == "STOCK" and item[3] not in ("HALTED", "LIQUIDATION")
+        if name is None:
+            return True
+        return not (any(x in name for x in FALLBACK_BAN_KEYWORDS) or name.endswith("우"))
+
+
+_master = InstrumentMaster()
+_refresher = None
+
+def get_master():
+    return _master
+
+
+def start_refresher():
+    """RETRY_INTERVAL마다 ensure_fresh() (날짜가 바뀌었거나 다운로드가 실패했을 때만 실제로 받음). 프로세스당 한 번"""
+    global _refresher
+    if _refresher is not None:
+        return
+
+    def run():
+        while True:
+            time.sleep(RETRY_INTERVAL)
+            try:
+                _master.ensure_fresh()
+            except Exception as e:
+                print(f"⚠️ [Master] 갱신 스레드 에러: {e}")
+
+    _refresher = threading.Thread(target=run, name="master-refresh", daemon=True)
+    _refresher.start()
+
+
+if __name__ == "__main__":
+    m = get_master()
+    m.refresh()
+    kinds = {}
+    for item in m.items.values():
+        kinds[item[2]] = kinds.get(item[2], 0) + 1
+    print(kinds)
@@ -4,54 +4,41 @@ import time
 import datetime
 import boto3
 import threading
-import logging
-import logging.handlers
-import sys
 
 # 📂 사용자 파일 임포트
 import config
 import token_manager
 import telegram_notifier
-import trade_logger # 👈 추가
+import trade_logger
+import log_pipeline
+import portfolio as portfolio_model
+import state_journal
+import instrument_master
+import market_data
+import api_guard
+import liquidation
+import quote_codec
+import preopen
+import broker_clock
+import shm_ring
+import quote_board
+import bar_builder
+import daily_history
+import strategies
 
 # ==============================================================================
 # 📝 [로그 시스템 설정] print를 자동으로 로그 파일에 기록하기
 # ==============================================================================
-def setup_logging():
-    # 1. 로거 생성
-    logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
-    
-    # 포맷 설정 (시간 - 레벨 - 메시지)
-    formatter = logging.Formatter('%(asctime)s | %(levelname)s | %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
-
-    # 2. 파일 핸들러 (output.log에 기록, 10MB마다 새로운 파일 생성, 최대 5개 보관)
-    #    -> 이렇게 하면 로그 파일이 무한히 커지는 것을 막아줍니다.
-    file_handler = logging.handlers.RotatingFileHandler(
-        'output.log', maxBytes=10*1024*1024, backupCount=5, encoding='utf-8'
-    )
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
-
-    # 3. 콘솔 핸들러 (화면에도 출력)
-    stream_handler = logging.StreamHandler(sys.stdout)
-    stream_handler.setFormatter(formatter)
-    logger.addHandler(stream_handler)
-    
+# 대기열 + 백그라운드 기록 스레드 구조 (매매 스레드는 대기열에 넣기만 함)
+# - 기록 대상은 output.log 하나 (터미널에서 직접 실행할 때만 화면에도 출력)
+# - config.LOG_JSON = True 로 두면 JSON Lines 형식으로 기록
+# ⚠️ 봇 실행 진입점(__main__, pipeline.py)에서만 호출합니다.
+#    import만 하는 점검 스크립트(test_logic.py, analyze_fail.py 등)는 print가 화면에 그대로 나옴
+def setup_log(log_file=log_pipeline.LOG_FILE):
+    logger = log_pipeline.setup_logging(log_file, json_lines=getattr(config, 'LOG_JSON', False))
+    log_pipeline.route_print_to_log(logger) # 🔥 모든 모듈의 print → 로그 대기열 (시간과 함께 파일에 저장)
     return logger
 
-# 로거 실행
-logger = setup_logging()
-
-# 🔥 [핵심 마법] 기존 print 함수를 logger.info로 덮어쓰기 (오버라이딩)
-# 이제 코드에서 print("안녕") 하면 -> 로그 파일에 시간과 함께 저장됩니다.
-original_print = print
-def print(*args, **kwargs):
-    # print의 내용을 하나의 문자열로 합침
-    msg = " ".join(map(str, args))
-    # 로그에 기록 (자동으로 파일+화면 출력)
-    logger.info(msg)
-
 # ==============================================================================
 # 🕹️ [모드 설정]
 # ==============================================================================
@@ -76,9 +63,11 @@ class BotConfig:
     DELAY_MOCK = 0.60 
 
     if MODE == "MOCK":
-        TR_ID = { "balance": "VTTC8434R", "buy": "VTTC0802U", "sell": "VTTC0801U" }
+        TR_ID = { "balance": "VTTC8434R", "buy": "VTTC0802U", "sell": "VTTC0801U",
+                  "fills": "VTTC8001R", "revise": "VTTC0803U" }
     else: 
-        TR_ID = { "balance": "TTTC8434R", "buy": "TTTC0802U", "sell": "TTTC0801U" }
+        TR_ID = { "balance": "TTTC8434R", "buy": "TTTC0802U", "sell": "TTTC0801U",
+                  "fills": "TTTC8001R", "revise": "TTTC0803U" }
         
     PROBE_STOCK_CODE = "005930" 
     
@@ -88,8 +77,11 @@ class BotConfig:
     
     # 📊 [종목 선정 기준]
     MIN_RATE = 5.0        # 등락률 3% 이상
+    MIN_VOL_RATIO = 0.0   # 당일 거래량 / 20일 평균 최소 배수 (0이면 끔 — daily_history 캐시 필요)
     MIN_WICK = 0.00        # 윗꼬리 최소 10%
     MAX_WICK = 0.3        # 윗꼬리 최대 30%
+    MAX_FADE = 0.7        # 최근 15분 1분봉 고저 범위에서 고점 대비 현재가 밀림 최대 비율 (1이면 끔)
+    MIN_BOOK_IMBALANCE = -0.6  # 1~5호가 누적 잔량 불균형 (매수-매도)/(매수+매도) 최소값 — 매도잔량이 매수의 4배 넘으면 제외 (-1이면 끔)
     
     # 🛡️ [매도/청산 조건]
     STOP_LOSS_RATE = -0.02      # 손절 -2%
@@ -103,39 +95,72 @@ class BotConfig:
 
     ASSET_WEIGHT = 0.7         # 투자비중
 
+    # 🧮 [분할매수 집행] "TWAP"(분마다 균등) 또는 "POV"(구간 거래대금 참여율) — 세부값은 execution.py
+    EXEC_SCHEDULE = "TWAP"
+
+    # 🧩 [전략 구성] 전략 이름: 예산 비중 (ASSET_WEIGHT 안에서 나눠 씀, 합계 1.0 이하 권장)
+    STRATEGY_WEIGHTS = {"JONGGA": 1.0}
+
 # ==============================================================================
 # 2. KIS API 래퍼
 # ==============================================================================
+# ⏱️ 시세(DATA) 호출 간격 제한 — 시세는 기본 계좌 앱키 하나로 조회하므로 프로세스 전체 공용
+DATA_LIMITER = api_guard.AdaptiveLimiter(BotConfig.DELAY_REAL)
+api_guard.get_guard().register("DATA", DATA_LIMITER)
+QUOTE_ENDPOINT = "inquire-price"     # 🚦 감시 루프가 차단 여부를 확인하는 현재가 엔드포인트
+
 class KisApi:
-    def __init__(self):
+    def __init__(self, account=None):
+        """
+        :param account: 추가 계좌 설정 dict (config.ACCOUNTS 항목). None이면 config의 기본 계좌.
+                        주문/잔고(TRADE)만 이 계좌 앱키로 보내고, 시세(DATA)는 항상 기본 앱키를 씁니다.
+        """
+        self.account = account
         self.base_headers_real = {
             "content-type": "application/json",
             "appKey": config.REAL_API_KEY,
             "appSecret": config.REAL_API_SECRET
         }
         
-        if MODE == "REAL":
+        if account:
+            self.base_headers_trade = {
+                "content-type": "application/json",
+                "appKey": account['app_key'],
+                "appSecret": account['app_secret']
+            }
+            self.acc_no = account['acc_no']
+        elif MODE == "REAL":
             self.base_headers_trade = self.base_headers_real.copy()
+            self.acc_no = config.REAL_ACC_NO
         else:
             self.base_headers_trade = {
                 "content-type": "application/json",
                 "appKey": config.MOCK_API_KEY,
                 "appSecret": config.MOCK_API_SECRET
             }
+            self.acc_no = config.MOCK_ACC_NO
         
         self.condition_seq_map = {}
 
+        # ⏱️ 호출 간격 제한 (DATA는 전체 공용, TRADE는 계좌별 — 계좌를 늘려도 서로의 주문 한도를 잠식하지 않음)
+        #    초당 건수 초과 응답이 오면 api_guard가 해당 제한기의 속도를 낮췄다가 서서히 되돌림
+        self.limiters = {
+            "DATA": DATA_LIMITER,
+            "TRADE": api_guard.AdaptiveLimiter(BotConfig.DELAY_REAL if MODE == "REAL" else BotConfig.DELAY_MOCK),
+        }
+        api_guard.get_guard().register(f"TRADE:{account['name']}" if account else "TRADE", self.limiters["TRADE"])
+
         self.session = requests.Session()
-        self.session.mount('https://', requests.adapters.HTTPAdapter(pool_connections=10, pool_maxsize=10))
+        # 🚦 모든 요청을 엔드포인트별 차단기/응답 분류를 거쳐 보냄 (연속 실패 엔드포인트는 잠시 호출하지 않음)
+        #    주문/잔고 차단기는 계좌별, 매도 주문은 차단 중에도 보냄
+        self.session.mount('https://', api_guard.GuardedAdapter(
+            self.limiters, account=account['name'] if account else None,
+            never_block_tr_ids={BotConfig.TR_ID["sell"]}, pool_connections=10, pool_maxsize=10))
+        # ⏱️ 응답 Date 헤더로 서버 시각 오프셋 추정 (시세 조회마다 표본이 쌓임)
+        self.session.hooks['response'].append(broker_clock.get_clock().observe)
 
     def _throttle(self, type="DATA"):
-        if type == "DATA":
-            time.sleep(BotConfig.DELAY_REAL)
-        else:
-            if MODE == "REAL":
-                time.sleep(BotConfig.DELAY_REAL)
-            else:
-                time.sleep(BotConfig.DELAY_MOCK)
+        self.limiters["DATA" if type == "DATA" else "TRADE"].acquire()
 
     def get_headers(self, tr_id, type="DATA"):
         self._throttle(type)
@@ -146,7 +171,12 @@ class KisApi:
             h["custtype"] = "P"
         else: 
             target = "REAL" if MODE == "REAL" else "MOCK"
-            token = token_manager.get_access_token(target)
+            if self.account:
+                token = token_manager.get_access_token(
+                    target, self.base_headers_trade["appKey"], self.base_headers_trade["appSecret"],
+                    cache_key=f"{target}:{self.account['name']}")
+            else:
+                token = token_manager.get_access_token(target)
             h = self.base_headers_trade.copy()
             h["authorization"] = f"Bearer {token}"
         h["tr_id"] = tr_id
@@ -157,10 +187,13 @@ class KisApi:
             url = f"{BotConfig.URL_REAL}/uapi/hashkey"
             headers = {
                 "content-type": "application/json",
-                "appKey": config.REAL_API_KEY,
-                "appSecret": config.REAL_API_SECRET
+                "appKey": self.base_headers_trade["appKey"],
+                "appSecret": self.base_headers_trade["appSecret"]
             }
-            res = requests.post(url, headers=headers, json=body_dict, timeout=5)
+            timeout = shm_ring.time_left(5)
+            if timeout <= 0:
+                return None
+            res = self.session.post(url, headers=headers, json=body_dict, timeout=timeout)
             if res.status_code == 200:
                 return res.json()['HASH']
             else:
@@ -170,20 +203,14 @@ class KisApi:
             return None
 
     def _safe_int(self, val):
-        try:
-            if val is None: return 0
-            s_val = str(val).strip().replace(',', '')
-            if not s_val: return 0
-            return int(float(s_val))
-        except:
-            return 0
+        return quote_codec.to_int(val)
 
     def check_holiday(self, date_str):
         url = f"{BotConfig.URL_REAL}/uapi/domestic-stock/v1/quotations/chk-holiday"
         headers = self.get_headers("CTCA0903R", type="DATA")
         params = {"BASS_DT": date_str, "CTX_AREA_NK": "", "CTX_AREA_FK": ""}
         try:
-            res = requests.get(url, headers=headers, params=params, timeout=5).json()
+            res = self.session.get(url, headers=headers, params=params, timeout=5).json()
             if res['rt_cd'] == '0':
                 for day in res['output']:
                     if day['bass_dt'] == date_str:
@@ -195,7 +222,7 @@ class KisApi:
         base_url = BotConfig.URL_REAL if MODE == "REAL" else BotConfig.URL_MOCK
         url = f"{base_url}/uapi/domestic-stock/v1/trading/inquire-balance"
         headers = self.get_headers(BotConfig.TR_ID["balance"], type="TRADE")
-        acc_no = config.REAL_ACC_NO if MODE == "REAL" else config.MOCK_ACC_NO
+        acc_no = self.acc_no
         params = {
             "CANO": acc_no[:8], "ACNT_PRDT_CD": acc_no[-2:],
             "AFHR_FLPR_YN": "N", "OFL_YN": "N", "INQR_DVSN": "02", "UNPR_DVSN": "01",
@@ -204,7 +231,7 @@ class KisApi:
         }
         try:
             # [수정 1] 타임아웃 5초 -> 30초로 변경 (안정성 확보)
-            res = requests.get(url, headers=headers, params=params, timeout=30).json()
+            res = self.session.get(url, headers=headers, params=params, timeout=30).json()
             
             if res['rt_cd'] == '0':
                 output2 = res['output2'][0]
@@ -229,7 +256,7 @@ class KisApi:
         base_url = BotConfig.URL_REAL if MODE == "REAL" else BotConfig.URL_MOCK
         url = f"{base_url}/uapi/domestic-stock/v1/trading/inquire-balance"
         headers = self.get_headers(BotConfig.TR_ID["balance"], type="TRADE")
-        acc_no = config.REAL_ACC_NO if MODE == "REAL" else config.MOCK_ACC_NO
+        acc_no = self.acc_no
         params = {
             "CANO": acc_no[:8], "ACNT_PRDT_CD": acc_no[-2:],
             "AFHR_FLPR_YN": "N", "OFL_YN": "N", "INQR_DVSN": "02", "UNPR_DVSN": "01",
@@ -237,7 +264,7 @@ class KisApi:
             "CTX_AREA_FK100": "", "CTX_AREA_NK100": ""
         }
         try:
-            res = requests.get(url, headers=headers, params=params, timeout=5).json()
+            res = self.session.get(url, headers=headers, params=params, timeout=5).json()
             if res['rt_cd'] == '0':
                 my_stocks = {}
                 for stock in res['output1']:
@@ -267,7 +294,7 @@ class KisApi:
         headers = self.get_headers("HHKST03900300", type="DATA")
         params = { "user_id": config.HTS_ID }
         try:
-            res = requests.get(url, headers=headers, params=params, timeout=5).json()
+            res = self.session.get(url, headers=headers, params=params, timeout=5).json()
             if res['rt_cd'] == '0':
                 for item in res['output2']:
                     if item['grp_nm'] == cond_name:
@@ -285,7 +312,7 @@ class KisApi:
         headers = self.get_headers("HHKST03900400", type="DATA")
         params = { "user_id": config.HTS_ID, "seq": seq }
         try:
-            res = requests.get(url, headers=headers, params=params, timeout=5).json()
+            res = self.session.get(url, headers=headers, params=params, timeout=5).json()
             if res['rt_cd'] == '0':
                 raw_list = res['output2']
                 mapped_list = []
@@ -310,86 +337,83 @@ class KisApi:
         headers_price = self.get_headers("FHKST01010100", type="DATA")
         params_price = { "FID_COND_MRKT_DIV_CODE": "J", "FID_INPUT_ISCD": code }
 
-        try:
-            # Timeout 10초
-            res1 = self.session.get(url_price, headers=headers_price, params=params_price, timeout=10).json()
-            if res1['rt_cd'] != '0': return None 
-            
-            out1 = res1['output']
-            final_name = out1.get('rprs_mant_kor_name', out1.get('hts_kor_isnm', name_from_rank))
-            if final_name is None: final_name = "이름없음"
-            
-            program_buy = int(out1.get('pgtr_ntby_qty', 0)) 
-            current_price = int(out1.get('stck_prpr', 0))
-            
+        def fetch_hoga():
             url_hoga = "https://openapi.koreainvestment.com:9443/uapi/domestic-stock/v1/quotations/inquire-asking-price-exp-ccn"
             headers_hoga = self.get_headers("FHKST01010200", type="DATA")
             params_hoga = { "FID_COND_MRKT_DIV_CODE": "J", "FID_INPUT_ISCD": code }
-            
-            res2 = self.session.get(url_hoga, headers=headers_hoga, params=params_hoga, timeout=10).json()
-            
-            ask_rsqn1 = 0
-            bid_rsqn1 = 0
-            total_ask = 0
-            total_bid = 0
-            ask_price = current_price # 기본값
-            
-            if res2['rt_cd'] == '0':
-                out2 = res2['output1']
-                ask_rsqn1 = int(out2.get('askp_rsqn1', 0)) 
-                bid_rsqn1 = int(out2.get('bidp_rsqn1', 0)) 
-                total_ask = int(out2.get('total_askp_rsqn', 0)) 
-                total_bid = int(out2.get('total_bidp_rsqn', 0))
-                
-                # ✅ [추가] 1매도호가 가져오기
-                ask_price = int(out2.get('askp1', current_price))
-
-            data = {
-                'code': code, 
-                'name': final_name,
-                'price': current_price,
-                'ask_price': ask_price, # ✅ 데이터에 추가
-                'open': int(out1.get('stck_oprc', 0)),
-                'high': int(out1.get('stck_hgpr', 0)),
-                'low': int(out1.get('stck_lwpr', 0)),
-                'max_price': int(out1.get('stck_mxpr', 0)),
-                'rate': float(out1.get('prdy_ctrt', 0.0)),
-                'program_buy': program_buy, 
-                'total_ask': total_ask,
-                'total_bid': total_bid,
-                'acml_vol': int(out1.get('acml_vol', 0)),
-                'ask_rsqn1': ask_rsqn1,     
-                'bid_rsqn1': bid_rsqn1,
-                'bid_ask_ratio': 0.0,
-                'wick_ratio': 0.0
-            }
-            
-            if data['total_ask'] > 0:
-                data['bid_ask_ratio'] = (data['total_bid'] / data['total_ask']) * 100
-            elif data['total_bid'] > 0:
-                data['bid_ask_ratio'] = 999.0
-            
-            wick_ratio = 0.0
-            if data['high'] > data['open']:
-                upper_wick = data['high'] - max(data['price'], data['open'])
-                total_candle = data['high'] - data['open']
-                wick_ratio = upper_wick / total_candle
-            data['wick_ratio'] = wick_ratio
-
-            return data
-                
+            return self.session.get(url_hoga, headers=headers_hoga, params=params_hoga, timeout=10).content
+
+        try:
+            # Timeout 10초
+            res1 = self.session.get(url_price, headers=headers_price, params=params_price, timeout=10)
+            # 🧾 응답 본문에서 필요한 필드만 꺼내 Quote로 (quote_codec — orjson이 있으면 사용)
+            #    현재가 응답이 실패면 호가는 조회하지 않음
+            return quote_codec.decode_price_detail(code, res1.content, fetch_hoga, name_from_rank)
         except Exception:
             pass
         return None
 
+    def fetch_daily_chart(self, code, start, end):
+        """일봉 (start~end, 'YYYYMMDD', 수정주가). 한 번에 최대 100일, 날짜 오름차순. 실패 시 None"""
+        url = f"{BotConfig.URL_REAL}/uapi/domestic-stock/v1/quotations/inquire-daily-itemchartprice"
+        headers = self.get_headers("FHKST03010100", type="DATA")
+        params = {"FID_COND_MRKT_DIV_CODE": "J", "FID_INPUT_ISCD": code,
+                  "FID_INPUT_DATE_1": start, "FID_INPUT_DATE_2": end,
+                  "FID_PERIOD_DIV_CODE": "D", "FID_ORG_ADJ_PRC": "0"}
+        try:
+            res = self.session.get(url, headers=headers, params=params, timeout=10).json()
+            if res['rt_cd'] != '0': return None
+            rows = []
+            for item in res.get('output2') or []:
+                date = item.get('stck_bsop_date')
+                if not date: continue
+                rows.append({
+                    'date': int(date),
+                    'open': self._safe_int(item.get('stck_oprc')),
+                    'high': self._safe_int(item.get('stck_hgpr')),
+                    'low': self._safe_int(item.get('stck_lwpr')),
+                    'close': self._safe_int(item.get('stck_clpr')),
+                    'volume': self._safe_int(item.get('acml_vol')),
+                    'value': self._safe_int(item.get('acml_tr_pbmn')),
+                })
+            rows.sort(key=lambda r: r['date'])
+            return rows
+        except Exception as e:
+            print(f"❌ [{code}] 일봉 조회 실패: {e}")
+        return None
+
+    def fetch_program_daily(self, code, end):
+        """프로그램매매 일별 순매수 (end 'YYYYMMDD' 이전 최근 구간). 날짜 오름차순. 실패 시 None"""
+        url = f"{BotConfig.URL_REAL}/uapi/domestic-stock/v1/quotations/program-trade-by-stock-daily"
+        headers = self.get_headers("FHPPG04650201", type="DATA")
+        params = {"FID_COND_MRKT_DIV_CODE": "J", "FID_INPUT_ISCD": code, "FID_INPUT_DATE_1": end}
+        try:
+            res = self.session.get(url, headers=headers, params=params, timeout=10).json()
+            if res['rt_cd'] != '0': return None
+            rows = [{'date': int(item['stck_bsop_date']),
+                     'pg_qty': self._safe_int(item.get('whol_smtn_ntby_qty')),
+                     'pg_value': self._safe_int(item.get('whol_smtn_ntby_tr_pbmn'))}
+                    for item in res.get('output') or [] if item.get('stck_bsop_date')]
+            rows.sort(key=lambda r: r['date'])
+            return rows
+        except Exception as e:
+            print(f"❌ [{code}] 프로그램 일별 조회 실패: {e}")
+        return None
+
     # ✅ [수정] price 인자 추가 (기본값 0)
     def send_order(self, code, quantity, is_buy=True, price=0):
-        base_url = BotConfig.URL_REAL if MODE == "REAL" else BotConfig.URL_MOCK
-        acc_no = config.REAL_ACC_NO if MODE == "REAL" else config.MOCK_ACC_NO
+        order = self.build_order(code, quantity, is_buy, price)
+        if order is None:
+            return {'rt_cd': '9999', 'msg1': 'HashKey Generation Failed'}
+        return self.submit_order(order)
+
+    def build_order(self, code, quantity, is_buy=True, price=0):
+        """
+        주문 본문과 hashkey를 미리 만들어 둡니다. (장전에 만들어 두면 개장 순간 전송만 하면 됨)
+        :return: submit_order()에 넘길 dict, hashkey 발급 실패 시 None
+        """
+        acc_no = self.acc_no
         tr_id = BotConfig.TR_ID["buy"] if is_buy else BotConfig.TR_ID["sell"]
-        url = f"{base_url}/uapi/domestic-stock/v1/trading/order-cash"
-        
-        headers = self.get_headers(tr_id, type="TRADE")
         
         # ✅ [수정] 가격이 있으면 지정가("00"), 없으면 시장가("01")
         ord_dvsn = "01"
@@ -407,30 +431,139 @@ class KisApi:
             "ORD_UNPR": ord_unpr   # 가격 설정
         }
         
+        hashkey = None
+        if MODE == "REAL":
+            hashkey = self.fetch_hashkey(body)
+            if not hashkey:
+                return None
+        return {'tr_id': tr_id, 'body': body, 'hashkey': hashkey, 'qty': quantity}
+
+    def submit_order(self, order):
+        base_url = BotConfig.URL_REAL if MODE == "REAL" else BotConfig.URL_MOCK
+        url = f"{base_url}/uapi/domestic-stock/v1/trading/order-cash"
+        
+        headers = self.get_headers(order['tr_id'], type="TRADE")
+        if order['hashkey']:
+            headers["hashkey"] = order['hashkey']
+
+        # ⌛ pipeline 실행 시: 제한기 대기 후 마감이 지났으면 보내지 않음 (호출 측은 이미 실패로 처리함)
+        timeout = shm_ring.time_left(30)
+        if timeout <= 0:
+            print(f"⌛ [주문 취소] {order['body']['PDNO']} 응답 마감 지남 → 전송 안 함")
+            return {'rt_cd': '9999', 'msg1': 'Deadline Passed'}
+        try:
+            res = self.session.post(url, headers=headers, json=order['body'], timeout=timeout).json()
+            return res
+        except Exception as e:
+            print(f"❌ 주문 전송 실패: {e}")
+            return {'rt_cd': '9999', 'msg1': 'Timeout/Error'}
+
+    def fetch_order_fills(self):
+        """금일 주문별 체결 현황 { 주문번호: {'code', 'qty', 'filled', 'avg_price', 'price'} } (실패 시 None)"""
+        base_url = BotConfig.URL_REAL if MODE == "REAL" else BotConfig.URL_MOCK
+        url = f"{base_url}/uapi/domestic-stock/v1/trading/inquire-daily-ccld"
+        headers = self.get_headers(BotConfig.TR_ID["fills"], type="TRADE")
+        acc_no = self.acc_no
+        today = datetime.datetime.now().strftime("%Y%m%d")
+        params = {
+            "CANO": acc_no[:8], "ACNT_PRDT_CD": acc_no[-2:],
+            "INQR_STRT_DT": today, "INQR_END_DT": today,
+            "SLL_BUY_DVSN_CD": "00", "INQR_DVSN": "00", "PDNO": "", "CCLD_DVSN": "00",
+            "ORD_GNO_BRNO": "", "ODNO": "", "INQR_DVSN_3": "00", "INQR_DVSN_1": "",
+            "CTX_AREA_FK100": "", "CTX_AREA_NK100": ""
+        }
+        try:
+            res = self.session.get(url, headers=headers, params=params, timeout=5).json()
+            if res['rt_cd'] == '0':
+                fills = {}
+                for o in res['output1']:
+                    fills[o['odno']] = {
+                        'code': o['pdno'],
+                        'qty': self._safe_int(o.get('ord_qty')),
+                        'filled': self._safe_int(o.get('tot_ccld_qty')),
+                        'avg_price': float(o.get('avg_prvs') or 0),
+                        'price': self._safe_int(o.get('ord_unpr')),
+                    }
+                return fills
+        except Exception as e:
+            print(f"❌ 체결 조회 실패: {e}")
+        return None
+
+    def revise_order(self, org_no, order_no, quantity, price, cancel=False):
+        """미체결 주문 정정(지정가 price로) 또는 취소. 잔량 전부(QTY_ALL_ORD_YN=Y)를 대상으로 합니다."""
+        base_url = BotConfig.URL_REAL if MODE == "REAL" else BotConfig.URL_MOCK
+        url = f"{base_url}/uapi/domestic-stock/v1/trading/order-rvsecncl"
+        headers = self.get_headers(BotConfig.TR_ID["revise"], type="TRADE")
+        acc_no = self.acc_no
+        body = {
+            "CANO": acc_no[:8], "ACNT_PRDT_CD": acc_no[-2:],
+            "KRX_FWDG_ORD_ORGNO": org_no or "",
+            "ORGN_ODNO": order_no or "",
+            "ORD_DVSN": "00",
+            "RVSE_CNCL_DVSN_CD": "02" if cancel else "01",
+            "ORD_QTY": str(quantity),
+            "ORD_UNPR": "0" if cancel else str(price),
+            "QTY_ALL_ORD_YN": "Y"
+        }
         if MODE == "REAL":
             hashkey = self.fetch_hashkey(body)
             if hashkey:
                 headers["hashkey"] = hashkey
             else:
                 return {'rt_cd': '9999', 'msg1': 'HashKey Generation Failed'}
-
+        timeout = shm_ring.time_left(30)
+        if timeout <= 0:
+            print(f"⌛ [정정 취소] {order_no} 응답 마감 지남 → 전송 안 함")
+            return {'rt_cd': '9999', 'msg1': 'Deadline Passed'}
         try:
-            res = requests.post(url, headers=headers, json=body, timeout=30).json()
-            return res
+            return self.session.post(url, headers=headers, json=body, timeout=timeout).json()
         except Exception as e:
-            print(f"❌ 주문 전송 실패: {e}")
+            print(f"❌ 정정/취소 전송 실패: {e}")
             return {'rt_cd': '9999', 'msg1': 'Timeout/Error'}
 
 # ==============================================================================
 # 3. 봇 메인 로직 (TradingBot)
 # ==============================================================================
 class TradingBot:
-    def __init__(self):
-        self.api = KisApi()
-        self.portfolio = {}
-        
-        # 🔒 [필수 수정] 스레드 락 초기화 (이게 없으면 에러 발생)
-        self.lock = threading.Lock() 
+    def __init__(self, account=None, market=None, api=None):
+        """
+        :param account: config.ACCOUNTS 항목 (None이면 config의 기본 계좌 — 기존 단일 계좌 동작 그대로)
+        :param market: 여러 계좌가 함께 쓸 공용 MarketData (None이면 새로 만듦)
+        :param api: 주문/잔고용 API (None이면 KisApi — 다중 프로세스 실행 시 pipeline.GatewayClient)
+        """
+        self.api = api or KisApi(account)
+        self.settings = BotConfig
+        self.mode = MODE
+        # ⏱️ 모든 시간 창(09:00 개장, 15:15 매수 등)은 증권사 서버 시각 기준
+        self.clock = broker_clock.get_clock()
+        self.account_name = account['name'] if account else None
+        self.asset_weight = account.get('asset_weight', BotConfig.ASSET_WEIGHT) if account else BotConfig.ASSET_WEIGHT
+
+        # 📡 공용 시장 데이터 (시세/조건검색) — 모든 계좌·전략이 함께 사용
+        self.market = market or market_data.MarketData(self.api)
+        # 💳 이 계좌의 잔고/보유종목 스냅샷
+        self.account = market_data.AccountSnapshot(self.api)
+        # 🪧 공유메모리 게시판 (build_bots()로 실행할 때만 열림, 아니면 None)
+        self.board = quote_board.get_writer()
+        self.bars = bar_builder.get_builder()
+        # 🧯 매도 집행 (동시 전송 + 종목별 중복 매도 방지 — 감시 루프/텔레그램이 동시에 불러도 한 번)
+        self.liquidator = liquidation.LiquidationEngine(self)
+        # 🚦 API 속도조절/차단 상태 (차단 중이면 감시 루프가 조회를 쉬고 알림)
+        self.guard = api_guard.get_guard()
+        self.quote_blocked = False
+
+        # 📒 상태 저널 (kill -9 재시작 후에도 트레일링스탑/분할매수 상태 그대로 복구)
+        if self.account_name:
+            state_dir = f"{state_journal.STATE_DIR}/{self.account_name}"
+            self.journal = state_journal.StateJournal(f"{state_dir}/snapshot.json", f"{state_dir}/journal.log")
+        else:
+            self.journal = state_journal.StateJournal()
+
+        # 🗃️ 매매 기록 저장소 미리 열기 (DB 생성/기존 CSV 이관을 첫 매수·매도 스레드에서 하지 않도록)
+        trade_logger.initialize_logs(self.account_name)
+
+        # 📦 보유 종목 (copy-on-write: 읽기는 snapshot()으로 락 없이, 쓰기는 내부에서 직렬화)
+        self.portfolio = portfolio_model.Portfolio(journal=self.journal)
 
         # 🚫 매매 제외 리스트 로드
         self.exclude_list = set(config.EXCLUDE_LIST)
@@ -442,11 +575,98 @@ class TradingBot:
         self.today_blacklist = set()
         
         self.is_running = True
+        self.peers = [self]          # 텔레그램 명령을 함께 적용할 계좌 봇들 (run()에서 지정)
         self.market_open_time = None # 개장 여부 확인용
         self.last_summary_time = 0
         
         # 분할 매수 상태 관리 { 'code': 매수횟수(0~3) }
         self.buy_progress = {}
+        # 분할 매수 주문 금액 누적 { 'code': 원 } — 재시작 시 남은 예산 계산용
+        self.buy_spent = {}
+
+        # 🏷️ 매수했지만 아직 잔고 동기화로 등록되지 않은 종목의 전략 태그 { 'code': 전략 이름 }
+        self.position_tags = {}
+
+        self._restore_state()
+
+        # 🧩 전략 플러그인 (첫 번째 전략이 태그 없는 수동매수/기존 보유분을 맡음)
+        weights = account.get('strategies', BotConfig.STRATEGY_WEIGHTS) if account else BotConfig.STRATEGY_WEIGHTS
+        self.strategies = strategies.build_strategies(self, weights)
+        self.strategy_map = {st.name: st for st in self.strategies}
+
+        # 🌅 장전 동시호가 감시 (예상체결가로 시초 갭하락 청산 주문 미리 준비)
+        self.preopen = preopen.PreOpenWatcher(self)
+
+        # 📚 종목 마스터 미리 로드 (조회는 메모리만 읽음 — 날짜 변경/다운로드 실패는 갱신 스레드가 처리)
+        instrument_master.get_master().ensure_fresh()
+        instrument_master.start_refresher()
+
+    # ------------------------------------------------------------------
+    # 📒 [상태 저장/복구]
+    # ------------------------------------------------------------------
+    def _export_state(self):
+        return {
+            'day': datetime.date.today().isoformat(),
+            'portfolio': self.portfolio.to_state(),
+            'buy_progress': dict(self.buy_progress),
+            'buy_spent': dict(self.buy_spent),
+            'today_blacklist': list(self.today_blacklist),
+            'position_tags': dict(self.position_tags),
+        }
+
+    def _restore_state(self):
+        """스냅샷+저널로 직전 상태 복구. 실제 잔고와의 차이는 감시 루프의 잔고 동기화가 맞춥니다."""
+        state = self.journal.load()
+        if not state:
+            self.journal.snapshot(self._export_state) # 기준 날짜 기록
+            return
+        for code, data in state.get('portfolio', {}).items():
+            self.portfolio.set(portfolio_model.Position.from_state(code, data), journal=False)
+        # 블랙리스트/분할매수 기록은 같은 날일 때만 유효
+        if state.get('day') == datetime.date.today().isoformat():
+            self.today_blacklist = set(state.get('today_blacklist', []))
+            self.buy_progress = dict(state.get('buy_progress', {}))
+            self.buy_spent = dict(state.get('buy_spent', {}))
+        self.position_tags = dict(state.get('position_tags', {}))
+        print(f"♻️ [상태복구] 보유 {len(self.portfolio)}종목 / 분할매수 {len(self.buy_progress)}건 / 블랙리스트 {len(self.today_blacklist)}건")
+        self.journal.snapshot(self._export_state)
+
+    def _remove_position(self, code):
+        """포트폴리오에서 제거 + 금일 재매수 금지 (저널 기록 포함)"""
+        self.portfolio.remove(code)
+        self.today_blacklist.add(code)
+        self.journal.record('blacklist_add', code)
+
+    def _daily_reset(self):
+        self.today_blacklist.clear()
+        self.buy_progress.clear()
+        self.buy_spent.clear()
+        for st in self.strategies:
+            st.reset_day()
+        self.preopen.reset()
+        self.liquidator.reset()
+        self.account.invalidate()
+        self.journal.record('daily_reset', day=datetime.date.today().isoformat())
+
+    # ------------------------------------------------------------------
+    # 🧩 [전략 연결]
+    # ------------------------------------------------------------------
+    def notify(self, msg):
+        """텔레그램 알림 (추가 계좌는 앞에 계좌 이름 표시)"""
+        if self.account_name:
+            msg = f"[{self.account_name}] {msg}"
+        return telegram_notifier.send_telegram_message(msg)
+
+    def tag_position(self, code, strategy_name):
+        """전략이 매수한 종목 표시. 잔고 동기화로 Position이 만들어질 때 이 전략으로 등록됩니다."""
+        if self.position_tags.get(code) == strategy_name or code in self.portfolio:
+            return
+        self.position_tags[code] = strategy_name
+        self.journal.record('tag', code, strategy=strategy_name)
+
+    def strategy_for(self, pos):
+        """보유 종목을 관리할 전략 (모르는 태그면 기본 전략)"""
+        return self.strategy_map.get(pos.strategy) or self.strategies[0]
 
     # ------------------------------------------------------------------
     # 📉 [매도 로직] 아침 09:00 ~ 10:00 집중 감시
@@ -456,7 +676,7 @@ class TradingBot:
 
         while self.is_running:
             try:
-                now = datetime.datetime.now()
+                now = self.clock.now()
 
                 # ==============================================================
                 # 🛑 [수정] 휴장일/주말 차단 로직 (이게 없으면 휴일에도 매도 시도함)
@@ -471,56 +691,52 @@ class TradingBot:
                 # (매 루프마다 API를 호출하면 부하가 걸리므로, 
                 #  10분(600초) 단위로 대기하거나, 이미 휴장임이 확인되면 길게 쉽니다.)
                 if 8 <= now.hour <= 15:
-                    if self.api.check_holiday(now.strftime("%Y%m%d")):
+                    if self.market.is_holiday(now.strftime("%Y%m%d")):
                         # print("⛔ [감시스레드] 오늘은 휴장일입니다. 감시 일시 중지.")
                         time.sleep(600) # 10분간 꿀잠
                         continue
                 # ==============================================================
                 
                 # 1. 잔고 동기화 (사람 vs 봇 싸움 방지)
-                real_holdings = self.api.fetch_my_stock_list()
+                real_holdings = self.account.holdings(max_age=0)
                 
                 if real_holdings is not None:
                     # [A] 수동 매도 감지 (봇에는 있는데 실제로는 없거나 줄어든 경우)
-                    for bot_code in list(self.portfolio.keys()):
+                    for bot_code, pos in self.portfolio.snapshot().items():
                         if bot_code not in real_holdings:
-                            print(f"🗑️ [수동청산 감지] {self.portfolio[bot_code]['name']} 목록에서 제거")
-                            del self.portfolio[bot_code]
-                            self.today_blacklist.add(bot_code) # 재매수 금지
+                            print(f"🗑️ [수동청산 감지] {pos.name} 목록에서 제거")
+                            self._remove_position(bot_code) # 재매수 금지
                         # else:
-                        #     bot_qty = self.portfolio[bot_code]['qty']
+                        #     bot_qty = pos.qty
                         #     real_qty = real_holdings[bot_code]['qty']
                         #     if real_qty < bot_qty:
-                        #         print(f"📉 [수동축소 감지] {self.portfolio[bot_code]['name']} 수량 조정 ({bot_qty}->{real_qty})")
-                        #         self.portfolio[bot_code]['qty'] = real_qty
+                        #         print(f"📉 [수동축소 감지] {pos.name} 수량 조정 ({bot_qty}->{real_qty})")
+                        #         self.portfolio.update(bot_code, qty=real_qty)
                         #         if real_qty == 0:
-                        #             del self.portfolio[bot_code]
-                        #             self.today_blacklist.add(bot_code)
+                        #             self._remove_position(bot_code)
                         else:
-                            bot_qty = self.portfolio[bot_code]['qty']
+                            bot_qty = pos.qty
                             real_qty = real_holdings[bot_code]['qty']
                             
                             # ✅ [수정] 수량이 다르다면(줄든 늘든) 무조건 실제 잔고로 동기화
                             if real_qty != bot_qty:
                                 # 1. 수량이 늘어난 경우 (추가 매수 / 물타기)
                                 if real_qty > bot_qty:
-                                    print(f"📈 [수동증가 감지] {self.portfolio[bot_code]['name']} 수량/평단 갱신")
+                                    print(f"📈 [수동증가 감지] {pos.name} 수량/평단 갱신")
                                     
                                 # 2. 수량이 줄어든 경우 (수동 매도)
                                 elif real_qty < bot_qty:
-                                    print(f"📉 [수동축소 감지] {self.portfolio[bot_code]['name']} 수량 갱신")
+                                    print(f"📉 [수동축소 감지] {pos.name} 수량 갱신")
                                 
                                 # ---------------------------------------------------------
                                 # 🔥 [핵심] 수량뿐만 아니라 '평단가'도 최신 잔고 기준으로 덮어쓰기
                                 # ---------------------------------------------------------
-                                self.portfolio[bot_code]['qty'] = real_qty
-                                self.portfolio[bot_code]['buy_price'] = real_holdings[bot_code]['price'] 
+                                self.portfolio.update(bot_code, qty=real_qty, buy_price=real_holdings[bot_code]['price'])
                                 # ---------------------------------------------------------
                                     
                                 # 다 팔았으면 목록에서 삭제
                                 if real_qty == 0:
-                                    del self.portfolio[bot_code]
-                                    self.today_blacklist.add(bot_code)
+                                    self._remove_position(bot_code)
 
                     # [B] 신규 발견 (재실행 시 복구 or 수동 매수)
                     for real_code, info in real_holdings.items():
@@ -530,120 +746,66 @@ class TradingBot:
                             # 블랙리스트에 있으면(오늘 판거면) 봇이 다시 잡지 않음 (단, 재실행 직후는 예외일 수 있으나 안전을 위해 스킵)
                             if real_code in self.today_blacklist: continue
                             
-                            self.portfolio[real_code] = {
-                                'name': info['name'],
-                                'qty': info['qty'],
-                                'buy_price': info['price'], # 평단가
-                                'max_profit_rate': 0.0,
-                                'has_partial_sold': False,
-                                'buy_time': datetime.datetime.now()
-                            }
-                            print(f"♻️ [관리등록] {info['name']} ({info['qty']}주, 평단 {info['price']:,.0f})")
+                            # 전략이 산 종목이면 그 전략으로, 수동매수분은 기본 전략으로 등록
+                            strategy_name = self.position_tags.pop(real_code, None) or self.strategies[0].name
+                            self.portfolio.set(portfolio_model.Position(
+                                code=real_code,
+                                name=info['name'],
+                                qty=info['qty'],
+                                buy_price=info['price'], # 평단가
+                                strategy=strategy_name
+                            ))
+                            print(f"♻️ [관리등록] {info['name']} ({info['qty']}주, 평단 {info['price']:,.0f}, {strategy_name})")
 
                 # 2. 매도 조건 검사
-                now = datetime.datetime.now()
+                now = self.clock.now()
+                if self.journal.needs_compaction():
+                    self.journal.snapshot(self._export_state)
+
+                if self.board:
+                    self.board.publish_positions(self.account_name or "main", self.portfolio.snapshot())
+                    self.board.publish_clock(self.clock.offset)
+
                 if not self.portfolio:
                     time.sleep(1)
                     continue
 
-                # ⏰ [타임컷] 10:00 전량 매도
-                if now.hour == config.TIME_CUT_HOUR and now.minute >= 0:
-                    self.liquidate_all_positions("⏰ 타임컷(10:00)")
-                    time.sleep(60) # 중복 실행 방지
+                # 🌅 [장전 08:50~09:00] 예상체결가 추적 → 갭하락 종목 매도 주문 미리 준비
+                if self.preopen.in_window(now):
+                    open_at = now.replace(hour=9, minute=0, second=0, microsecond=0) + \
+                        datetime.timedelta(seconds=preopen.OPEN_FIRE_DELAY)
+                    if self.preopen.staged and (open_at - now).total_seconds() <= 1.0:
+                        # 개장 직전이면 서버 시각 09:00:00(+지연)에 맞춰 바로 발사
+                        self.clock.dispatch_at(open_at, lambda: self.preopen.fire(self.clock.now()),
+                                               label="🌅 시초 청산")
+                    else:
+                        self.preopen.poll(now)
+                        time.sleep(0.5)
                     continue
 
-                for code in list(self.portfolio.keys()):
-                    info = self.portfolio[code]
-                    
-                    # 현재가 조회
-                    market_info = self.api.fetch_price_detail(code, info['name'])
-                    if not market_info: continue
-                    
-                    cur_price = market_info['price']
-                    buy_price = info['buy_price']
-                    profit_rate = (cur_price - buy_price) / buy_price
-
-                    # ========================================================
-                    # 🕒 [시간 체크] 장 초반 (09:00 ~ 09:03) 여부 확인
-                    # ========================================================
-                    is_early_morning = (now.hour == 9 and now.minute < 3)
-
-                    # 🚨 [VI 감지] 09:01까지 거래량 없으면 VI로 간주하고 대기
-                    if now.hour == 9 and now.minute <= 1:
-                        if market_info['acml_vol'] == 0:
-                            # print(f"⏳ [VI대기] {info['name']} 거래량 없음 (VI 발동중 추정)")
-                            continue
+                # 🔔 [개장 직후] 준비된 시초 청산 주문 즉시 전송
+                if self.preopen.staged and now.hour >= 9:
+                    self.preopen.fire(now)
 
-                    # 📉 [갭하락 칼손절] 장 시작 직후 (-2% 이하 출발 시)
-                    if now.hour == 9 and now.minute < 5:
-                        if profit_rate <= BotConfig.GAP_DOWN_PANIC:
-                            if is_early_morning:
-                                # 3분간은 로그만 찍고 매도는 참음
-                                if now.second % 10 == 0:
-                                    print(f"🛡️ [손절유예] 갭하락({profit_rate*100:.2f}%) 발생했으나 09:03까지 대기")
-                            else:
-                                # 3분이 지났는데도 회복 못했으면 매도
-                                self.sell_stock(code, f"📉갭하락 칼손절({profit_rate*100:.2f}%)")
-                                continue
-
-                    # 🛡️ 일반 손절 (-2%)
-                    if profit_rate <= BotConfig.STOP_LOSS_RATE:
-                        if is_early_morning:
-                            if now.second % 10 == 0:
-                                print(f"🛡️ [손절유예] 손절가({profit_rate*100:.2f}%) 도달했으나 09:03까지 대기")
-                        else:
-                            # 3분이 지났으면 얄짤없이 손절
-                            self.sell_stock(code, f"💧손절({profit_rate*100:.2f}%)")
-                            continue
+                # 🚦 현재가 조회가 차단 중이면 빈 시세로 루프를 돌지 않고 해제될 때까지 쉼 (매도 판단 보류)
+                if self._wait_quote_blocked():
+                    continue
 
-                    # 💰 [익절] +2% 절반 매도
-                    # if not info['has_partial_sold'] and profit_rate >= BotConfig.PARTIAL_PROFIT_RATE:
-                    #     # 주문가능수량 확인 (사용자가 매도 걸어놨으면 스킵)
-                    #     real_stock = real_holdings.get(code)
-                    #     if real_stock and real_stock['ord_psbl'] >= (info['qty'] * 0.5):
-                    #         sell_qty = int(info['qty'] * BotConfig.PARTIAL_SELL_RATIO)
-                    #         if sell_qty > 0:
-                    #             res = self.api.send_order(code, sell_qty, is_buy=False) # 시장가
-                    #             if res['rt_cd'] == '0':
-                    #                 self.portfolio[code]['qty'] -= sell_qty
-                    #                 self.portfolio[code]['has_partial_sold'] = True
-                    #                 telegram_notifier.send_telegram_message(f"💰 [부분익절] {info['name']} {sell_qty}주 수익실현")
-                    #     else:
-                    #         print(f"⚠️ [매도스킵] {info['name']} 주문가능수량 부족(미체결 주문 존재?)")
-
-                    # 절반 익절 (+2%)
-                    if not info['has_partial_sold'] and profit_rate >= BotConfig.PARTIAL_PROFIT_RATE:
-                        # 주문가능수량 확인
-                        real_stock = real_holdings.get(code)
-                        
-                        # ✅ [수정 포인트] 기준 수량을 info['qty'](봇기록) -> real_stock['qty'](실잔고)로 변경
-                        if real_stock:
-                            # 현재 실제 총 보유량
-                            total_real_qty = real_stock['qty']
-                            
-                            # 실제 보유량의 50% 계산
-                            sell_qty = int(total_real_qty * BotConfig.PARTIAL_SELL_RATIO)
-                            
-                            # 주문 가능 수량이 충분한지 체크
-                            if real_stock['ord_psbl'] >= sell_qty and sell_qty > 0:
-                                res = self.api.send_order(code, sell_qty, is_buy=False)
-                                if res['rt_cd'] == '0':
-                                    # 매도 성공 시 봇 내부 수량도 실제 잔고에서 차감된 값으로 최신화
-                                    self.portfolio[code]['qty'] = total_real_qty - sell_qty
-                                    self.portfolio[code]['has_partial_sold'] = True
-                                    telegram_notifier.send_telegram_message(f"💰 [부분익절] {info['name']} {sell_qty}주 수익실현 (수동합산분 포함)")
-                        else:
-                            print(f"⚠️ [매도스킵] {info['name']} 잔고 정보 확인 불가")
+                # ⏰ 전략별 사전 처리 (타임컷 등). True를 돌려준 전략의 종목은 이번 주기 건너뜀
+                skip = {st.name for st in self.strategies if st.before_manage(now)}
 
-                    # 🎢 [트레일링 스탑] +4% 이상 갔다가 고점대비 1% 빠지면
-                    if profit_rate > info['max_profit_rate']:
-                        self.portfolio[code]['max_profit_rate'] = profit_rate
-                    
-                    max_p = info['max_profit_rate']
-                    if max_p >= BotConfig.TS_TRIGGER_RATE:
-                        if profit_rate <= (max_p - BotConfig.TS_STOP_GAP):
-                            self.sell_stock(code, f"🎢TS익절(최고 {max_p*100:.1f}% -> 현재 {profit_rate*100:.1f}%)")
-                            continue
+                for code, info in self.portfolio.snapshot().items():
+                    strategy = self.strategy_for(info)
+                    if strategy.name in skip: continue
+
+                    # 현재가 조회 (공용 시세 캐시)
+                    market_info = self.market.quote(code, info.name, max_age=0.5)
+                    if not market_info: continue
+
+                    # 📈 보유 중 최고/최저가, 프로그램 수급 추적 (이미 받은 시세 재사용)
+                    info.path.update_from_quote(market_info)
+
+                    strategy.manage_position(info, market_info, now, real_holdings)
 
                 time.sleep(0.5)
 
@@ -651,83 +813,30 @@ class TradingBot:
                 print(f"❌ 감시 루프 에러: {e}")
                 time.sleep(3)
 
-    # ------------------------------------------------------------------
-    # 🕵️ [종목 선정 함수] 수정됨: 윗꼬리 작은 순 정렬
-    # ------------------------------------------------------------------
-    def get_jongga_targets(self):
-        # 1. 조건검색식 조회 (거래대금 Top, 프로그램 100억 등 조건 만족군)
-        candidates = self.api.fetch_condition_stocks("jongga") 
-        if not candidates: 
-            print("⚠️ 조건검색 'jongga' 결과 없음")
-            return []
-
-        # 2. 필터링 및 정보 수집
-        filtered = []
-        for stock in candidates:
-            code = stock['stck_shrn_iscd']
-            name = stock['hts_kor_isnm']
-            
-            # 잡주 제외
-            if any(x in name for x in ["스팩", "ETN", "ETF", "리츠", "우B", "우(", "인버스", "레버리지", "선물", "채권"]) or name.endswith("우"):
-                continue
-            
-            # 블랙리스트/제외종목 체크
-            if code in self.today_blacklist: continue
-            if code in self.exclude_list: continue
-            
-            # 상세 정보 조회
-            info = self.api.fetch_price_detail(code, name)
-            if not info: continue
-            
-            # [필수 조건 체크]
-            # if info['rate'] < BotConfig.MIN_RATE: continue      # 3% 이상 상승
-            # ✅ [조건 1] 시가(Open) 대비 상승률 10% 이상 확인
-            # (API의 rate는 전일대비이므로, 시가 기준 직접 계산)
-            if info['open'] > 0:
-                rate_from_open = ((info['price'] - info['open']) / info['open']) * 100
-                if rate_from_open < BotConfig.MIN_RATE: continue
-            else:
-                continue
-            # ✅ [조건 3] 윗꼬리 10% ~ 30% 사이 (설정값 사용)
-            if not (BotConfig.MIN_WICK <= info['wick_ratio'] <= BotConfig.MAX_WICK):
-                continue
-            if info['price'] <= info['open']: continue          # 양봉
-            if info['wick_ratio'] >= BotConfig.MAX_WICK: continue # 윗꼬리 30% 미만 (안전장치)
-            if info['price'] >= info['max_price']: continue     # 상한가 제외
-            
-            # 프로그램 수급 체크
-            pg_amt = info['program_buy'] * info['price']
-            if pg_amt <= 0: continue
+    def _wait_quote_blocked(self):
+        """현재가 엔드포인트가 차단 중이면 알림(처음 한 번) 후 최대 5초 대기하고 True. 복구되면 알림"""
+        wait = self.guard.retry_in(QUOTE_ENDPOINT)
+        if wait <= 0:
+            if self.quote_blocked and not self.guard.is_open(QUOTE_ENDPOINT):
+                self.quote_blocked = False
+                self.notify("✅ [API 복구] 시세 조회 정상화 — 보유 종목 감시 재개")
+            return False
+        if not self.quote_blocked:
+            self.quote_blocked = True
+            self.notify(f"⚠️ [API 차단] 시세 조회 연속 실패 — 보유 {len(self.portfolio)}종목 매도 판단 보류 "
+                        f"({wait:.0f}초 후 재시도)")
+        time.sleep(min(wait, 5.0))
+        return True
 
-            trade_amt = info['price'] * info['acml_vol']
-            
-            # ✅ 리스트에 'wick_ratio'도 함께 저장
-            filtered.append({
-                'code': code, 
-                'name': name, 
-                'trade_amt': trade_amt,
-                'price': info['price'],
-                'wick_ratio': info['wick_ratio'] # 정렬을 위해 저장
-            })
-            time.sleep(0.1) # API 부하 조절
-
-        # ✅ [조건 4] 거래대금(trade_amt)이 가장 큰 순서로 정렬 (내림차순)
-        filtered.sort(key=lambda x: x['trade_amt'], reverse=True)
-
-        # 3. ✅ [핵심 수정] 정렬 기준 변경
-        # 기존: 거래대금 많은 순 (reverse=True)
-        # 신규: 윗꼬리 비율 작은 순 (reverse=False, 오름차순) -> 0.0(윗꼬리 없음)이 1등
-        # filtered.sort(key=lambda x: x['wick_ratio'])
-        
-        # 상위 N개 선정
-        # return filtered[:BotConfig.MAX_STOCKS]
-        return filtered[:BotConfig.MAX_STOCKS]
+    def get_jongga_targets(self):
+        """종가베팅 후보 즉시 조회 (test_bot.py 등 수동 점검용)"""
+        return self.strategy_map[strategies.JonggaStrategy.name].get_targets()
 
-    def liquidate_all_positions(self, reason="장 마감"):
+    def liquidate_all_positions(self, reason="장 마감(Time-Cut)"):
+        """보유 전 종목 동시 매도 (이미 매도 진행 중인 종목은 건너뜀)"""
         if not self.portfolio: return
-        telegram_notifier.send_telegram_message(f"⏰ [{MODE}] 장 마감 전량 청산")
-        for code in list(self.portfolio.keys()):
-            self.sell_stock(code, "장 마감(Time-Cut)")
+        self.notify(f"⏰ [{MODE}] 전량 청산 ({reason})")
+        return self.liquidator.liquidate(self.portfolio.codes(), reason)
             
     def wait_until_next_morning(self):
         now = datetime.datetime.now()
@@ -737,54 +846,52 @@ class TradingBot:
         wait_seconds = (next_morning - now).total_seconds()
         if wait_seconds > 0:
             msg = f"💤 [{MODE}] 장 종료. 내일 08:50 대기."
-            telegram_notifier.send_telegram_message(msg)
-            self.portfolio = {}
-            self.blacklist = {} # Dict 초기화
-            self.daily_buy_cnt = {'MORNING': 0, 'THEME': 0, 'PROGRAM': 0}
-            
-            self.bought_themes = set()
-            self.locked_leaders_time = {}
-            self.missing_counts = {}
-            
+            self.notify(msg)
+            # 보유 종목(오버나잇 포지션)은 유지. 실제 잔고와의 차이는 감시 루프가 동기화
+            self.journal.snapshot(self._export_state)
+            for st in self.strategies:
+                st.reset_day()
+
             self.market_open_time = None
             time.sleep(wait_seconds)
-            telegram_notifier.send_telegram_message(f"☀️ [{MODE}] 봇 기상! 시장 개장 감시 시작.")
+            instrument_master.get_master().ensure_fresh() # 📚 종목 마스터 일일 갱신
+            self.notify(f"☀️ [{MODE}] 봇 기상! 시장 개장 감시 시작.")
 
     def wait_for_market_open(self):
         print("🕵️ 시장 개장 감시 시작 (삼성전자 거래량 감시)...")
         while True:
-            now = datetime.datetime.now()
+            now = self.clock.now()
             if now.weekday() >= 5:
-                telegram_notifier.send_telegram_message("⛔ 주말입니다. 대기 모드 진입.")
+                self.notify("⛔ 주말입니다. 대기 모드 진입.")
                 self.wait_until_next_morning()
                 return False
-            if self.api.check_holiday(now.strftime("%Y%m%d")):
-                telegram_notifier.send_telegram_message("⛔ 오늘은 휴장일입니다.")
+            if self.market.is_holiday(now.strftime("%Y%m%d")):
+                self.notify("⛔ 오늘은 휴장일입니다.")
                 self.wait_until_next_morning()
                 return False
             if now.hour == 8 and now.minute < 45:
                 time.sleep(1) 
                 continue
 
-            ref_data = self.api.fetch_price_detail(BotConfig.PROBE_STOCK_CODE)
+            ref_data = self.market.quote(BotConfig.PROBE_STOCK_CODE, max_age=1)
             vol = ref_data.get('acml_vol', 0) if ref_data else 0
             
             if now.hour == 8 and now.minute >= 45:
                 if vol == 0:
-                    print(f"   [08:{now.minute}] 거래량 0 (지연 개장 가능성 높음)")
+                    log_pipeline.print_repeat(f"   [08:{now.minute}] 거래량 0 (지연 개장 가능성 높음)")
                     time.sleep(30)
                 else:
-                    print(f"   [08:{now.minute}] 장전 거래량 포착({vol:,}). 09:00 정상 개장 대기.")
+                    log_pipeline.print_repeat(f"   [08:{now.minute}] 장전 거래량 포착({vol:,}). 09:00 정상 개장 대기.")
                     time.sleep(10)
                 continue
             if now.hour == 9:
                 if vol > 0:
                     self.market_open_time = now
-                    telegram_notifier.send_telegram_message(f"🔔 [정상 개장] 09:00 Market Open!\n(Vol: {vol:,})")
+                    self.notify(f"🔔 [정상 개장] 09:00 Market Open!\n(Vol: {vol:,})")
                     return True
                 else:
                     if now.minute >= 5:
-                        telegram_notifier.send_telegram_message("💤 지연 개장 확인 (Vol=0). 10:00까지 대기합니다.")
+                        self.notify("💤 지연 개장 확인 (Vol=0). 10:00까지 대기합니다.")
                         target_time = datetime.datetime(now.year, now.month, now.day, 9, 59, 50)
                         sleep_sec = (target_time - datetime.datetime.now()).total_seconds()
                         if sleep_sec > 0:
@@ -795,72 +902,37 @@ class TradingBot:
                         continue
             if 10 <= now.hour < 15:
                 self.market_open_time = now.replace(hour=9, minute=0, second=0, microsecond=0)
-                telegram_notifier.send_telegram_message(f"🔔 [지연/정상] 10:00 Market Active.\n(Vol: {vol:,})")
+                self.notify(f"🔔 [지연/정상] 10:00 Market Active.\n(Vol: {vol:,})")
                 return True
             time.sleep(1)
             
-    def sell_stock(self, code, reason):
-        if code in self.portfolio:
-            qty = self.portfolio[code]['qty']
-            cur_price = 0
-            
-            temp_info = self.api.fetch_price_detail(code)
-            # pg_amt_at_sell = 0
-            current_pg_qty = 0  # ✅ [필수] 미리 0으로 초기화해둬야 안전함
-            if temp_info: 
-                cur_price = temp_info['price']
-                current_pg_qty = temp_info.get('program_buy', 0) # 👈 [추가됨] 수량 추출
-                # pg_amt_at_sell = temp_info['program_buy'] * temp_info['price']
-
-            res = self.api.send_order(code, qty, is_buy=False)
-            if res['rt_cd'] == '0':
-                name = self.portfolio[code]['name']
-                buy_price = self.portfolio[code]['buy_price']
-                profit_rate = 0.0
-                if buy_price > 0 and cur_price > 0:
-                    profit_rate = (cur_price - buy_price) / buy_price * 100
-                msg = (f"👋 [{MODE} 매도] {name}\n"
-                       f"사유: {reason}\n"
-                       f"매도가: {cur_price:,}원 ({profit_rate:+.2f}%)\n"
-                       f"📊 PG순매수: {current_pg_qty:,}주\n" # 👈 [추가됨]
-                       f"수량: {qty}주")
-                telegram_notifier.send_telegram_message(msg)
-                # ... (주문 전송 로직) ...
-
-                # API 주문 후 성공했다고 가정하고 로그 기록 (혹은 res['rt_cd'] == '0' 내부로 이동 가능)
-
-                # 👇 [추가] 통계 데이터 추출
-                p_data = self.portfolio[code]
-                cur_price = temp_info['price'] if temp_info else 0
-                exit_pg = temp_info['program_buy'] * temp_info['price'] if temp_info else 0
-
-                # 보유 시간 계산 (분 단위)
-                hold_min = 0
-                if 'buy_time' in p_data:
-                    hold_min = int((datetime.datetime.now() - p_data['buy_time']).total_seconds() / 60)
-
-                trade_logger.log_sell({
-                    'code': code, 'name': p_data['name'],
-                    'strategy': p_data['strategy'], 'reason': reason,
-                    'buy_price': p_data['buy_price'],
-                    'sell_price': cur_price,
-                    'qty': p_data['qty'],
-                    'hold_time_min': hold_min,
-                    # 추적해온 데이터 기록
-                    'max_price': p_data.get('stats_max_price', 0),
-                    'min_price': p_data.get('stats_min_price', 0),
-                    'entry_pg': p_data.get('stats_entry_pg', 0),
-                    'max_pg': p_data.get('stats_max_pg', 0),
-                    'exit_pg': exit_pg
-                })
-                
-                # 블랙리스트 등록. 수동매매와 봇 충돌 방지
-                self.today_blacklist.add(code)
-
-                # ✅ [수정] 자물쇠를 걸고 안전하게 삭제
-                with self.lock:
-                    if code in self.portfolio:
-                        del self.portfolio[code]
+    def sell_stock(self, code, reason, prepared=None):
+        """:param prepared: KisApi.build_order()로 미리 만든 매도 주문 (장전 준비분, 수량이 같을 때만 사용)"""
+        return self.liquidator.liquidate([code], reason, {code: prepared} if prepared else None)
+
+    def status_message(self):
+        balance = self.account.balance(max_age=0)
+        msg = f"📊 [현재 상태]\n💰 잔고: {balance:,}원\n🛑 매수활성: {'ON' if self.is_buy_active else 'OFF'}\n\n[보유 종목]"
+
+        # ✅ [수정] 게시된 스냅샷을 읽으므로 감시 루프를 막지 않음
+        positions = self.portfolio.snapshot()
+        if not positions:
+            msg += "\n없음"
+        else:
+            for c, v in positions.items():
+                rate = v.max_profit_rate * 100
+                msg += f"\n- {v.name}: {v.qty}주 (최고 {rate:.1f}%) [{v.strategy}]"
+
+        clk = self.clock.status()
+        if clk['rtt_ms'] is not None:
+            msg += f"\n\n⏱️ 서버시각 오차 {clk['offset_ms']:+.0f}ms (±{clk['uncertainty_ms']:.0f}, RTT {clk['rtt_ms']:.0f}ms)"
+        lines = [line for line in (st.status() for st in self.strategies) if line]
+        guard_line = self.guard.summary()
+        if guard_line:
+            lines.append(guard_line)
+        if lines:
+            msg += "\n\n" + "\n".join(lines)
+        return msg
 
     # 📡 [신규] 텔레그램 명령 처리 쓰레드 함수
     def telegram_listener(self):
@@ -890,32 +962,25 @@ class TradingBot:
                             continue
 
                         # === 명령어 처리 로직 ===
+                        # 명령은 이 프로세스의 모든 계좌(peers)에 적용
                         if text == '/info' or text == 'info':
-                            balance = self.api.fetch_balance()
-                            msg = f"📊 [현재 상태]\n💰 잔고: {balance:,}원\n🛑 매수활성: {'ON' if self.is_buy_active else 'OFF'}\n\n[보유 종목]"
-
-                            # ✅ [수정] 조회하는 동안 데이터가 변하지 않게 잠금
-                            with self.lock:
-                                if not self.portfolio:
-                                    msg += "\n없음"
-                                else:
-                                    for c, v in self.portfolio.items():
-                                        rate = v.get('max_profit_rate', 0) * 100
-                                        msg += f"\n- {v['name']}: {v['qty']}주 (최고 {rate:.1f}%)"
-
-                            telegram_notifier.send_telegram_message(msg)
+                            for bot in self.peers:
+                                bot.notify(bot.status_message())
 
                         elif text == '/stop' or text == 'stop':
-                            self.is_buy_active = False
+                            for bot in self.peers:
+                                bot.is_buy_active = False
                             telegram_notifier.send_telegram_message("⛔ [원격제어] 매수 정지! (보유종목 관리는 계속됨)")
 
                         elif text == '/start' or text == 'start':
-                            self.is_buy_active = True
+                            for bot in self.peers:
+                                bot.is_buy_active = True
                             telegram_notifier.send_telegram_message("🟢 [원격제어] 매수 재개!")
 
                         elif text == '/sell' or text == 'sell':
                             telegram_notifier.send_telegram_message("🚨 [원격제어] 긴급 전량 매도 실행!")
-                            self.liquidate_all_positions()
+                            for bot in self.peers:
+                                bot.liquidate_all_positions("원격 전량매도(/sell)")
 
             except Exception as e:
                 print(f"텔레그램 리스너 에러: {e}")
@@ -925,32 +990,34 @@ class TradingBot:
     # 🏃 [메인 실행] 15:00 ~ 15:20 매수 집중
     # ------------------------------------------------------------------
 
-    def run(self):
+    def run(self, peers=None, listen=True):
+        """
+        :param peers: 텔레그램 명령을 함께 적용할 계좌 봇 목록 (다계좌 실행 시)
+        :param listen: 텔레그램 명령 수신 여부 (getUpdates는 프로세스에서 한 곳만 받아야 함)
+        """
+        self.peers = peers or [self]
+
         t_monitor = threading.Thread(target=self.monitor_portfolio)
         t_monitor.daemon = True
         t_monitor.start()
         
-        t_telegram = threading.Thread(target=self.telegram_listener)
-        t_telegram.daemon = True
-        t_telegram.start()
+        if listen:
+            t_telegram = threading.Thread(target=self.telegram_listener)
+            t_telegram.daemon = True
+            t_telegram.start()
 
-        telegram_notifier.send_telegram_message(f"🚀 [종가베팅 봇] 시작합니다. (개장 확인 대기)")
-        
-        target_stocks = [] 
-        invest_per_stock = 0 
+        self.notify(f"🚀 [종가베팅 봇] 시작합니다. (개장 확인 대기)")
         
         while True:
             try:
-                now = datetime.datetime.now()
+                now = self.clock.now()
 
                 if self.market_open_time is None:
                     is_open = self.wait_for_market_open() 
                     if not is_open: continue 
                 
                 if now.hour == 8 and now.minute == 0 and now.second < 10:
-                    self.today_blacklist.clear()
-                    self.buy_progress.clear()
-                    target_stocks = []
+                    self._daily_reset()
                     self.market_open_time = None 
                     print("🧹 금일 블랙리스트 초기화 & 개장 체크 준비")
                     time.sleep(10)
@@ -958,118 +1025,16 @@ class TradingBot:
                 if now.hour == 15 and now.minute >= 35:
                     self.wait_until_next_morning() 
                     self.market_open_time = None
-                    self.today_blacklist.clear()   # 블랙리스트 초기화
-                    self.buy_progress.clear()      # 매수 기록 초기화
-                    target_stocks = []             # 타겟 종목 비우기 (매우 중요!)                    
+                    self._daily_reset()            # 블랙리스트 & 매수 기록 & 전략 상태 초기화
                     print(f"🧹 [일일 리셋] {datetime.datetime.now().strftime('%m/%d')} 새 하루 시작을 위해 변수 초기화 완료")
                     continue
 
-                if now.hour == config.JONGGA_START_HOUR and now.minute < config.JONGGA_BUY_MINUTE:
-                    if now.second == 0:
-                        print(f"⏳ [{now.strftime('%H:%M:%S')}] 매수 대기 중...")
-                    time.sleep(1)
-                    continue
-                
-                if now.hour == config.JONGGA_BUY_HOUR and config.JONGGA_BUY_MINUTE <= now.minute < 20:
-                    
-                    if now.minute == 19 and now.second >= 50:
-                        time.sleep(1)
-                        continue
-
-                    # [A] 종목 선정 (아직 안 했으면 최초 1회 실행)
-                    if not target_stocks:
-                        print("🎯 [Targeting] 종가베팅 종목 선정 및 예산 심사 시작...")
-                        
-                        # 1. 일단 조건 만족하는 모든 후보를 가져옴 (3개 제한 없음)
-                        all_candidates = self.get_jongga_targets()
-                        
-                        if all_candidates:
-                            # 2. 자금 계산 (예수금 / 목표 종목수)
-                            balance = self.api.fetch_balance()
-                            
-                            # 예수금이 너무 적으면 진행 불가
-                            if balance < 100000: # 최소 10만원은 있어야 함
-                                print("❌ 예수금 부족으로 매수 포기")
-                                time.sleep(60)
-                                continue
-
-                            # 종목당 총 할당금 (예: 100만원 / 3 = 33만원)
-                            invest_per_stock = int(balance * BotConfig.ASSET_WEIGHT / BotConfig.MAX_STOCKS)
-                            
-                            # 1회 분할 매수 한도액 (예: 33만원 / 3분할 = 11만원)
-                            split_limit = int(invest_per_stock / BotConfig.SPLIT_BUY_CNT)
-                            
-                            print(f"💰 종목당 할당: {invest_per_stock:,}원 (1회 분할한도: {split_limit:,}원)")
-
-                            # 3. 예산 심사 (비싼 종목 거르고 다음 순위 픽업)
-                            final_picks = []
-                            
-                            for stock in all_candidates:
-                                # 목표 개수(3개) 다 채웠으면 중단
-                                if len(final_picks) >= BotConfig.MAX_STOCKS:
-                                    break
-                                
-                                # 🚨 [핵심] 가격 조건 심사
-                                # "주가가 1회 분할한도보다 비싼가?"
-                                if stock['price'] > split_limit:
-                                    print(f"⏩ [PASS] {stock['name']} ({stock['price']:,}원) -> 분할한도 초과로 제외 (다음 순위 검색)")
-                                    continue # 이거 안 사고 다음 종목으로 넘어감
-                                
-                                # 통과했으면 목록에 추가
-                                final_picks.append(stock)
-
-                            # 4. 최종 확정
-                            if final_picks:
-                                target_stocks = final_picks
-                                
-                                msg = "🎯 [종가베팅 최종 선정]\n"
-                                for t in target_stocks:
-                                    msg += f"- {t['name']} ({t['price']:,}원)\n"
-                                telegram_notifier.send_telegram_message(msg)
-                            else:
-                                print("❌ 모든 후보가 예산 초과로 매수 불가")
-                                time.sleep(60)
-                                continue
-
-                        else:
-                            print("❌ 조건 만족 종목 없음")
-                            time.sleep(60) 
-                            continue
-
-                    if now.second < 50: 
-                        current_split_idx = now.minute - config.JONGGA_BUY_MINUTE
-                        
-                        if 0 <= current_split_idx < BotConfig.SPLIT_BUY_CNT:
-                            for stock in target_stocks:
-                                code = stock['code']
-                                
-                                executed_cnt = self.buy_progress.get(code, 0)
-                                if executed_cnt > current_split_idx: continue
-                                if code in self.today_blacklist: continue
-                                
-                                info = self.api.fetch_price_detail(code, stock['name'])
-                                if not info: continue
-                                
-                                one_time_money = int(invest_per_stock / BotConfig.SPLIT_BUY_CNT)
-                                # 1매도호가 기준으로 수량 계산 (안전하게)
-                                qty = int(one_time_money / info['ask_price'])
-                                
-                                if qty > 0:
-                                    # ✅ [수정] price 인자에 1매도호가 전달
-                                    res = self.api.send_order(code, qty, is_buy=True, price=info['ask_price'])
-                                    if res['rt_cd'] == '0':
-                                        self.buy_progress[code] = executed_cnt + 1
-                                        telegram_notifier.send_telegram_message(
-                                            f"💎 [종가매수 {current_split_idx+1}차] {stock['name']}\n수량: {qty}주 / 가격: {info['ask_price']:,}원 (1호가)"
-                                        )
-                                        trade_logger.log_buy({
-                                            'code': code, 'name': stock['name'], 
-                                            'strategy': 'JONGGA', 'level': current_split_idx+1,
-                                            'price': info['ask_price'], # 로그도 매수호가로 기록
-                                            'qty': qty,
-                                            'pg_amt': 0, 'gap': 0, 'leader': ''
-                                        })
-                        time.sleep(5)
+                # 🧩 전략별 선정/매수 (각 전략이 자기 시간대에만 동작)
+                for st in self.strategies:
+                    try:
+                        st.on_tick(now)
+                    except Exception as e:
+                        print(f"❌ [{st.name}] 전략 실행 에러: {e}")
 
                 time.sleep(0.5)
 
@@ -1077,6 +1042,50 @@ class TradingBot:
                 print(f"Main Loop Error: {e}")
                 time.sleep(5)
 
+# ==============================================================================
+# 4. 다계좌 실행
+# ==============================================================================
+# config.ACCOUNTS 예시 (없으면 기존처럼 config의 기본 계좌 하나로 실행)
+# ACCOUNTS = [
+#     {"name": "main"},                                       # 기본 계좌 (config의 앱키/계좌번호)
+#     {"name": "sub1", "acc_no": "1234567801", "app_key": "...", "app_secret": "...",
+#      "asset_weight": 0.5, "strategies": {"JONGGA": 1.0}},   # 계좌별 투자비중/전략 구성
+# ]
+def account_list():
+    return getattr(config, 'ACCOUNTS', None) or [{"name": "main"}]
+
+def build_bots(market=None, api_factory=None):
+    """
+    계좌마다 TradingBot을 만들되 시세 피드(MarketData)는 하나를 함께 씁니다.
+    :param market: 공용 시세 (None이면 MarketData 새로 만듦 — pipeline.py는 market 프로세스 대역을 넘김)
+    :param api_factory: 계좌 항목 -> 주문용 API (None이면 계좌별 KisApi)
+    """
+    if market is None:
+        market = market_data.MarketData(KisApi())
+        # 🗄️ 일봉/프로그램 이력 캐시 하루 한 번 갱신 (pipeline.py에서는 market 프로세스가 담당)
+        daily_history.start_updater(market.api)
+    # 🪧 최신 시세/보유/후보를 공유메모리에 게시 (analyze_fail.py 등이 API 호출 없이 읽음)
+    board = quote_board.open_writer()
+    if board:
+        market.add_listener(board.publish_quote)
+    # 🕯️ 조회된 모든 시세를 1분/5분봉으로 집계 (차트 API 호출 없음)
+    market.add_listener(bar_builder.get_builder().on_quote)
+    bots = []
+    for acc in account_list():
+        # 앱키가 없는 항목은 기본 계좌 (로그/상태 경로도 기존 그대로)
+        api = api_factory(acc) if api_factory else None
+        bots.append(TradingBot(acc if acc.get('app_key') else None, market, api=api))
+    return bots
+
+def run_all(bots):
+    """첫 번째 봇이 텔레그램 명령을 받아 전체 계좌에 적용하고, 나머지는 매매만 수행합니다."""
+    for bot in bots[1:]:
+        t = threading.Thread(target=bot.run, kwargs={'listen': False})
+        t.daemon = True
+        t.start()
+    bots[0].run(peers=bots)
+
 if __name__ == "__main__":
-    bot = TradingBot()
-    bot.run()
+    # 프로세스 분리 실행은 python3 pipeline.py (시세/주문/전략 프로세스 + 감독)
+    setup_log()
+    run_all(build_bots())
@@ -0,0 +1,198 @@
+# liquidation.py
+import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import trade_logger
+
+# ==============================================================================
+# 🧯 청산 집행기 (여러 종목 시장가 매도를 동시에, 종목별로 한 번만 — 부분 매도 포함)
+# ==============================================================================
+MAX_WORKERS = 8             # 동시에 보내는 매도 주문 수 (TRADE 호출 간격 제한은 그대로 적용됨)
+QUOTE_MAX_AGE = 2.0         # 매도 기록용 시세는 이 시간(초) 안의 캐시면 재사용 (감시 루프가 이미 조회한 값)
+CONFIRM_DELAY = 0.5         # 주문 접수 후 잔고로 체결 확인하기 전 대기(초) — 시장가는 대부분 즉시 체결
+
+
+def position_key(pos, sell_qty=None):
+    """
+    보유분 하나의 멱등 키 (종목 + 수량 + 매수 시각) — 같은 보유분에 매도 주문은 한 번만.
+    부분 매도는 매도 수량을 덧붙여 전량 매도와 구분 (부분 매도 후에는 보유 수량이 바뀌어 키도 바뀜)
+    """
+    key = f"{pos.code}:{pos.qty}:{pos.buy_time:%Y%m%d%H%M%S}"
+    return f"{key}:{sell_qty}" if sell_qty else key
+
+
+class LiquidationEngine:
+    """
+    계좌(봇) 하나의 매도 집행. 감시 루프(타임컷/손절), 텔레그램(/sell), 장전 청산이 동시에 불러도
+    진행 중(in-flight)이거나 이미 접수된 보유분은 다시 팔지 않습니다.
+    주문은 스레드 풀로 동시에 보내고, 결과는 잔고 한 번 조회로 확인한 뒤 알림도 한 번만 보냅니다.
+    """
+
+    def __init__(self, bot, max_workers=MAX_WORKERS):
+        self.bot = bot
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="liquidate")
+        self._inflight = {}     # code -> 멱등 키 (주문 전송 ~ 결과 처리 중)
+        self._sent = {}         # 멱등 키 -> 접수 시각 (매도 접수된 보유분)
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self._sent.clear()
+
+    def _claim(self, pos, sell_qty=None):
+        key = position_key(pos, sell_qty)
+        with self._lock:
+            if pos.code in self._inflight or key in self._sent:
+                return None
+            self._inflight[pos.code] = key
+        return key
+
+    def _release(self, code, key, sent):
+        with self._lock:
+            self._inflight.pop(code, None)
+            if sent:
+                self._sent[key] = time.time()
+
+    # ------------------------------------------------------------------
+    # 📤 매도
+    # ------------------------------------------------------------------
+    def liquidate(self, codes, reason, prepared=None, qty=None):
+        """
+        codes 전부 시장가 매도 (동시 전송).
+        :param reason: 사유 문자열 또는 {code: 사유}
+        :param prepared: {code: KisApi.build_order() 결과} — 장전에 만든 주문 (수량이 같을 때만 사용)
+        :param qty: {code: 매도 수량} — 부분 매도 (없으면 보유 수량 전부). 남은 수량은 계속 보유
+        :return: {code: 주문 응답} (이미 진행 중/접수된 종목은 빠짐)
+        """
+        bot = self.bot
+        prepared = prepared or {}
+        qty = qty or {}
+        jobs = []
+        for code in codes:
+            pos = bot.portfolio.get(code)
+            if pos is None:
+                continue
+            sell_qty = qty.get(code)
+            if sell_qty is not None:
+                if sell_qty <= 0:
+                    continue
+                if sell_qty >= pos.qty:
+                    sell_qty = None     # 보유 수량 이상이면 전량 매도
+            key = self._claim(pos, sell_qty)
+            if key is None:
+                print(f"⏭️ [청산 중복] {pos.name} 이미 매도 진행/접수됨")
+                continue
+            why = reason.get(code, "") if isinstance(reason, dict) else reason
+            jobs.append((pos, sell_qty, key, why, self._pool.submit(self._send, pos, prepared.get(code), sell_qty)))
+        if not jobs:
+            return {}
+
+        results, sold = {}, []
+        for pos, sell_qty, key, why, future in jobs:
+            res, quote = future.result()
+            results[pos.code] = res
+            ok = res.get('rt_cd') == '0'
+            try:
+                if ok:
+                    sold.append(self._record(pos, why, quote, sell_qty))
+                else:
+                    print(f"❌ [매도 실패] {pos.name}: {res.get('msg1')}")
+            finally:
+                self._release(pos.code, key, ok)
+
+        if sold:
+            self._confirm(sold)
+        return results
+
+    def _send(self, pos, prepared, sell_qty=None):
+        """풀 스레드: 주문 전송 후 기록용 시세 (주문이 먼저 — 시세는 대개 캐시)"""
+        api = self.bot.api
+        sell_qty = sell_qty or pos.qty
+        try:
+            if prepared is not None and prepared['qty'] == sell_qty:
+                res = api.submit_order(prepared)
+            else:
+                res = api.send_order(pos.code, sell_qty, is_buy=False)
+        except Exception as e:
+            res = {'rt_cd': '9999', 'msg1': f"{type(e).__name__}: {e}"}
+        quote = None
+        if res.get('rt_cd') == '0':
+            try:
+                quote = self.bot.market.quote(pos.code, pos.name, max_age=QUOTE_MAX_AGE)
+            except Exception:
+                pass
+        return res, quote
+
+    def _record(self, pos, reason, quote, sell_qty=None):
+        """
+        매도 접수된 보유분: 매매 기록(판 수량) + 포트폴리오 제거(금일 재매수 금지).
+        부분 매도면 제거 대신 남은 수량으로 줄이고 has_partial_sold 표시. 알림용 요약 dict 반환
+        """
+        bot = self.bot
+        sell_qty = sell_qty or pos.qty
+        cur_price = quote['price'] if quote else 0
+        pg_qty = quote.get('program_buy', 0) if quote else 0
+        profit_rate = 0.0
+        if pos.buy_price > 0 and cur_price > 0:
+            profit_rate = (cur_price - pos.buy_price) / pos.buy_price * 100
+
+        # 매도 직전 시세까지 경로에 반영한 뒤 보유 중 통계 추출
+        pos.path.update_from_quote(quote)
+        path_stats = pos.path.stats()
+        hold_min = int((datetime.datetime.now() - pos.buy_time).total_seconds() / 60)
+
+        trade_logger.log_sell({
+            'code': pos.code, 'name': pos.name,
+            'strategy': pos.strategy, 'reason': reason,
+            'buy_price': pos.buy_price,
+            'sell_price': cur_price,
+            'qty': sell_qty,
+            'hold_time_min': hold_min,
+            'max_price': path_stats.get('max_price', 0),
+            'min_price': path_stats.get('min_price', 0),
+            'entry_pg': path_stats.get('entry_pg', 0),
+            'max_pg': path_stats.get('max_pg', 0),
+            'exit_pg': pg_qty * cur_price,
+        }, account=bot.account_name)
+
+        left = pos.qty - sell_qty
+        if left > 0:
+            bot.portfolio.update(pos.code, qty=left, has_partial_sold=True)
+        else:
+            bot._remove_position(pos.code)
+        return {'pos': pos, 'qty': sell_qty, 'left': left, 'reason': reason,
+                'price': cur_price, 'rate': profit_rate, 'pg_qty': pg_qty}
+
+    # ------------------------------------------------------------------
+    # ✅ 체결 확인 + 알림 (잔고 조회 한 번, 메시지 한 번)
+    # ------------------------------------------------------------------
+    def _confirm(self, sold):
+        bot = self.bot
+        time.sleep(CONFIRM_DELAY)
+        holdings = bot.account.holdings(max_age=0)
+        for s in sold:
+            if holdings is None:
+                s['state'] = "확인불가"
+            else:
+                unfilled = holdings.get(s['pos'].code, {}).get('qty', 0) - s['left']
+                s['state'] = "체결" if unfilled <= 0 else f"미체결 {unfilled}주"
+
+        mode = bot.mode
+        if len(sold) == 1:
+            s = sold[0]
+            pos = s['pos']
+            msg = (f"👋 [{mode} 매도] {pos.name}\n"
+                   f"사유: {s['reason']}\n"
+                   f"매도가: {s['price']:,}원 ({s['rate']:+.2f}%)\n"
+                   f"📊 PG순매수: {s['pg_qty']:,}주\n"
+                   f"수량: {s['qty']}주 ({s['state']})")
+        else:
+            done = sum(1 for s in sold if s['state'] == "체결")
+            msg = f"👋 [{mode} 일괄매도] {len(sold)}종목 (체결 확인 {done}/{len(sold)})"
+            for s in sold:
+                pos = s['pos']
+                msg += (f"\n- {pos.name} {s['qty']}주 {s['price']:,}원 ({s['rate']:+.2f}%) "
+                        f"[{s['state']}] {s['reason']}")
+        bot.notify(msg)
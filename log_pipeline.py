@@ -0,0 +1,257 @@
+# log_pipeline.py
+import atexit
+import builtins
+import json
+import logging
+import logging.handlers
+import queue
+import re
+import sys
+import threading
+
+# ==============================================================================
+# ⚙️ 로그 설정
+# ==============================================================================
+LOG_FILE = "output.log"
+MAX_BYTES = 10 * 1024 * 1024    # 10MB마다 새 파일
+BACKUP_COUNT = 5                # 최대 5개 보관
+QUEUE_SIZE = 10000              # 대기열이 꽉 차면 (디스크 장애 등) 버리고 매매는 계속
+REPEAT_WINDOW = 60.0            # print_repeat()로 남긴 같은 내용의 로그는 이 시간(초)에 한 번만 기록
+FLUSH_INTERVAL = 5.0            # 반복이 멈춘 로그의 생략 횟수를 이 주기(초)로 확인해 기록
+WARN_PREFIXES = ("❌", "⚠")      # 이 글자로 시작하는 print는 WARNING으로 기록
+
+_listener = None
+_flush_stop = None
+_original_print = builtins.print
+
+# ==============================================================================
+# 🔁 반복 로그 억제 필터
+# ==============================================================================
+class RepeatSuppressFilter(logging.Filter):
+    """
+    print_repeat()로 남긴 로그만 대상으로, 숫자만 바뀌는 같은 문장(예: '[08:45] 장전 거래량 포착(592)')을
+    window초에 한 번만 통과시킵니다. 일반 print와 WARNING 이상은 그대로 통과합니다.
+    생략된 횟수는 다음에 통과하는 로그 뒤에 붙이고, 반복이 멈추면 flush()가 마지막 문장과 함께 기록합니다.
+    ⚠️ 백그라운드 기록 스레드에서만 실행되므로 락이 필요 없습니다.
+    """
+    _DIGITS = re.compile(r"\d+")
+
+    def __init__(self, window=REPEAT_WINDOW, max_keys=1000):
+        super().__init__()
+        self.window = window
+        self.max_keys = max_keys
+        self._seen = {}  # key -> [마지막 기록 시각, 생략 횟수, 마지막으로 생략한 record]
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not getattr(record, 'repeat', False):
+            return True
+
+        key = self._DIGITS.sub("#", record.getMessage())
+        now = record.created
+        state = self._seen.get(key)
+
+        if state is None:
+            if len(self._seen) >= self.max_keys:
+                self._seen.clear()
+            self._seen[key] = [now, 0, None]
+            return True
+
+        if now - state[0] < self.window:
+            state[1] += 1
+            state[2] = record
+            return False
+
+        if state[1] > 0:
+            self._annotate(record, state[1])
+        state[:] = [now, 0, None]
+        return True
+
+    def flush(self, now):
+        """window가 지나도록 다시 안 나온 문장의 생략분을 기록할 record 목록 (마지막 생략 문장 + 횟수)"""
+        pending = []
+        for key, state in list(self._seen.items()):
+            if now - state[0] < self.window:
+                continue
+            if state[1] > 0:
+                pending.append(self._annotate(state[2], state[1]))
+            del self._seen[key]
+        return pending
+
+    def _annotate(self, record, count):
+        record.msg = f"{record.getMessage()} (지난 {self.window:.0f}초간 {count}회 반복 생략)"
+        record.args = None
+        return record
+
+# ==============================================================================
+# 🧾 JSON Lines 포맷 (선택)
+# ==============================================================================
+class JsonLineFormatter(logging.Formatter):
+    """한 줄에 JSON 객체 하나씩 기록합니다. (jq / pandas.read_json(lines=True)로 바로 분석)"""
+
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%d %H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+# ==============================================================================
+# 📮 대기열 핸들러 (호출 스레드는 대기열에 넣기만 함)
+# ==============================================================================
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    기본 QueueHandler는 호출 스레드에서 포맷까지 하고, 대기열이 차면 예외를 냅니다.
+    메시지 합치기만 하고 포맷은 기록 스레드에 맡기며, 대기열이 차면 조용히 버립니다.
+    """
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+# ==============================================================================
+# 🚀 설정 함수
+# ==============================================================================
+def setup_logging(log_file=LOG_FILE, json_lines=False, console=None, repeat_window=REPEAT_WINDOW):
+    """
+    로그를 대기열 + 백그라운드 기록 스레드 구조로 설정합니다.
+    - 파일(output.log) 하나만 기록 대상입니다. 화면 출력은 터미널에서 직접 실행할 때만 켭니다.
+      (nohup으로 stdout을 같은 파일에 돌리면 모든 줄이 두 번 기록되던 문제 방지)
+    :param json_lines: True면 JSON Lines 형식으로 기록
+    :param console: None이면 stdout이 터미널일 때만 화면 출력
+    """
+    global _listener
+
+    logger = logging.getLogger()
+    logger.setLevel(logging.INFO)
+
+    # 재호출 시 기존 구성 정리
+    stop_logging()
+    for h in list(logger.handlers):
+        logger.removeHandler(h)
+
+    if json_lines:
+        formatter = JsonLineFormatter()
+    else:
+        formatter = logging.Formatter('%(asctime)s | %(levelname)s | %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_file, maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT, encoding='utf-8'
+    )
+    file_handler.setFormatter(formatter)
+    sinks = [file_handler]
+
+    if console is None:
+        console = sys.stdout.isatty()
+    if console:
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(formatter)
+        sinks.append(stream_handler)
+
+    log_queue = queue.Queue(maxsize=QUEUE_SIZE)
+    queue_handler = _NonBlockingQueueHandler(log_queue)
+    logger.addHandler(queue_handler)
+
+    _listener = logging.handlers.QueueListener(log_queue, *sinks, respect_handler_level=False)
+    if repeat_window and repeat_window > 0:
+        # 리스너 단계에서 거르므로 필터 비용도 매매 스레드에서 빠짐
+        _listener.handle = _filtered_handle(_listener.handle, RepeatSuppressFilter(repeat_window))
+        _start_flush_timer(log_queue)
+    _listener.start()
+
+    return logger
+
+def route_print_to_log(logger=None):
+    """
+    다른 모듈(token_manager, trade_store 등)의 print도 로그 대기열로 보냅니다.
+    (stdout은 console.log로 분리되므로, 이게 없으면 해당 출력이 output.log에서 빠짐)
+    ❌/⚠️ 로 시작하면 WARNING, 나머지는 INFO. file=sys.stderr 등 다른 대상으로 지정한 print는 그대로 둡니다.
+    """
+    logger = logger or logging.getLogger()
+
+    def _print(*args, sep=' ', end='\n', file=None, flush=False):
+        if file is not None and file is not sys.stdout:
+            return _original_print(*args, sep=sep, end=end, file=file, flush=flush)
+        msg = sep.join(map(str, args))
+        logger.log(logging.WARNING if msg.lstrip().startswith(WARN_PREFIXES) else logging.INFO, msg)
+
+    builtins.print = _print
+
+def print_repeat(*args, sep=' '):
+    """
+    숫자만 바뀌며 계속 반복되는 상태 문구용 print (장전 거래량, 손절유예 대기 등).
+    같은 문장은 REPEAT_WINDOW초에 한 번만 기록하고 생략 횟수를 붙입니다. 로그 설정 전이면 그냥 print
+    """
+    msg = sep.join(map(str, args))
+    if _listener is None:
+        print(msg)
+        return
+    logging.getLogger().info(msg, extra={'repeat': True})
+
+def _start_flush_timer(log_queue):
+    """FLUSH_INTERVAL마다 대기열에 표시 record를 넣어, 기록 스레드가 반복이 멈춘 로그의 생략 횟수를 기록하게 함"""
+    global _flush_stop
+    stop = _flush_stop = threading.Event()
+
+    def run():
+        while not stop.wait(FLUSH_INTERVAL):
+            _put_flush_marker(log_queue)
+        _put_flush_marker(log_queue, final=True)
+
+    stop.thread = threading.Thread(target=run, name="log-flush", daemon=True)
+    stop.thread.start()
+
+def _put_flush_marker(log_queue, final=False):
+    marker = logging.LogRecord("log_pipeline", logging.DEBUG, __file__, 0, "", None, None)
+    marker.repeat_flush = True
+    if final:
+        marker.created = float('inf')   # 종료 시에는 남은 생략분을 모두 기록
+    try:
+        log_queue.put_nowait(marker)
+    except queue.Full:
+        pass
+
+def _filtered_handle(handle, repeat_filter):
+    def handle_with_filter(record):
+        if getattr(record, 'repeat_flush', False):
+            for pending in repeat_filter.flush(record.created):
+                handle(pending)
+            return
+        if repeat_filter.filter(record):
+            handle(record)
+    return handle_with_filter
+
+def stop_logging():
+    """대기열에 남은 로그를 모두 기록하고 기록 스레드를 멈춥니다."""
+    global _listener
+    if _flush_stop is not None:
+        _flush_stop.set()
+        _flush_stop.thread.join(timeout=1.0)   # 마지막 생략분 표시가 대기열에 들어간 뒤 리스너 종료
+    if _listener is not None:
+        try:
+            _listener.stop()
+        except Exception:
+            pass
+        for h in _listener.handlers:
+            try:
+                h.close()
+            except Exception:
+                pass
+        _listener = None
+
+atexit.register(stop_logging)
@@ -0,0 +1,219 @@
+# market_data.py
+import threading
+import time
+
+# ==============================================================================
+# 📡 공용 시장 데이터 계층 (전략이 여러 개여도 API 호출은 한 번)
+# ==============================================================================
+QUOTE_TTL = 1.0             # 같은 종목 시세를 이 시간(초) 안에 다시 요청하면 캐시 재사용
+BALANCE_TTL = 30.0          # 예수금/순자산 캐시 유지 시간(초)
+HOLDINGS_TTL = 1.0          # 보유잔고 캐시 유지 시간(초)
+CONDITION_TTL = 5.0         # 조건검색 결과 캐시 유지 시간(초)
+HOLIDAY_TTL = 600           # 휴장일 조회 결과 캐시 유지 시간(초)
+MARKET_OPEN_HOUR = 9        # 이 시각 이후 조회된 시세의 시가만 당일 시가로 인정
+
+
+def today_open(ts, quote):
+    """ts(조회 시각)가 오늘 장중이면 그 시세의 시가, 아니면 None (시가는 장중에 바뀌지 않음)"""
+    if not quote or quote.get('open', 0) <= 0:
+        return None
+    fetched, now = time.localtime(ts), time.localtime()
+    if fetched[:3] != now[:3] or fetched.tm_hour < MARKET_OPEN_HOUR:
+        return None
+    return quote['open']
+
+
+class IntervalLimiter:
+    """
+    프로세스 전체에서 공유하는 호출 간격 제한기.
+    스레드마다 따로 sleep 하던 방식과 달리, 여러 스레드가 동시에 호출해도
+    전체 호출 속도가 1/min_interval 을 넘지 않도록 순번(slot)을 나눠줍니다.
+    """
+
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.min_interval
+        wait = slot - now
+        if wait > 0:
+            time.sleep(wait)
+
+
+class QuoteCache:
+    """
+    fetch_price_detail 결과를 짧게 캐시합니다.
+    같은 종목을 여러 스레드/전략이 동시에 요청하면 한 번만 조회하고 결과를 나눠 씁니다.
+    """
+
+    def __init__(self, fetch, ttl=QUOTE_TTL):
+        self._fetch = fetch
+        self.ttl = ttl
+        self._data = {}         # code -> (조회 시각, quote)
+        self._inflight = {}     # code -> threading.Event
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.listeners = []     # 새로 조회된 시세를 받을 함수 (code, 조회 시각, quote)
+
+    def get(self, code, name=None, max_age=None):
+        max_age = self.ttl if max_age is None else max_age
+        while True:
+            with self._lock:
+                cached = self._data.get(code)
+                if cached and time.time() - cached[0] <= max_age:
+                    self.hits += 1
+                    return cached[1]
+                event = self._inflight.get(code)
+                if event is None:
+                    event = threading.Event()
+                    self._inflight[code] = event
+                    break
+            # 다른 스레드가 조회 중이면 그 결과를 기다림
+            event.wait(timeout=15)
+            with self._lock:
+                cached = self._data.get(code)
+                if cached and time.time() - cached[0] <= max(max_age, 1.0):
+                    self.hits += 1
+                    return cached[1]
+
+        try:
+            self.misses += 1
+            quote = self._fetch(code, name)
+            if quote:
+                self._store(code, quote)
+            return quote
+        finally:
+            with self._lock:
+                self._inflight.pop(code, None)
+            event.set()
+
+    def put(self, code, quote):
+        """다른 경로(주문 직전 조회 등)로 받은 시세도 캐시에 반영"""
+        if quote:
+            self._store(code, quote)
+
+    def _store(self, code, quote):
+        ts = time.time()
+        with self._lock:
+            self._data[code] = (ts, quote)
+        for fn in self.listeners:
+            try:
+                fn(code, ts, quote)
+            except Exception as e:
+                print(f"⚠️ [시세 리스너] {e}")
+
+    def fetched_at(self, code):
+        """마지막 시세를 실제로 조회한 시각 (없으면 0)"""
+        cached = self._data.get(code)
+        return cached[0] if cached else 0.0
+
+    def peek(self, code):
+        """API 호출 없이 마지막 시세만 반환 (없으면 None)"""
+        cached = self._data.get(code)
+        return cached[1] if cached else None
+
+    def day_open(self, code):
+        """오늘 조회해둔 시세가 있으면 시가 (API 호출 없음, 없으면 None)"""
+        cached = self._data.get(code)
+        return today_open(*cached) if cached else None
+
+
+class AccountSnapshot:
+    """
+    계좌 하나의 잔고(순자산)/보유종목 조회를 캐시해 감시 루프와 전략들이 함께 씁니다.
+    계좌마다 하나씩 만들며, api는 그 계좌의 주문용 KisApi 입니다.
+    """
+
+    def __init__(self, api, balance_ttl=BALANCE_TTL, holdings_ttl=HOLDINGS_TTL):
+        self.api = api
+        self.balance_ttl = balance_ttl
+        self.holdings_ttl = holdings_ttl
+        self._balance = (0.0, None)
+        self._holdings = (0.0, None)
+        self._lock = threading.Lock()
+
+    def balance(self, max_age=None):
+        max_age = self.balance_ttl if max_age is None else max_age
+        ts, value = self._balance
+        if value is not None and time.time() - ts <= max_age:
+            return value
+        with self._lock:
+            ts, value = self._balance
+            if value is not None and time.time() - ts <= max_age:
+                return value
+            value = self.api.fetch_balance()
+            if value:
+                self._balance = (time.time(), value)
+            return value
+
+    def holdings(self, max_age=None):
+        """보유종목 dict (조회 실패 시 None)"""
+        max_age = self.holdings_ttl if max_age is None else max_age
+        ts, value = self._holdings
+        if value is not None and time.time() - ts <= max_age:
+            return value
+        with self._lock:
+            ts, value = self._holdings
+            if value is not None and time.time() - ts <= max_age:
+                return value
+            value = self.api.fetch_my_stock_list()
+            if value is not None:
+                self._holdings = (time.time(), value)
+            return value
+
+    def last_holdings(self):
+        return self._holdings[1]
+
+    def invalidate(self):
+        self._balance = (0.0, None)
+        self._holdings = (0.0, None)
+
+
+class MarketData:
+    """
+    시세/조건검색/휴장일 조회 공용 피드. 프로세스에 하나만 만들어 모든 계좌·전략이 함께 씁니다.
+    같은 종목을 여러 계좌가 보유하거나 여러 전략이 보더라도 API 조회는 한 번입니다.
+    """
+
+    def __init__(self, api):
+        self.api = api
+        self.quotes = QuoteCache(api.fetch_price_detail)
+        self._conditions = {}   # cond_name -> (조회 시각, 결과)
+        self._holidays = {}     # date_str -> (조회 시각, 휴장 여부)
+        self._lock = threading.Lock()
+
+    def quote(self, code, name=None, max_age=None):
+        return self.quotes.get(code, name, max_age)
+
+    def day_open(self, code):
+        return self.quotes.day_open(code)
+
+    def add_listener(self, fn):
+        """새로 조회된 시세마다 fn(code, 조회 시각, quote) 호출 (같은 함수는 한 번만 등록)"""
+        if fn not in self.quotes.listeners:
+            self.quotes.listeners.append(fn)
+
+    def fetch_condition_stocks(self, cond_name, max_age=CONDITION_TTL):
+        """조건검색 결과 (빈 결과는 캐시하지 않음)"""
+        with self._lock:
+            cached = self._conditions.get(cond_name)
+            if cached and time.time() - cached[0] <= max_age:
+                return cached[1]
+            rows = self.api.fetch_condition_stocks(cond_name)
+            if rows:
+                self._conditions[cond_name] = (time.time(), rows)
+            return rows
+
+    def is_holiday(self, date_str):
+        cached = self._holidays.get(date_str)
+        if cached and time.time() - cached[0] <= HOLIDAY_TTL:
+            return cached[1]
+        value = self.api.check_holiday(date_str)
+        self._holidays[date_str] = (time.time(), value)
+        return value
@@ -2,6 +2,7 @@ import requests
 import json
 import config
 import token_manager
+import quote_board
 
 TARGET_CODE = "005930"  # 삼성전자
 MODE = "REAL"
@@ -9,6 +10,11 @@ MODE = "REAL"
 def check_ats_ticks():
     print(f"🚀 [넥스트트레이드] 체결 내역(Tick) 우회 검증 - {TARGET_CODE}")
     
+    # 체결추이(틱)는 봇 게시판에 없으므로 API로 조회 — 봇이 실행 중이면 호출 한도를 나눠 씀
+    board = quote_board.attach()
+    if board:
+        print("⚠️ 봇 실행 중: 이 조회(1회)는 봇과 같은 API 호출 한도를 사용합니다. 장중에는 피하세요.")
+
     # 1. 토큰 발급
     access_token = token_manager.get_access_token(MODE)
     if not access_token: return
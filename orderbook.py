@@ -0,0 +1,114 @@
+# orderbook.py
+import numpy as np
+
+# ==============================================================================
+# 📚 10단계 호가창 (NumPy 배열)
+# ==============================================================================
+LEVELS = 10
+
+# KIS 호가 응답(output1) 필드 순서: 매도호가, 매도잔량, 매수호가, 매수잔량 × 1~10단계
+_KEYS = ([f"askp{i}" for i in range(1, LEVELS + 1)] +
+         [f"askp_rsqn{i}" for i in range(1, LEVELS + 1)] +
+         [f"bidp{i}" for i in range(1, LEVELS + 1)] +
+         [f"bidp_rsqn{i}" for i in range(1, LEVELS + 1)])
+
+ASK_PX, ASK_QTY, BID_PX, BID_QTY = 0, 1, 2, 3
+
+
+def _to_int(val):
+    try:
+        return int(val)
+    except (TypeError, ValueError):
+        return 0
+
+
+class OrderBook:
+    """
+    호가 응답 한 번으로 만든 10단계 호가창.
+    가격/잔량을 (4, 10) int64 배열 하나에 담고 (행: 매도가/매도잔량/매수가/매수잔량),
+    지표는 모두 배열 연산으로 계산합니다. 빈 단계(가격 0)는 잔량 0으로 취급합니다.
+    """
+    __slots__ = ("code", "levels", "total_ask", "total_bid")
+
+    def __init__(self, code, levels, total_ask=0, total_bid=0):
+        self.code = code
+        self.levels = levels
+        self.total_ask = total_ask
+        self.total_bid = total_bid
+
+    @classmethod
+    def from_kis(cls, code, out):
+        levels = np.array([_to_int(out.get(k)) for k in _KEYS], dtype=np.int64).reshape(4, LEVELS)
+        return cls(code, levels,
+                   total_ask=_to_int(out.get('total_askp_rsqn')),
+                   total_bid=_to_int(out.get('total_bidp_rsqn')))
+
+    # ------------------------------------------------------------------
+    # 🔎 기본 값
+    # ------------------------------------------------------------------
+    @property
+    def ask_px(self):
+        return self.levels[ASK_PX]
+
+    @property
+    def ask_qty(self):
+        return self.levels[ASK_QTY]
+
+    @property
+    def bid_px(self):
+        return self.levels[BID_PX]
+
+    @property
+    def bid_qty(self):
+        return self.levels[BID_QTY]
+
+    @property
+    def best_ask(self):
+        return int(self.levels[ASK_PX, 0])
+
+    @property
+    def best_bid(self):
+        return int(self.levels[BID_PX, 0])
+
+    # ------------------------------------------------------------------
+    # 📐 지표
+    # ------------------------------------------------------------------
+    def cum_imbalance(self):
+        """1~k단계 누적 잔량 불균형 (매수-매도)/(매수+매도), 길이 10 배열. 양수면 매수 우위 (선정 규칙 'book')"""
+        bq = np.cumsum(self.levels[BID_QTY]).astype(np.float64)
+        aq = np.cumsum(self.levels[ASK_QTY]).astype(np.float64)
+        tot = bq + aq
+        return np.divide(bq - aq, tot, out=np.zeros(LEVELS), where=tot > 0)
+
+    def depth_within(self, price_limit, side="buy"):
+        """매수라면 price_limit 이하 매도잔량 합, 매도라면 price_limit 이상 매수잔량 합"""
+        if side == "buy":
+            px, qty = self.levels[ASK_PX], self.levels[ASK_QTY]
+            mask = (px > 0) & (px <= price_limit)
+        else:
+            px, qty = self.levels[BID_PX], self.levels[BID_QTY]
+            mask = (px > 0) & (px >= price_limit)
+        return int(qty[mask].sum())
+
+    def cost_to_fill(self, qty, side="buy"):
+        """
+        보이는 호가로 qty주를 즉시 체결할 때의 결과.
+        :return: (체결 가능 수량, 총 금액, 평균가, 마지막으로 닿는 호가) — 호가가 없으면 모두 0
+        """
+        if side == "buy":
+            px, q = self.levels[ASK_PX], self.levels[ASK_QTY]
+        else:
+            px, q = self.levels[BID_PX], self.levels[BID_QTY]
+        q = np.where(px > 0, q, 0)
+        cum = np.cumsum(q)
+        if qty <= 0 or cum[-1] <= 0:
+            return 0, 0, 0.0, 0
+
+        take = np.minimum(q, np.maximum(qty - (cum - q), 0))   # 단계별로 가져가는 수량
+        filled = int(take.sum())
+        cost = int((take * px).sum())
+        last = int(np.searchsorted(cum, min(qty, cum[-1])))    # 마지막으로 닿는 단계
+        return filled, cost, cost / filled, int(px[last])
+
+    def __repr__(self):
+        return f"OrderBook({self.code} {self.best_bid:,}/{self.best_ask:,})"
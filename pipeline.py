@@ -0,0 +1,335 @@
+# pipeline.py
+import multiprocessing
+import os
+import threading
+import time
+
+import daily_history
+import instrument_master
+import jongga_bot
+import log_pipeline
+import market_data
+import broker_clock
+import shm_ring
+import telegram_notifier
+
+# ==============================================================================
+# 🏭 다중 프로세스 실행 (선택) — python3 pipeline.py
+# ==============================================================================
+# 기본 실행(python3 jongga_bot.py)은 지금처럼 한 프로세스 안의 스레드로 동작합니다.
+# 이 파일로 실행하면 역할별로 프로세스를 나눠 JSON 해석/로그/조건 평가가 주문 경로와 GIL을 다투지 않습니다.
+#   - market   : 시세/조건검색/휴장일 조회 전담 + 감시 중인 종목 시세를 피드로 계속 밀어줌
+#   - gateway  : 계좌별 KisApi 주문/잔고 조회 전담 (send_order 등)
+#   - strategy : TradingBot 판단 (전략, 포지션 관리, 텔레그램 명령) — 로그는 기존 output.log
+# 프로세스끼리는 감독 프로세스가 만든 공유메모리 링버퍼(shm_ring)로 통신하고,
+# 감독 프로세스는 죽은 프로세스를 다시 띄웁니다. 포지션은 strategy 프로세스의 상태 저널에서 복구됩니다.
+ROLES = ("market", "gateway", "strategy")
+RING_PREFIX = "jongga"
+RESTART_DELAY = 3           # 재시작 전 대기(초)
+RESTART_WINDOW = 600        # 이 시간(초) 안에
+MAX_RESTARTS = 5            # 이 횟수 넘게 죽으면 RESTART_WINDOW 동안 재시작 보류 후 다시 시도
+CHECK_INTERVAL = 1.0        # 자식 프로세스 생존 확인 주기(초)
+
+FEED_INTERVAL = 0.5         # 피드 구독 종목 시세 갱신 주기(초)
+FEED_MAX_AGE = 1.0          # 이 값 이하의 max_age로 요청된 종목(실시간 감시 종목)만 피드 구독
+SUBSCRIBE_TTL = 30          # 이 시간(초) 동안 다시 요청이 없으면 피드 구독 해제
+
+DATA_TIMEOUT = 15           # 시세 요청 응답 대기(초)
+ORDER_TIMEOUT = 35          # 주문 요청 응답 대기(초) — gateway는 전송 직전 남은 시간을 다시 보고 HTTP 타임아웃을 그 안으로 줄임
+
+MARKET_METHODS = {"quote", "fetch_condition_stocks", "is_holiday"}
+GATEWAY_METHODS = {"build_order", "submit_order", "send_order", "revise_order",
+                   "fetch_order_fills", "fetch_balance", "fetch_my_stock_list"}
+
+RINGS = ("md_req", "md_resp", "md_feed", "gw_req", "gw_resp")
+
+
+def ring_names():
+    return {r: f"{RING_PREFIX}_{r}" for r in RINGS}
+
+
+def _process_logging(role):
+    """역할별 로그 파일 (회전 파일 하나를 여러 프로세스가 함께 쓰면 회전 시 충돌)"""
+    log_file = log_pipeline.LOG_FILE if role == "strategy" else f"output.{role}.log"
+    jongga_bot.setup_log(log_file)
+
+
+def _exit_with_parent():
+    """감독 프로세스가 kill -9로 죽어도 자식이 고아로 남지 않도록"""
+    parent = multiprocessing.parent_process()
+    if parent is None:
+        return
+
+    def watch():
+        parent.join()
+        os._exit(0)
+    threading.Thread(target=watch, name="parent-watch", daemon=True).start()
+
+
+# ==============================================================================
+# 📡 market 프로세스
+# ==============================================================================
+class MarketFeed:
+    """
+    MarketData 앞단. 요청받은 시세를 피드 링으로도 내보내고,
+    실시간 감시 종목(max_age가 짧은 요청)은 FEED_INTERVAL마다 직접 갱신해 밀어줍니다.
+    피드에는 서버 시각 오프셋도 함께 실어 strategy 프로세스의 시계를 맞춥니다.
+    """
+
+    def __init__(self, market, feed_ring):
+        self.market = market
+        self.feed = feed_ring
+        self.clock = broker_clock.get_clock()
+        self._subs = {}     # code -> (name, 마지막 요청 시각)
+
+    def _publish(self, msg):
+        try:
+            self.feed.put(msg)  # 소비자가 밀려 있으면 버림 (다음 갱신이 다시 보냄)
+        except ValueError as e:
+            print(f"⚠️ [피드] {e}")
+
+    def quote(self, code, name=None, max_age=None):
+        if max_age is not None and max_age <= FEED_MAX_AGE:
+            self._subs[code] = (name, time.time())
+        q = self.market.quote(code, name, max_age)
+        if q:
+            self._publish(('quote', code, self.market.quotes.fetched_at(code), q))
+        return q
+
+    def fetch_condition_stocks(self, cond_name, max_age=market_data.CONDITION_TTL):
+        return self.market.fetch_condition_stocks(cond_name, max_age)
+
+    def is_holiday(self, date_str):
+        return self.market.is_holiday(date_str)
+
+    def run(self):
+        while True:
+            started = time.time()
+            try:
+                for code, (name, last) in list(self._subs.items()):
+                    if started - last > SUBSCRIBE_TTL:
+                        self._subs.pop(code, None)
+                        continue
+                    q = self.market.quote(code, name, max_age=FEED_INTERVAL)
+                    if q:
+                        self._publish(('quote', code, self.market.quotes.fetched_at(code), q))
+                clk = self.clock
+                if clk.uncertainty is not None:
+                    self._publish(('clock', clk.offset, clk.uncertainty, clk.rtt))
+            except Exception as e:
+                print(f"❌ [피드] 갱신 에러: {e}")
+            time.sleep(max(0.0, FEED_INTERVAL - (time.time() - started)))
+
+
+def market_main(names):
+    _process_logging("market")
+    _exit_with_parent()
+    market = market_data.MarketData(jongga_bot.KisApi())
+    # 📚 시세 해석(종목명)도 이 프로세스에서 — 종목 마스터를 미리 읽고 갱신 스레드로 유지
+    instrument_master.get_master().ensure_fresh()
+    instrument_master.start_refresher()
+    daily_history.start_updater(market.api)     # 🗄️ 일봉 이력 캐시는 시세 API를 가진 이 프로세스만 갱신
+    feed = MarketFeed(market, shm_ring.ShmRing(names['md_feed']))
+    threading.Thread(target=feed.run, name="feed", daemon=True).start()
+    print("📡 [market] 시세 프로세스 시작")
+    shm_ring.serve(shm_ring.ShmRing(names['md_req']), shm_ring.ShmRing(names['md_resp']),
+                   {"market": (feed, MARKET_METHODS)})
+
+
+# ==============================================================================
+# 📮 gateway 프로세스
+# ==============================================================================
+def gateway_main(names):
+    _process_logging("gateway")
+    _exit_with_parent()
+    handlers = {}
+    for acc in jongga_bot.account_list():
+        api = jongga_bot.KisApi(acc if acc.get('app_key') else None)
+        handlers[acc['name']] = (api, GATEWAY_METHODS)
+    print(f"📮 [gateway] 주문 프로세스 시작 (계좌: {', '.join(handlers)})")
+    shm_ring.serve(shm_ring.ShmRing(names['gw_req']), shm_ring.ShmRing(names['gw_resp']), handlers,
+                   workers=2 * len(handlers) + 2)
+
+
+# ==============================================================================
+# 🧠 strategy 프로세스
+# ==============================================================================
+class RemoteMarketData:
+    """
+    strategy 프로세스용 MarketData 대역 (quote / day_open / fetch_condition_stocks / is_holiday).
+    피드 링으로 받은 최신 시세가 충분히 새것이면 요청 없이 바로 쓰고, 아니면 market 프로세스에 요청합니다.
+    """
+
+    def __init__(self, rpc, feed_ring, clock=None):
+        self.rpc = rpc
+        self.feed = feed_ring
+        self.clock = clock or broker_clock.get_clock()
+        self._latest = {}   # code -> (조회 시각, quote)
+        self.listeners = []
+        self.hits = 0
+        self.misses = 0
+        threading.Thread(target=self._read_feed, name="feed-reader", daemon=True).start()
+
+    def _read_feed(self):
+        while True:
+            try:
+                msg = self.feed.get()
+            except Exception as e:
+                print(f"⚠️ [피드] 해석 실패: {e}")
+                continue
+            if msg[0] == 'quote':
+                _, code, ts, q = msg
+                cached = self._latest.get(code)
+                if cached is None or cached[0] < ts:
+                    self._latest[code] = (ts, q)
+                    for fn in self.listeners:
+                        fn(code, ts, q)
+            elif msg[0] == 'clock':
+                self.clock.adopt(*msg[1:])
+
+    def add_listener(self, fn):
+        if fn not in self.listeners:
+            self.listeners.append(fn)
+
+    def quote(self, code, name=None, max_age=None):
+        max_age = market_data.QUOTE_TTL if max_age is None else max_age
+        cached = self._latest.get(code)
+        if cached and time.time() - cached[0] <= max_age:
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        try:
+            q = self.rpc.call("market", "quote", code, name, max_age, timeout=DATA_TIMEOUT)
+        except shm_ring.RpcError as e:
+            print(f"⚠️ [시세요청] {code} 실패: {e}")
+            return None
+        return q    # 조회 시각이 찍힌 같은 시세가 피드로도 들어와 캐시됨
+
+    def day_open(self, code):
+        cached = self._latest.get(code)
+        return market_data.today_open(*cached) if cached else None
+
+    def fetch_condition_stocks(self, cond_name, max_age=market_data.CONDITION_TTL):
+        try:
+            return self.rpc.call("market", "fetch_condition_stocks", cond_name, max_age, timeout=DATA_TIMEOUT)
+        except shm_ring.RpcError as e:
+            print(f"⚠️ [조건검색 요청] 실패: {e}")
+            return []
+
+    def is_holiday(self, date_str):
+        try:
+            return self.rpc.call("market", "is_holiday", date_str, timeout=DATA_TIMEOUT)
+        except shm_ring.RpcError as e:
+            print(f"⚠️ [휴장일 요청] 실패: {e}")
+            return False
+
+
+class GatewayClient:
+    """strategy 프로세스용 KisApi 대역 — 주문/잔고 호출을 gateway 프로세스의 해당 계좌로 보냅니다."""
+
+    def __init__(self, rpc, account_name):
+        self.rpc = rpc
+        self.account_name = account_name
+
+    def _call(self, method, *args, failed=None, **kwargs):
+        try:
+            return self.rpc.call(self.account_name, method, *args, timeout=ORDER_TIMEOUT, **kwargs)
+        except shm_ring.RpcError as e:
+            print(f"❌ [게이트웨이] {method} 실패: {e}")
+            return failed
+
+    def _order_failed(self):
+        return {'rt_cd': '9999', 'msg1': 'Gateway Timeout/Error'}
+
+    def send_order(self, code, quantity, is_buy=True, price=0):
+        return self._call("send_order", code, quantity, is_buy, price, failed=self._order_failed())
+
+    def build_order(self, code, quantity, is_buy=True, price=0):
+        return self._call("build_order", code, quantity, is_buy, price)
+
+    def submit_order(self, order):
+        return self._call("submit_order", order, failed=self._order_failed())
+
+    def revise_order(self, org_no, order_no, quantity, price, cancel=False):
+        return self._call("revise_order", org_no, order_no, quantity, price, cancel, failed=self._order_failed())
+
+    def fetch_order_fills(self):
+        return self._call("fetch_order_fills")
+
+    def fetch_balance(self):
+        return self._call("fetch_balance", failed=0)
+
+    def fetch_my_stock_list(self):
+        return self._call("fetch_my_stock_list")
+
+
+def strategy_main(names):
+    _process_logging("strategy")
+    _exit_with_parent()
+    md_rpc = shm_ring.RpcClient(shm_ring.ShmRing(names['md_req']), shm_ring.ShmRing(names['md_resp']))
+    gw_rpc = shm_ring.RpcClient(shm_ring.ShmRing(names['gw_req']), shm_ring.ShmRing(names['gw_resp']))
+    market = RemoteMarketData(md_rpc, shm_ring.ShmRing(names['md_feed']))
+    bots = jongga_bot.build_bots(market=market, api_factory=lambda acc: GatewayClient(gw_rpc, acc['name']))
+    jongga_bot.run_all(bots)
+
+
+ENTRY = {"market": market_main, "gateway": gateway_main, "strategy": strategy_main}
+
+
+# ==============================================================================
+# 👮 감독 프로세스
+# ==============================================================================
+def supervise():
+    """링을 만들고 세 프로세스를 띄운 뒤, 죽은 프로세스를 다시 띄웁니다."""
+    _process_logging("supervisor")
+    names = ring_names()
+    rings = [shm_ring.ShmRing(n, create=True) for n in names.values()]
+    ctx = multiprocessing.get_context("spawn")
+    procs = {}
+    deaths = {role: [] for role in ROLES}
+
+    def start(role):
+        p = ctx.Process(target=ENTRY[role], args=(names,), name=f"jongga-{role}")
+        p.start()
+        procs[role] = p
+        print(f"▶️ [감독] {role} 시작 (PID {p.pid})")
+
+    try:
+        for role in ROLES:
+            start(role)
+        while True:
+            time.sleep(CHECK_INTERVAL)
+            for role in ROLES:
+                p = procs.get(role)
+                if p is not None and p.is_alive():
+                    continue
+                now = time.time()
+                if p is not None:
+                    deaths[role] = [t for t in deaths[role] if now - t < RESTART_WINDOW] + [now]
+                    procs[role] = None
+                    held = len(deaths[role]) > MAX_RESTARTS
+                    msg = (f"💥 [감독] {role} 프로세스 종료 (exit {p.exitcode}) → "
+                           + (f"{RESTART_WINDOW // 60}분간 재시작 보류" if held else f"{RESTART_DELAY}초 후 재시작"))
+                    print(msg)
+                    telegram_notifier.send_telegram_message(msg)
+                    time.sleep(RESTART_DELAY)
+                if len(deaths[role]) > MAX_RESTARTS and now - deaths[role][-1] < RESTART_WINDOW:
+                    continue    # 짧은 시간에 너무 자주 죽음 → 잠시 보류
+                start(role)
+    except KeyboardInterrupt:
+        print("🛑 [감독] 종료 요청")
+    finally:
+        for p in procs.values():
+            if p is not None and p.is_alive():
+                p.terminate()
+        for p in procs.values():
+            if p is not None:
+                p.join(timeout=5)
+        for r in rings:
+            r.close()
+            r.unlink()
+        log_pipeline.stop_logging()
+
+
+if __name__ == "__main__":
+    supervise()
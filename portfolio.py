@@ -0,0 +1,148 @@
+# portfolio.py
+import datetime
+import threading
+from types import MappingProxyType
+
+import position_tracker
+
+# ==============================================================================
+# 📦 보유 종목 모델
+# ==============================================================================
+class Position:
+    """
+    보유 종목 1건. __slots__로 dict보다 작고 빠르며, 게시된 뒤에는 수정하지 않습니다.
+    값을 바꿀 때는 replace()로 새 객체를 만들어 Portfolio에 다시 게시합니다.
+    (단, path는 틱마다 쌓이는 누적기라 같은 객체를 공유합니다.)
+    """
+    __slots__ = ("code", "name", "qty", "buy_price", "max_profit_rate",
+                 "has_partial_sold", "buy_time", "strategy", "path")
+
+    def __init__(self, code, name, qty, buy_price, max_profit_rate=0.0,
+                 has_partial_sold=False, buy_time=None, strategy="JONGGA", path=None):
+        self.code = code
+        self.name = name
+        self.qty = qty
+        self.buy_price = buy_price
+        self.max_profit_rate = max_profit_rate
+        self.has_partial_sold = has_partial_sold
+        self.buy_time = buy_time or datetime.datetime.now()
+        self.strategy = strategy
+        self.path = path if path is not None else position_tracker.PricePath()
+
+    def replace(self, **changes):
+        new = Position.__new__(Position)
+        for k in Position.__slots__:
+            setattr(new, k, changes[k] if k in changes else getattr(self, k))
+        return new
+
+    # ------------------------------------------------------------------
+    # 💾 상태 저장용 변환
+    # ------------------------------------------------------------------
+    def to_state(self):
+        return {
+            'name': self.name,
+            'qty': self.qty,
+            'buy_price': self.buy_price,
+            'max_profit_rate': self.max_profit_rate,
+            'has_partial_sold': self.has_partial_sold,
+            'buy_time': self.buy_time.isoformat() if self.buy_time else None,
+            'strategy': self.strategy,
+            'path': self.path.stats(),
+        }
+
+    @classmethod
+    def from_state(cls, code, data):
+        buy_time = data.get('buy_time')
+        return cls(
+            code=code,
+            name=data.get('name'),
+            qty=data.get('qty', 0),
+            buy_price=data.get('buy_price', 0.0),
+            max_profit_rate=data.get('max_profit_rate', 0.0),
+            has_partial_sold=data.get('has_partial_sold', False),
+            buy_time=datetime.datetime.fromisoformat(buy_time) if buy_time else None,
+            strategy=data.get('strategy', 'JONGGA'),
+            path=position_tracker.PricePath.from_stats(data.get('path')),
+        )
+
+    def __repr__(self):
+        return f"Position({self.code} {self.name} {self.qty}주 @{self.buy_price:,.0f})"
+
+
+# ==============================================================================
+# 🗂️ 보유 종목 컨테이너 (copy-on-write)
+# ==============================================================================
+class Portfolio:
+    """
+    보유 종목 전체를 '읽기 전용 스냅샷' 단위로 게시하는 컨테이너.
+    - 읽기(/info, 감시 루프 순회, 지표): snapshot()으로 현재 게시본을 받아 락 없이 읽습니다.
+      게시본은 절대 수정되지 않으므로 순회 중에 다른 스레드가 매도/삭제해도 안전합니다.
+    - 쓰기(set/update/remove): 짧은 쓰기 락 안에서 dict를 복사·수정한 뒤 참조만 교체합니다.
+    - journal이 주어지면 모든 변경을 상태 저널에 함께 기록합니다.
+    """
+
+    def __init__(self, journal=None):
+        self._positions = MappingProxyType({})
+        self._write_lock = threading.Lock()
+        self.journal = journal
+
+    # ------------------------------------------------------------------
+    # 👀 읽기 (락 없음)
+    # ------------------------------------------------------------------
+    def snapshot(self):
+        return self._positions
+
+    def get(self, code, default=None):
+        return self._positions.get(code, default)
+
+    def codes(self):
+        return list(self._positions.keys())
+
+    def __contains__(self, code):
+        return code in self._positions
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __bool__(self):
+        return len(self._positions) > 0
+
+    # ------------------------------------------------------------------
+    # ✍️ 쓰기 (직렬화)
+    # ------------------------------------------------------------------
+    def set(self, position, journal=True):
+        with self._write_lock:
+            new = dict(self._positions)
+            new[position.code] = position
+            self._positions = MappingProxyType(new)
+        if journal and self.journal is not None:
+            self.journal.record('pos_set', position.code, data=position.to_state())
+        return position
+
+    def update(self, code, **changes):
+        """변경된 필드만 바꾼 새 Position을 게시합니다. (없는 종목이면 None)"""
+        with self._write_lock:
+            old = self._positions.get(code)
+            if old is None:
+                return None
+            pos = old.replace(**changes)
+            new = dict(self._positions)
+            new[code] = pos
+            self._positions = MappingProxyType(new)
+        if self.journal is not None:
+            self.journal.record('pos_update', code, data=changes)
+        return pos
+
+    def remove(self, code):
+        with self._write_lock:
+            if code not in self._positions:
+                return None
+            new = dict(self._positions)
+            old = new.pop(code)
+            self._positions = MappingProxyType(new)
+        if self.journal is not None:
+            self.journal.record('pos_del', code)
+        return old
+
+    def to_state(self):
+        return {c: p.to_state() for c, p in self._positions.items()}
@@ -0,0 +1,86 @@
+# position_tracker.py
+import time
+from array import array
+
+# ==============================================================================
+# 📈 보유 중 가격/프로그램 수급 경로 추적
+# ==============================================================================
+DEFAULT_CAPACITY = 1024     # 종목당 보관할 최근 시세 개수 (약 8KB x 3)
+
+
+class PricePath:
+    """
+    감시 루프가 이미 조회한 시세를 고정 크기 링버퍼(array)에 쌓는 경량 추적기.
+    - 최고/최저가, 진입/최대 프로그램 순매수 금액은 틱마다 O(1)로 갱신됩니다.
+    - 추가 API 호출 없이 매도 로그의 보유 중 통계 컬럼을 채우는 용도입니다.
+    """
+    __slots__ = ("capacity", "_prices", "_pgs", "_times", "_idx", "count",
+                 "max_price", "min_price", "entry_pg", "max_pg", "last_pg")
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._prices = array('d', bytes(8 * capacity))
+        self._pgs = array('d', bytes(8 * capacity))
+        self._times = array('d', bytes(8 * capacity))
+        self._idx = 0
+        self.count = 0
+        self.max_price = 0.0
+        self.min_price = 0.0
+        self.entry_pg = 0.0
+        self.max_pg = 0.0
+        self.last_pg = 0.0
+
+    def update(self, price, pg_amt, ts=None):
+        """시세 한 틱 반영 (price: 현재가, pg_amt: 프로그램 순매수 금액)"""
+        if price <= 0:
+            return
+        i = self._idx
+        self._prices[i] = price
+        self._pgs[i] = pg_amt
+        self._times[i] = ts if ts is not None else time.time()
+        self._idx = (i + 1) % self.capacity
+
+        if self.max_price == 0.0:
+            self.max_price = self.min_price = price
+            self.entry_pg = self.max_pg = pg_amt
+        else:
+            if price > self.max_price: self.max_price = price
+            if price < self.min_price: self.min_price = price
+            if pg_amt > self.max_pg: self.max_pg = pg_amt
+        self.last_pg = pg_amt
+        if self.count < self.capacity:
+            self.count += 1
+
+    def update_from_quote(self, quote):
+        """fetch_price_detail 결과(dict)를 그대로 반영"""
+        if quote:
+            self.update(quote['price'], quote['program_buy'] * quote['price'])
+
+    def recent(self, n=None):
+        """최근 n개 (시각, 가격, PG금액) 를 오래된 순으로 반환"""
+        n = self.count if n is None else min(n, self.count)
+        out = []
+        for k in range(n, 0, -1):
+            i = (self._idx - k) % self.capacity
+            out.append((self._times[i], self._prices[i], self._pgs[i]))
+        return out
+
+    @classmethod
+    def from_stats(cls, stats, capacity=DEFAULT_CAPACITY):
+        """저장된 통계로 복구 (재시작 시 링버퍼 내용은 비어 있고 최고/최저 기록만 이어감)"""
+        path = cls(capacity)
+        if stats:
+            path.max_price = float(stats.get('max_price', 0) or 0)
+            path.min_price = float(stats.get('min_price', 0) or 0)
+            path.entry_pg = float(stats.get('entry_pg', 0) or 0)
+            path.max_pg = float(stats.get('max_pg', 0) or 0)
+        return path
+
+    def stats(self):
+        """매도 로그용 통계"""
+        return {
+            'max_price': self.max_price,
+            'min_price': self.min_price,
+            'entry_pg': self.entry_pg,
+            'max_pg': self.max_pg,
+        }
@@ -0,0 +1,97 @@
+# preopen.py
+import time
+
+# ==============================================================================
+# 🌅 장전 동시호가 감시 (08:50 ~ 09:00)
+# ==============================================================================
+WATCH_START = (8, 50)       # 감시 시작 시각 (시, 분)
+POLL_INTERVAL = 5           # 예상체결가 조회 주기(초)
+CONFIRM_POLLS = 3           # 연속 이 횟수만큼 갭하락 예상이면 청산 주문 준비
+HISTORY = 30                # 종목별 보관할 예상체결가 개수
+OPEN_FIRE_DELAY = 0.3       # 서버 시각 09:00:00 이후 이 시간(초) 뒤 발사 (시가 체결 반영 대기)
+
+
+class PreOpenWatcher:
+    """
+    장전 동시호가 시간에 보유 종목의 예상체결가(antc_cnpr)를 추적해 시초 갭을 미리 계산하고,
+    전략의 갭하락 기준(gap_exit_rate) 아래로 안정적으로 예상되는 종목은 매도 주문(hashkey 포함)을
+    미리 만들어 둡니다. 09:00 개장 후 첫 주기에 실제 시가로 한 번 더 확인하고 바로 전송합니다.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.reset()
+
+    def reset(self):
+        self.expected = {}      # code -> [(시각, 예상체결가, 예상체결량), ...]
+        self.staged = {}        # code -> {'order', 'gap', 'qty'}
+        self.last_poll = 0
+
+    @staticmethod
+    def in_window(now):
+        return WATCH_START <= (now.hour, now.minute) < (9, 0)
+
+    def gap(self, pos, price):
+        return (price - pos.buy_price) / pos.buy_price if pos.buy_price > 0 else 0.0
+
+    def poll(self, now):
+        if time.time() - self.last_poll < POLL_INTERVAL:
+            return
+        self.last_poll = time.time()
+        bot = self.bot
+
+        for code, pos in bot.portfolio.snapshot().items():
+            threshold = bot.strategy_for(pos).gap_exit_rate
+            if threshold is None:
+                continue
+            quote = bot.market.quote(code, pos.name, max_age=0)
+            if not quote or not quote.get('exp_price'):
+                continue
+
+            hist = self.expected.setdefault(code, [])
+            hist.append((now, quote['exp_price'], quote.get('exp_qty', 0)))
+            del hist[:-HISTORY]
+
+            gaps = [self.gap(pos, p) for _, p, _ in hist[-CONFIRM_POLLS:]]
+            confirmed = len(gaps) >= CONFIRM_POLLS and all(g <= threshold for g in gaps)
+
+            staged = self.staged.get(code)
+            if confirmed and (staged is None or staged['qty'] != pos.qty):
+                order = bot.api.build_order(code, pos.qty, is_buy=False)
+                if order is None:
+                    continue
+                self.staged[code] = {'order': order, 'gap': gaps[-1], 'qty': pos.qty}
+                if staged is None:
+                    bot.notify(f"🌅 [장전 갭하락 예상] {pos.name} 예상가 {quote['exp_price']:,}원 "
+                               f"({gaps[-1]*100:+.2f}%) → 시초 청산 준비")
+            elif staged is not None and gaps[-1] > threshold:
+                del self.staged[code]
+                bot.notify(f"🌤️ [장전 회복] {pos.name} 예상 {gaps[-1]*100:+.2f}% → 시초 청산 취소")
+            elif staged is not None:
+                staged['gap'] = gaps[-1]
+
+    def fire(self, now):
+        """개장 직후: 실제 시가(체결 전이면 예상가)로 재확인 후 준비된 매도 주문 전송"""
+        bot = self.bot
+        staged, self.staged = self.staged, {}
+        reasons, prepared = {}, {}
+        for code, st in staged.items():
+            pos = bot.portfolio.get(code)
+            if pos is None:
+                continue
+            threshold = bot.strategy_for(pos).gap_exit_rate
+            quote = bot.market.quote(code, pos.name, max_age=0)
+            if not quote:
+                continue
+            price = quote['price'] if quote.get('acml_vol', 0) > 0 else quote.get('exp_price', 0)
+            if not price:
+                continue
+            gap = self.gap(pos, price)
+            if gap > threshold:
+                print(f"🌤️ [시초 확인] {pos.name} 시가 {gap*100:+.2f}% → 준비된 청산 취소")
+                continue
+            reasons[code] = f"🌅시초 갭하락 청산({gap*100:.2f}%)"
+            prepared[code] = st['order']
+        # 🧯 확인된 종목을 한 번에 동시 전송 (준비된 주문은 수량이 같을 때만 사용)
+        if reasons:
+            bot.liquidator.liquidate(list(reasons), reasons, prepared)
@@ -0,0 +1,334 @@
+# quote_board.py
+import atexit
+import os
+import threading
+import time
+
+import numpy as np
+from multiprocessing import resource_tracker, shared_memory
+
+import orderbook
+
+# ==============================================================================
+# 🪧 실시간 시세 게시판 (공유메모리) — 봇이 쓰고, 진단 도구가 API 호출 없이 읽음
+# ==============================================================================
+ENABLED = True              # 봇 실행 시 게시판 생성 여부
+BOARD_NAME = "jongga_board"
+MAGIC = b"JONGGA"
+LAYOUT_VERSION = 2          # 아래 레이아웃을 바꾸면 올릴 것 (다른 버전이면 읽지 않음)
+QUOTE_SLOTS = 256
+POSITION_SLOTS = 64
+CANDIDATE_SLOTS = 128
+READ_RETRIES = 100          # 쓰는 중인 칸을 다시 읽는 최대 횟수
+
+# 모든 칸은 seq로 시작 — 쓰는 동안 홀수, 다 쓰면 짝수 (seqlock)
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S8'), ('version', '<u4'), ('pid', '<u4'),
+    ('started', '<f8'), ('updated', '<f8'), ('clock_offset', '<f8'),
+])
+QUOTE_DTYPE = np.dtype([
+    ('seq', '<u8'), ('ts', '<f8'), ('code', 'S8'), ('name', 'S64'),
+    ('price', '<i8'), ('ask_price', '<i8'), ('open', '<i8'), ('high', '<i8'), ('low', '<i8'),
+    ('max_price', '<i8'), ('acml_vol', '<i8'), ('program_buy', '<i8'),
+    ('total_ask', '<i8'), ('total_bid', '<i8'), ('ask_rsqn1', '<i8'), ('bid_rsqn1', '<i8'),
+    ('exp_price', '<i8'), ('exp_qty', '<i8'),
+    ('rate', '<f8'), ('wick_ratio', '<f8'), ('bid_ask_ratio', '<f8'),
+    ('book', '<i8', (4, orderbook.LEVELS)),
+])
+POSITION_DTYPE = np.dtype([
+    ('seq', '<u8'), ('ts', '<f8'), ('account', 'S16'), ('code', 'S8'), ('name', 'S64'),
+    ('strategy', 'S16'), ('qty', '<i8'), ('buy_price', '<f8'), ('max_profit_rate', '<f8'),
+])
+CANDIDATE_DTYPE = np.dtype([
+    ('seq', '<u8'), ('ts', '<f8'), ('strategy', 'S16'), ('code', 'S8'), ('name', 'S64'),
+    ('state', 'S8'), ('reason', 'S16'), ('price', '<i8'), ('trade_amt', '<i8'), ('wick_ratio', '<f8'),
+])
+
+_TABLES = (("quotes", QUOTE_DTYPE, QUOTE_SLOTS),
+           ("positions", POSITION_DTYPE, POSITION_SLOTS),
+           ("candidates", CANDIDATE_DTYPE, CANDIDATE_SLOTS))
+
+_QUOTE_NUMBERS = [f for f in QUOTE_DTYPE.names if f not in ('seq', 'ts', 'code', 'name', 'book')]
+
+
+def _size():
+    return HEADER_DTYPE.itemsize + sum(dt.itemsize * n for _, dt, n in _TABLES)
+
+
+def _enc(text, width):
+    """UTF-8로 자르되 한글 글자 중간에서 끊기지 않도록"""
+    return str(text or "").encode('utf-8')[:width].decode('utf-8', 'ignore').encode('utf-8')
+
+
+def _dec(raw):
+    return raw.decode('utf-8', 'ignore')
+
+
+class _Table:
+    """고정 크기 구조체 배열 하나 (키 → 칸 번호는 쓰는 쪽만 관리)"""
+
+    def __init__(self, buf, offset, dtype, slots):
+        self.rows = np.ndarray((slots,), dtype=dtype, buffer=buf, offset=offset)
+        self.slots = {}     # 키 -> 칸 번호 (쓰는 쪽 전용)
+        self.free = list(range(slots - 1, -1, -1))
+
+    # ---- 쓰기 (seqlock) ----
+    def write(self, key, values):
+        idx = self.slots.get(key)
+        if idx is None:
+            if not self.free:
+                return False
+            idx = self.free.pop()
+            self.slots[key] = idx
+        seq = int(self.rows['seq'][idx])
+        rec = np.zeros((), dtype=self.rows.dtype)
+        for k, v in values.items():
+            rec[k] = v
+        self.rows['seq'][idx] = seq + 1              # 홀수: 쓰는 중 (필드보다 먼저 따로 기록)
+        rec['seq'] = seq + 1
+        self.rows[idx] = rec
+        self.rows['seq'][idx] = seq + 2              # 짝수: 완료
+        return True
+
+    def clear(self, key):
+        idx = self.slots.pop(key, None)
+        if idx is None:
+            return
+        seq = int(self.rows['seq'][idx])
+        self.rows['seq'][idx] = seq + 1
+        self.rows['code'][idx] = b""
+        self.rows['seq'][idx] = seq + 2
+        self.free.append(idx)
+
+    # ---- 읽기 (락 없음, 쓰는 중이면 다시 읽음) ----
+    def read(self, idx):
+        seq_col = self.rows['seq']
+        for _ in range(READ_RETRIES):
+            s1 = int(seq_col[idx])
+            if s1 & 1:
+                time.sleep(0)   # 쓰는 쪽에 양보
+                continue
+            rec = self.rows[idx].copy()
+            if int(seq_col[idx]) == s1:
+                return rec
+        return None
+
+    def read_all(self):
+        out = []
+        for idx in np.flatnonzero(self.rows['code'] != b""):
+            rec = self.read(idx)
+            if rec is not None and rec['code']:
+                out.append(rec)
+        return out
+
+
+class QuoteBoard:
+    """
+    봇의 최신 시세/보유 종목/후보 상태를 고정 레이아웃 공유메모리에 게시합니다.
+    - 쓰는 쪽은 봇 프로세스 하나 (스레드끼리는 내부 락으로 직렬화)
+    - 읽는 쪽(analyze_fail.py 등)은 락 없이 칸마다 seq를 앞뒤로 확인해 찢어진 값을 버리고 다시 읽습니다.
+      봇은 읽는 쪽을 전혀 기다리지 않습니다.
+    """
+
+    def __init__(self, shm, writer):
+        self.shm = shm
+        self.writer = writer
+        self.header = np.ndarray((), dtype=HEADER_DTYPE, buffer=shm.buf)
+        offset = HEADER_DTYPE.itemsize
+        self.tables = {}
+        for name, dtype, slots in _TABLES:
+            self.tables[name] = _Table(shm.buf, offset, dtype, slots)
+            offset += dtype.itemsize * slots
+        self._lock = threading.Lock()
+        self._last_positions = {}   # 계좌 -> 마지막으로 게시한 포트폴리오 스냅샷
+
+    # ------------------------------------------------------------------
+    # ✍️ 봇 쪽 (게시)
+    # ------------------------------------------------------------------
+    def publish_quote(self, code, ts, quote):
+        """MarketData 리스너 — 새로 조회된 시세만 들어옴"""
+        values = {k: quote.get(k) or 0 for k in _QUOTE_NUMBERS}
+        values.update(ts=ts, code=code.encode(), name=_enc(quote.get('name'), 64))
+        book = quote.get('book')
+        if book is not None:
+            values['book'] = book.levels
+        with self._lock:
+            if not self.tables['quotes'].write(code, values):
+                self._evict_oldest_quote()
+                self.tables['quotes'].write(code, values)
+            self.header['updated'] = time.time()
+
+    def _evict_oldest_quote(self):
+        table = self.tables['quotes']
+        if table.slots:
+            oldest = min(table.slots, key=lambda c: table.rows['ts'][table.slots[c]])
+            table.clear(oldest)
+
+    def publish_positions(self, account, positions):
+        """계좌 하나의 보유 종목 스냅샷 (Portfolio.snapshot()). 바뀌었을 때만 다시 씀"""
+        if self._last_positions.get(account) is positions:
+            return
+        table = self.tables['positions']
+        now = time.time()
+        with self._lock:
+            self._last_positions[account] = positions
+            for key in [k for k in table.slots if k[0] == account and k[1] not in positions]:
+                table.clear(key)
+            for code, pos in positions.items():
+                table.write((account, code), {
+                    'ts': now, 'account': _enc(account, 16), 'code': code.encode(),
+                    'name': _enc(pos.name, 64), 'strategy': _enc(pos.strategy, 16),
+                    'qty': pos.qty, 'buy_price': pos.buy_price, 'max_profit_rate': pos.max_profit_rate,
+                })
+            self.header['updated'] = now
+
+    def publish_candidates(self, strategy, rows):
+        """전략 하나의 후보 목록 전체 교체. rows: [{'code','name','state','reason','price','trade_amt','wick_ratio'}]"""
+        table = self.tables['candidates']
+        now = time.time()
+        codes = {r['code'] for r in rows}
+        with self._lock:
+            for key in [k for k in table.slots if k[0] == strategy and k[1] not in codes]:
+                table.clear(key)
+            for r in rows:
+                table.write((strategy, r['code']), {
+                    'ts': now, 'strategy': _enc(strategy, 16), 'code': r['code'].encode(),
+                    'name': _enc(r.get('name'), 64), 'state': _enc(r.get('state'), 8), 'reason': _enc(r.get('reason'), 16),
+                    'price': r.get('price') or 0, 'trade_amt': r.get('trade_amt') or 0,
+                    'wick_ratio': r.get('wick_ratio') or 0.0,
+                })
+            self.header['updated'] = now
+
+    def publish_clock(self, offset):
+        self.header['clock_offset'] = offset
+
+    # ------------------------------------------------------------------
+    # 👀 진단 도구 쪽 (읽기)
+    # ------------------------------------------------------------------
+    def status(self):
+        h = self.header.copy()
+        return {'pid': int(h['pid']), 'started': float(h['started']), 'updated': float(h['updated']),
+                'clock_offset': float(h['clock_offset']), 'alive': _pid_alive(int(h['pid']))}
+
+    def quote(self, code, name=None, max_age=None):
+        """fetch_price_detail과 같은 모양의 dict (없거나 max_age보다 오래됐으면 None)"""
+        table = self.tables['quotes']
+        for idx in np.flatnonzero(table.rows['code'] == code.encode()):
+            rec = table.read(idx)
+            if rec is None or _dec(rec['code']) != code:
+                continue
+            if max_age is not None and time.time() - rec['ts'] > max_age:
+                return None
+            return _quote_dict(rec)
+        return None
+
+    def quotes(self):
+        return {_dec(r['code']): _quote_dict(r) for r in self.tables['quotes'].read_all()}
+
+    def positions(self):
+        return [{'account': _dec(r['account']), 'code': _dec(r['code']), 'name': _dec(r['name']),
+                 'strategy': _dec(r['strategy']), 'qty': int(r['qty']), 'buy_price': float(r['buy_price']),
+                 'max_profit_rate': float(r['max_profit_rate']), 'ts': float(r['ts'])}
+                for r in self.tables['positions'].read_all()]
+
+    def candidates(self, strategy=None):
+        rows = [{'strategy': _dec(r['strategy']), 'code': _dec(r['code']), 'name': _dec(r['name']),
+                 'state': _dec(r['state']), 'reason': _dec(r['reason']), 'price': int(r['price']), 'trade_amt': int(r['trade_amt']),
+                 'wick_ratio': float(r['wick_ratio']), 'ts': float(r['ts'])}
+                for r in self.tables['candidates'].read_all()]
+        return [r for r in rows if strategy is None or r['strategy'] == strategy]
+
+    def condition_rows(self, strategy=None):
+        """봇이 추적 중인 조건검색 편입 종목을 fetch_condition_stocks() 결과 모양으로"""
+        return [{'stck_shrn_iscd': r['code'], 'hts_kor_isnm': r['name'], 'price': r['price']}
+                for r in self.candidates(strategy)]
+
+    def close(self):
+        self.header = None
+        self.tables = {}
+        self.shm.close()
+
+
+def _quote_dict(rec):
+    q = {k: rec[k].item() for k in _QUOTE_NUMBERS}
+    q['code'] = _dec(rec['code'])
+    q['name'] = _dec(rec['name'])
+    q['ts'] = float(rec['ts'])
+    levels = np.array(rec['book'], dtype=np.int64)
+    q['book'] = orderbook.OrderBook(q['code'], levels, q['total_ask'], q['total_bid']) if levels.any() else None
+    return q
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+        return True
+    except (OSError, ValueError):
+        return False
+
+
+# ==============================================================================
+# 🔌 열기
+# ==============================================================================
+_writer = None
+
+
+def open_writer():
+    """봇 시작 시 게시판 생성 (이미 있으면 지난 실행의 잔재로 보고 새로 만듦). 실패해도 봇은 계속"""
+    global _writer
+    if _writer is not None or not ENABLED:
+        return _writer
+    try:
+        try:
+            old = shared_memory.SharedMemory(name=BOARD_NAME)
+            old.close()
+            old.unlink()
+        except FileNotFoundError:
+            pass
+        shm = shared_memory.SharedMemory(name=BOARD_NAME, create=True, size=_size())
+        shm.buf[:_size()] = bytes(_size())
+    except OSError as e:
+        print(f"⚠️ [게시판] 공유메모리 생성 실패 — 게시 없이 계속: {e}")
+        return None
+    board = QuoteBoard(shm, writer=True)
+    board.header['magic'] = MAGIC
+    board.header['version'] = LAYOUT_VERSION
+    board.header['pid'] = os.getpid()
+    board.header['started'] = time.time()
+    _writer = board
+    atexit.register(_remove_writer)
+    print(f"🪧 [게시판] 공유메모리 '{BOARD_NAME}' 게시 시작 ({_size() // 1024}KB)")
+    return board
+
+
+def _remove_writer():
+    global _writer
+    board, _writer = _writer, None
+    if board is not None:
+        shm = board.shm
+        board.close()
+        shm.unlink()
+
+
+def get_writer():
+    """봇 프로세스의 게시판 (open_writer() 전이거나 실패했으면 None)"""
+    return _writer
+
+
+def attach():
+    """진단 도구용: 실행 중인 봇의 게시판 (없거나 봇이 꺼져 있으면 None)"""
+    try:
+        try:
+            shm = shared_memory.SharedMemory(name=BOARD_NAME, track=False)    # Python 3.13+
+        except TypeError:
+            shm = shared_memory.SharedMemory(name=BOARD_NAME)
+            # 읽는 쪽이 종료될 때 리소스 트래커가 봇의 게시판을 지우지 않도록
+            resource_tracker.unregister(shm._name, "shared_memory")
+    except FileNotFoundError:
+        return None
+    board = QuoteBoard(shm, writer=False)
+    magic, version, pid = board.header['magic'].item(), int(board.header['version']), int(board.header['pid'])
+    if magic != MAGIC or version != LAYOUT_VERSION or not _pid_alive(pid):
+        board.close()
+        return None
+    return board
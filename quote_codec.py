@@ -0,0 +1,147 @@
+# quote_codec.py
+import json
+
+try:
+    import orjson     # 선택 의존성 (pip install orjson) — 없으면 표준 json
+    loads = orjson.loads
+    JSON_BACKEND = "orjson"
+except ImportError:
+    loads = json.loads
+    JSON_BACKEND = "json"
+
+import instrument_master
+import orderbook
+
+# ==============================================================================
+# 🧾 시세 응답 해석 (필요한 필드만 꺼내 Quote 하나로)
+# ==============================================================================
+
+
+def to_int(val):
+    """KIS 숫자 문자열 → int. 대부분 '12345' 형태라 int()로 바로 끝나고, 소수/콤마/빈 값만 느린 경로"""
+    try:
+        return int(val)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return int(float(str(val).replace(',', '')))
+    except (TypeError, ValueError):
+        return 0
+
+
+def to_float(val):
+    try:
+        return float(val)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class Quote:
+    """
+    fetch_price_detail 결과. __slots__라 dict보다 작고, 만든 뒤에는 수정하지 않습니다.
+    기존 코드가 quote['price'] / quote.get('book') 처럼 쓰던 그대로 읽을 수 있습니다.
+    """
+    __slots__ = ("code", "name", "price", "ask_price", "open", "high", "low", "max_price", "rate",
+                 "program_buy", "total_ask", "total_bid", "acml_vol", "ask_rsqn1", "bid_rsqn1",
+                 "bid_ask_ratio", "wick_ratio", "exp_price", "exp_qty", "book")
+
+    def __init__(self, code, name, price, ask_price, open, high, low, max_price, rate, program_buy,
+                 total_ask, total_bid, acml_vol, ask_rsqn1, bid_rsqn1, exp_price, exp_qty, book):
+        self.code = code
+        self.name = name
+        self.price = price
+        self.ask_price = ask_price
+        self.open = open
+        self.high = high
+        self.low = low
+        self.max_price = max_price
+        self.rate = rate
+        self.program_buy = program_buy
+        self.total_ask = total_ask
+        self.total_bid = total_bid
+        self.acml_vol = acml_vol
+        self.ask_rsqn1 = ask_rsqn1
+        self.bid_rsqn1 = bid_rsqn1
+        self.exp_price = exp_price     # 예상체결가 (동시호가 시간 외에는 0)
+        self.exp_qty = exp_qty         # 예상체결량
+        self.book = book               # orderbook.OrderBook (호가 조회 실패 시 None)
+
+        if total_ask > 0:
+            self.bid_ask_ratio = total_bid / total_ask * 100
+        elif total_bid > 0:
+            self.bid_ask_ratio = 999.0
+        else:
+            self.bid_ask_ratio = 0.0
+
+        if high > open:
+            self.wick_ratio = (high - max(price, open)) / (high - open)
+        else:
+            self.wick_ratio = 0.0
+
+    # dict처럼 읽기 (기존 호출부 호환)
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def keys(self):
+        return self.__slots__
+
+    def to_dict(self):
+        return {k: getattr(self, k) for k in self.__slots__}
+
+    def __repr__(self):
+        return f"Quote({self.code} {self.name} {self.price:,})"
+
+
+def decode_price_detail(code, price_body, fetch_hoga=None, name_hint=None):
+    """
+    현재가(inquire-price) 응답 본문(bytes)으로 Quote 생성. 현재가 응답이 실패면 None.
+    :param fetch_hoga: () -> 호가(inquire-asking-price-exp-ccn) 응답 본문. 현재가가 성공했을 때만 호출하며,
+                       없거나 실패면 호가 관련 값은 기본값
+    """
+    res1 = loads(price_body)
+    if res1.get('rt_cd') != '0':
+        return None
+    out1 = res1['output']
+    price = to_int(out1.get('stck_prpr'))
+
+    # 종목명은 로컬 종목 마스터에서 O(1) 조회 (없을 때만 응답/조건검색 이름 사용)
+    name = (instrument_master.get_master().name(code)
+            or out1.get('rprs_mant_kor_name', out1.get('hts_kor_isnm', name_hint)) or "이름없음")
+
+    book, ask_price, exp_price, exp_qty = None, price, 0, 0
+    hoga_body = fetch_hoga() if fetch_hoga else None
+    if hoga_body is not None:
+        res2 = loads(hoga_body)
+        if res2.get('rt_cd') == '0':
+            # 🌅 동시호가(장전/장마감) 중 예상체결가/수량
+            out_exp = res2.get('output2') or {}
+            exp_price = to_int(out_exp.get('antc_cnpr'))
+            exp_qty = to_int(out_exp.get('antc_cnqn'))
+            # 📚 10단계 호가 전체 보관 (선정/청산/집행이 추가 조회 없이 사용)
+            book = orderbook.OrderBook.from_kis(code, res2['output1'])
+            ask_price = book.best_ask or price
+
+    return Quote(
+        code, name, price, ask_price,
+        open=to_int(out1.get('stck_oprc')),
+        high=to_int(out1.get('stck_hgpr')),
+        low=to_int(out1.get('stck_lwpr')),
+        max_price=to_int(out1.get('stck_mxpr')),
+        rate=to_float(out1.get('prdy_ctrt')),
+        program_buy=to_int(out1.get('pgtr_ntby_qty')),
+        total_ask=book.total_ask if book else 0,
+        total_bid=book.total_bid if book else 0,
+        acml_vol=to_int(out1.get('acml_vol')),
+        ask_rsqn1=int(book.ask_qty[0]) if book else 0,
+        bid_rsqn1=int(book.bid_qty[0]) if book else 0,
+        exp_price=exp_price, exp_qty=exp_qty, book=book,
+    )
@@ -8,6 +8,7 @@ PROJECT_DIR="/home/ubuntu/stock/jongga"
 
 # 실행할 파이썬 파일명
 SCRIPT_NAME="jongga_bot.py"
+# SCRIPT_NAME="pipeline.py"   # 시세/주문/전략 프로세스 분리 실행 (감독 프로세스가 죽으면 자식도 함께 종료)
 
 # 가상환경 경로 (home/stock 폴더가 가상환경 루트라고 가정)
 VENV_ACTIVATE="/home/ubuntu/stock/bin/activate"
@@ -45,6 +46,12 @@ else
     exit 1
 fi
 
+# 토큰 브로커 (봇/진단 도구/테스트 스크립트가 토큰 하나를 공유 — 봇을 재시작해도 그대로 둠)
+if ! pgrep -f "python3.*token_broker.py" > /dev/null; then
+    nohup python3 -u token_broker.py > token_broker.log 2>&1 &
+    echo "Token broker started (PID: $!)"
+fi
+
 # ==============================================================================
 # 3. 프로세스 재실행 (수정됨)
 # ==============================================================================
@@ -52,7 +59,9 @@ echo "Starting $SCRIPT_NAME..."
 
 # [수정] nohup으로 백그라운드 실행 (-u 옵션 추가)
 # -u : 파이썬의 출력 버퍼링을 끄고 즉시 로그 파일에 기록하게 함
-nohup python3 -u "$SCRIPT_NAME" > output.log 2>&1 &
+# ⚠️ output.log는 봇의 로거가 직접 기록하므로 stdout/stderr는 console.log로 분리
+#    (같은 파일로 돌리면 모든 줄이 두 번 기록됨. console.log에는 크래시 트레이스만 남음)
+nohup python3 -u "$SCRIPT_NAME" > console.log 2>&1 &
 
 # 새로 실행된 프로세스 ID 출력
 NEW_PID=$!
@@ -0,0 +1,315 @@
+# selection_filter.py
+import collections
+
+import instrument_master
+
+# ==============================================================================
+# 🧮 종가베팅 종목 선정 필터 (봇 / analyze_fail.py / test_logic.py 공용)
+# ==============================================================================
+# 규칙은 비용 순으로 실행됩니다. 로컬 검사(cost < QUOTE)에서 걸러지면 시세 조회(API)를 하지 않습니다.
+LOCAL = 0       # 집합 조회 수준
+MASTER = 1      # 종목 마스터 조회 (메모리)
+PAYLOAD = 2     # 조건검색 결과 행(현재가/거래량) + 캐시된 당일 시가
+QUOTE = 10      # 상세시세 필요 (API 1~2회)
+
+# 조건검색 가격은 몇 초 늦을 수 있으므로 확실히 안 되는 종목만 거름 (경계 종목은 상세시세로 판정)
+PAYLOAD_RATE_MARGIN = 0.5   # 예상 시가대비 상승률이 MIN_RATE보다 이만큼(%p) 더 낮아야 탈락
+PAYLOAD_PRICE_MARGIN = 0.02 # 조건검색 가격이 1회 분할한도보다 이 비율 이상 비싸야 탈락
+VOLUME_DAYS = 20            # 거래량 급증 비교 기간 (daily_history 캐시의 최근 거래일 평균)
+FADE_BARS = 15              # 장 후반 밀림을 보는 최근 1분봉 수 (bar_builder — 대기 시간에 관측한 시세로 집계)
+FADE_MIN_BARS = 5           # 1분봉이 이보다 적으면(관측 부족) 판단 보류
+BOOK_LEVELS = 5             # 호가 불균형을 보는 단계 수 (1~5호가 누적)
+DETAIL_SPARE = 2            # 예상 거래대금 순위 오차 대비 — 통과 목표(MAX_STOCKS)보다 이만큼 더 상세조회
+
+
+class Rule:
+    """
+    선정 규칙 하나.
+    check(ctx) -> None이면 통과, 문자열이면 탈락 (문자열은 상세 사유)
+    """
+    __slots__ = ("name", "label", "cost", "check")
+
+    def __init__(self, name, label, cost, check):
+        self.name = name
+        self.label = label
+        self.cost = cost
+        self.check = check
+
+    def __repr__(self):
+        return f"Rule({self.name})"
+
+
+class Context:
+    """규칙이 보는 값 (종목, 조건검색 행, 당일 시가, 상세시세, 설정, 제외 목록, 1회 분할한도, 일봉 이력, 분봉)"""
+    __slots__ = ("code", "name", "row", "open", "info", "settings", "exclude", "blacklist", "split_limit",
+                 "history", "bars")
+
+    def __init__(self, code, name, row, open_price, info, settings, exclude, blacklist, split_limit,
+                 history=None, bars=None):
+        self.code = code
+        self.name = name
+        self.row = row
+        self.open = open_price
+        self.info = info
+        self.settings = settings
+        self.exclude = exclude
+        self.blacklist = blacklist
+        self.split_limit = split_limit
+        self.history = history
+        self.bars = bars
+
+
+def rate_from_open(info):
+    """시가 대비 상승률(%) — API의 rate는 전일 대비라서 직접 계산"""
+    if info['open'] <= 0:
+        return None
+    return (info['price'] - info['open']) / info['open'] * 100
+
+
+def estimated_value(row):
+    """조건검색 결과 행의 예상 거래대금 (현재가 × 누적거래량) — 상세조회 순서 결정용"""
+    return row.get('price', 0) * row.get('vol', 0)
+
+
+# ------------------------------------------------------------------
+# 📋 규칙 정의
+# ------------------------------------------------------------------
+def _blacklist(c):
+    if c.code in c.blacklist:
+        return "금일 매도/손절 종목"
+
+def _exclude(c):
+    if c.code in c.exclude:
+        return "config.EXCLUDE_LIST 포함"
+
+def _plain_stock(c):
+    master = instrument_master.get_master()
+    if not master.is_plain_stock(c.code, c.name):
+        return f"{master.kind(c.code) or '이름 기준'} (ETF/스팩/우선주 등)"
+
+def _payload_rate(c):
+    # 행 또는 당일 시가가 없으면(오늘 처음 보는 종목) 판단 보류 → 상세시세에서 판정
+    if not c.row or not c.open or c.row.get('price', 0) <= 0:
+        return None
+    rate = (c.row['price'] - c.open) / c.open * 100
+    if rate < c.settings.MIN_RATE - PAYLOAD_RATE_MARGIN:
+        return f"시가대비 약 {rate:.2f}% < 기준 {c.settings.MIN_RATE}% (조건검색 가격)"
+
+def _budget(c):
+    if not c.row or not c.split_limit:
+        return None
+    price = c.row.get('price', 0)
+    if price > c.split_limit * (1 + PAYLOAD_PRICE_MARGIN):
+        return f"{price:,}원 > 1회 분할한도 {c.split_limit:,}원"
+
+def _rate(c):
+    rate = rate_from_open(c.info)
+    if rate is None:
+        return "시가 없음"
+    if rate < c.settings.MIN_RATE:
+        return f"시가대비 {rate:.2f}% < 기준 {c.settings.MIN_RATE}%"
+
+def _wick(c):
+    s, w = c.settings, c.info['wick_ratio']
+    if not (s.MIN_WICK <= w < s.MAX_WICK):
+        return f"윗꼬리 {w:.2f} (기준 {s.MIN_WICK}~{s.MAX_WICK} 미만)"
+
+def _bullish(c):
+    if c.info['price'] <= c.info['open']:
+        return f"시가({c.info['open']:,}) >= 현재가({c.info['price']:,})"
+
+def _limit_up(c):
+    if c.info['price'] >= c.info['max_price']:
+        return "상한가 (매수 불가)"
+
+def _volume_surge(c):
+    # MIN_VOL_RATIO <= 0 이면 끔. 이력 캐시가 없거나 그 종목 이력이 없으면 판단 보류
+    ratio_min = c.settings.MIN_VOL_RATIO
+    if ratio_min <= 0 or c.history is None:
+        return None
+    avg = c.history.average([c.code], "volume", VOLUME_DAYS)[0]
+    if avg <= 0:
+        return None
+    ratio = c.info['acml_vol'] / avg
+    if ratio < ratio_min:
+        return f"거래량 {VOLUME_DAYS}일 평균의 {ratio:.1f}배 < 기준 {ratio_min}배"
+
+def _book(c):
+    # MIN_BOOK_IMBALANCE <= -1 이면 끔. 10단계 호가가 없으면(호가 조회 실패) 판단 보류
+    floor = c.settings.MIN_BOOK_IMBALANCE
+    book = c.info.get('book')
+    if floor <= -1 or book is None:
+        return None
+    imb = float(book.cum_imbalance()[BOOK_LEVELS - 1])
+    if imb < floor:
+        return f"{BOOK_LEVELS}호가 잔량 불균형 {imb:+.2f} < 기준 {floor:+.2f} (매도 잔량 우위)"
+
+def _fade(c):
+    # MAX_FADE >= 1 이면 끔. 분봉 집계기가 없거나 관측한 1분봉이 적으면 판단 보류
+    max_fade = c.settings.MAX_FADE
+    if max_fade >= 1 or c.bars is None:
+        return None
+    if len(c.bars.bars(c.code, 60, FADE_BARS)) < FADE_MIN_BARS:
+        return None
+    fade = c.bars.fade(c.code, 60, FADE_BARS)
+    if fade > max_fade:
+        return f"최근 {FADE_BARS}분 고점 대비 밀림 {fade:.2f} > 기준 {max_fade}"
+
+def _program(c):
+    if c.info['program_buy'] * c.info['price'] <= 0:
+        return f"프로그램 순매수 {c.info['program_buy']:,}주"
+
+
+JONGGA_RULES = [
+    Rule("blacklist", "금일 제외", LOCAL, _blacklist),
+    Rule("exclude", "설정 제외", LOCAL, _exclude),
+    Rule("type", "유형 제외", MASTER, _plain_stock),
+    Rule("budget", "예산 초과", PAYLOAD, _budget),
+    Rule("rate_est", "등락률 미달(예상)", PAYLOAD, _payload_rate),
+    Rule("rate", "등락률 미달", QUOTE, _rate),
+    Rule("wick", "윗꼬리 범위", QUOTE, _wick),
+    Rule("bullish", "음봉/도지", QUOTE, _bullish),
+    Rule("limit_up", "상한가", QUOTE, _limit_up),
+    Rule("program", "수급 이탈", QUOTE, _program),
+    Rule("volume", "거래량 부족", QUOTE, _volume_surge),
+    Rule("book", "매도호가 우위", QUOTE, _book),
+    Rule("fade", "장 후반 밀림", QUOTE, _fade),
+]
+
+NO_QUOTE = "no_quote"   # 시세 조회 실패 (규칙 탈락이 아님 — 다음에 다시 조회)
+LABELS = {r.name: r.label for r in JONGGA_RULES}
+LABELS[NO_QUOTE] = "시세 없음"
+
+
+class Verdict:
+    __slots__ = ("code", "name", "rule", "detail", "candidate", "info")
+
+    def __init__(self, code, name, rule=None, detail="", candidate=None, info=None):
+        self.code = code
+        self.name = name
+        self.rule = rule            # 탈락시킨 규칙 이름 (통과면 None)
+        self.detail = detail
+        self.candidate = candidate  # 통과 시 후보 dict
+        self.info = info
+
+    @property
+    def passed(self):
+        return self.rule is None
+
+
+class FilterPipeline:
+    """
+    규칙 목록을 비용 순으로 실행하고, 종목별 마지막 판정(verdicts)을 보관합니다.
+    scan_stats(codes)로 '이번 조건검색 편입 종목이 각각 어떤 규칙에서 떨어졌는지'를 API 재조회 없이 집계합니다.
+
+    :param settings: MIN_RATE / MIN_WICK / MAX_WICK / MIN_VOL_RATIO / MIN_BOOK_IMBALANCE / MAX_FADE 를 가진 설정 (BotConfig 등)
+    :param exclude, blacklist: 제외 종목 집합 (봇의 set을 그대로 넘기면 실시간 반영)
+    :param day_open: code -> 캐시된 당일 시가 또는 None (MarketData.day_open). 없으면 예상 등락률 검사 생략
+    :param history: () -> daily_history.DailyHistory 또는 None (daily_history.get_history). 없으면 이력 규칙 생략
+    :param bars: bar_builder.BarBuilder (봇의 시세 리스너). 없으면 분봉 규칙 생략 (analyze_fail.py 등)
+    """
+
+    def __init__(self, settings, exclude=(), blacklist=(), rules=None, day_open=None, history=None, bars=None):
+        self.settings = settings
+        self.exclude = exclude
+        self.blacklist = blacklist
+        self.day_open = day_open
+        self.history = history
+        self.bars = bars
+        self.split_limit = 0    # 1회 분할한도 (0이면 예산 검사 생략 — 잔고를 알게 되면 전략이 채움)
+        self.rules = sorted(rules or JONGGA_RULES, key=lambda r: r.cost)   # 같은 비용이면 선언 순서
+        self.local_rules = [r for r in self.rules if r.cost < QUOTE]
+        self.quote_rules = [r for r in self.rules if r.cost >= QUOTE]
+        self.verdicts = {}  # code -> Verdict
+
+    def _ctx(self, code, name, row=None, info=None):
+        open_price = self.day_open(code) if row and self.day_open else None
+        history = self.history() if info is not None and self.history else None
+        return Context(code, name, row, open_price, info, self.settings,
+                       self.exclude, self.blacklist, self.split_limit, history, self.bars)
+
+    def _first_fail(self, rules, ctx):
+        for rule in rules:
+            detail = rule.check(ctx)
+            if detail is not None:
+                return rule, detail
+        return None, ""
+
+    def prescreen(self, code, name, row=None):
+        """로컬 규칙만 (API 호출 없음). row(조건검색 결과 행)를 주면 예산/예상 등락률도 검사. 탈락하면 판정도 기록"""
+        rule, detail = self._first_fail(self.local_rules, self._ctx(code, name, row))
+        if rule is not None:
+            self.verdicts[code] = Verdict(code, name, rule.name, detail)
+            return False
+        return True
+
+    def evaluate(self, code, name, info):
+        """상세시세 규칙. 통과하면 후보 dict, 아니면 None (판정은 verdicts에 기록)"""
+        rule, detail = self._first_fail(self.quote_rules, self._ctx(code, name, info=info))
+        candidate = None
+        if rule is None:
+            candidate = {
+                'code': code,
+                'name': name,
+                'trade_amt': info['price'] * info['acml_vol'],
+                'price': info['price'],
+                'wick_ratio': info['wick_ratio'],
+            }
+        self.verdicts[code] = Verdict(code, name, rule.name if rule else None, detail, candidate, info)
+        return candidate
+
+    def check(self, code, name, fetch, row=None):
+        """
+        한 종목 전체 판정 (로컬 → 시세 조회 → 시세 규칙).
+        :param fetch: (code, name) -> 상세시세. 로컬 규칙을 통과한 종목만 호출됩니다.
+        """
+        if not self.prescreen(code, name, row):
+            return self.verdicts[code]
+        info = fetch(code, name)
+        if not info:
+            verdict = Verdict(code, name, NO_QUOTE, "시세 조회 실패")
+            self.verdicts[code] = verdict
+            return verdict
+        self.evaluate(code, name, info)
+        return self.verdicts[code]
+
+    def select(self, rows, fetch, limit):
+        """
+        조건검색 결과 행들을 예상 거래대금 순으로 판정하고, limit개가 통과하면 나머지는 상세조회하지 않습니다.
+        통과 후보 목록(예상 순위 순)을 반환합니다. 조회하지 않은 종목은 scan_stats에서 '미조회'로 잡힙니다.
+        """
+        passed = []
+        for row in sorted(rows, key=estimated_value, reverse=True):
+            if len(passed) >= limit:
+                break
+            verdict = self.check(row['stck_shrn_iscd'], row['hts_kor_isnm'], fetch, row)
+            if verdict.passed:
+                passed.append(verdict.candidate)
+        return passed
+
+    def scan_stats(self, codes):
+        """codes(이번 스캔 대상) 기준 {'passed': n, 'pending': n, 규칙 이름: 탈락 수}"""
+        stats = collections.Counter()
+        for code in codes:
+            v = self.verdicts.get(code)
+            if v is None:
+                stats['pending'] += 1
+            elif v.passed:
+                stats['passed'] += 1
+            else:
+                stats[v.rule] += 1
+        return stats
+
+    def reset(self):
+        self.verdicts.clear()
+
+
+def format_stats(stats):
+    """'통과 2 / 등락률 미달 5 / 윗꼬리 범위 3' 형식 (탈락 많은 순)"""
+    parts = [f"통과 {stats.get('passed', 0)}"]
+    rejected = [(k, n) for k, n in stats.items() if k not in ('passed', 'pending') and n > 0]
+    rejected.sort(key=lambda x: -x[1])
+    parts += [f"{LABELS.get(k, k)} {n}" for k, n in rejected]
+    if stats.get('pending'):
+        parts.append(f"미조회 {stats['pending']}")
+    return " / ".join(parts)
@@ -0,0 +1,233 @@
+# shm_ring.py
+import itertools
+import os
+import pickle
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+# ==============================================================================
+# 🔁 공유메모리 링버퍼 (프로세스 간 메시지 전달)
+# ==============================================================================
+SLOTS = 64                  # 링 칸 수
+SLOT_SIZE = 64 * 1024       # 칸 하나 크기(바이트). 메시지(pickle)는 이보다 작아야 함
+HEADER_SIZE = 64            # head/tail/칸 정보 (캐시라인 하나)
+POLL_SLEEP = 0.0002         # 빈 링을 다시 볼 때까지 쉬는 시간(초)
+REPLY_MARGIN = 0.5          # 응답이 호출 측 대기시간 안에 돌아가도록 마감시각에서 남겨두는 시간(초)
+
+# head(쓴 개수, 생산자만 씀) / tail(읽은 개수, 소비자만 씀) / 칸 수 / 칸 크기
+_HEAD = struct.Struct("<Q")
+_TAIL_OFFSET = 8
+_LAYOUT = struct.Struct("<II")
+_LAYOUT_OFFSET = 16
+_LEN = struct.Struct("<I")
+
+
+class RingFull(Exception):
+    pass
+
+
+class ShmRing:
+    """
+    단일 생산자/단일 소비자 공유메모리 링버퍼.
+    생산자는 칸에 [길이 + pickle]을 다 쓴 뒤 head를 올리고, 소비자는 읽은 뒤 tail을 올립니다.
+    head/tail은 각자 한쪽만 쓰므로 프로세스 간 락이 필요 없습니다.
+    (같은 프로세스의 여러 스레드가 한쪽을 함께 쓰는 경우만 프로세스 내부 락으로 직렬화)
+
+    링은 감독 프로세스가 만들고 소유하므로, 자식 프로세스가 재시작돼도 head/tail이 유지되어
+    남은 메시지를 이어서 읽습니다.
+    """
+
+    def __init__(self, name, create=False, slots=SLOTS, slot_size=SLOT_SIZE):
+        self.name = name
+        if create:
+            # 이전 실행(kill -9 등)이 남긴 같은 이름 세그먼트 정리
+            try:
+                old = shared_memory.SharedMemory(name=name)
+                old.close()
+                old.unlink()
+            except FileNotFoundError:
+                pass
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=HEADER_SIZE + slots * slot_size)
+            self.shm.buf[:HEADER_SIZE] = bytes(HEADER_SIZE)
+            _LAYOUT.pack_into(self.shm.buf, _LAYOUT_OFFSET, slots, slot_size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.buf = self.shm.buf
+        self.slots, self.slot_size = _LAYOUT.unpack_from(self.buf, _LAYOUT_OFFSET)
+        self._put_lock = threading.Lock()
+        self._get_lock = threading.Lock()
+
+    def _head(self):
+        return _HEAD.unpack_from(self.buf, 0)[0]
+
+    def _tail(self):
+        return _HEAD.unpack_from(self.buf, _TAIL_OFFSET)[0]
+
+    def __len__(self):
+        return self._head() - self._tail()
+
+    def put(self, obj, timeout=0):
+        """
+        메시지 하나를 넣습니다. 링이 가득 차 있으면 timeout(초)까지 기다린 뒤 False.
+        :raises ValueError: 메시지가 칸 크기보다 큰 경우
+        """
+        data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(data) + _LEN.size > self.slot_size:
+            raise ValueError(f"메시지 크기 {len(data):,}B > 칸 크기 {self.slot_size:,}B")
+        deadline = time.monotonic() + timeout
+        with self._put_lock:
+            while True:
+                head = self._head()
+                if head - self._tail() < self.slots:
+                    break
+                if time.monotonic() >= deadline:
+                    return False
+                time.sleep(POLL_SLEEP)
+            off = HEADER_SIZE + (head % self.slots) * self.slot_size
+            _LEN.pack_into(self.buf, off, len(data))
+            self.buf[off + _LEN.size:off + _LEN.size + len(data)] = data
+            _HEAD.pack_into(self.buf, 0, head + 1)     # 다 쓴 뒤에 공개
+        return True
+
+    def get(self, timeout=None):
+        """메시지 하나를 꺼냅니다. timeout(초)까지 없으면 None (None이면 무한 대기)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._get_lock:
+            while True:
+                tail = self._tail()
+                if self._head() > tail:
+                    break
+                if deadline is not None and time.monotonic() >= deadline:
+                    return None
+                time.sleep(POLL_SLEEP)
+            off = HEADER_SIZE + (tail % self.slots) * self.slot_size
+            (length,) = _LEN.unpack_from(self.buf, off)
+            data = bytes(self.buf[off + _LEN.size:off + _LEN.size + length])
+            _HEAD.pack_into(self.buf, _TAIL_OFFSET, tail + 1)
+        return pickle.loads(data)
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+
+    def unlink(self):
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+# ==============================================================================
+# 📞 링 두 개로 만든 요청/응답 (RPC)
+# ==============================================================================
+class RpcError(Exception):
+    pass
+
+
+class RpcTimeout(RpcError):
+    pass
+
+
+class RpcClient:
+    """
+    요청 링에 (요청ID, 마감시각, 대상, 메서드, 인자)를 넣고 응답 링에서 결과를 받습니다.
+    여러 스레드가 동시에 호출할 수 있으며, 응답은 수신 스레드 하나가 요청ID로 나눠줍니다.
+    요청ID에 pid를 넣어 재시작 전 프로세스의 늦은 응답과 섞이지 않게 합니다.
+    """
+
+    def __init__(self, req_ring, resp_ring):
+        self.req = req_ring
+        self.resp = resp_ring
+        self._ids = itertools.count(1)
+        self._pid = os.getpid()
+        self._pending = {}      # rid -> [Event, 결과]
+        self._lock = threading.Lock()
+        t = threading.Thread(target=self._dispatch, name="rpc-resp", daemon=True)
+        t.start()
+
+    def call(self, target, method, *args, timeout=10.0, **kwargs):
+        rid = (self._pid, next(self._ids))
+        slot = [threading.Event(), None]
+        with self._lock:
+            self._pending[rid] = slot
+        try:
+            deadline = time.time() + timeout
+            if not self.req.put((rid, deadline, target, method, args, kwargs), timeout=timeout):
+                raise RpcTimeout(f"{target}.{method}: 요청 링 가득 참")
+            if not slot[0].wait(timeout):
+                raise RpcTimeout(f"{target}.{method}: {timeout:.0f}초 응답 없음")
+        finally:
+            with self._lock:
+                self._pending.pop(rid, None)
+        ok, value = slot[1]
+        if not ok:
+            raise RpcError(f"{target}.{method}: {value}")
+        return value
+
+    def _dispatch(self):
+        while True:
+            try:
+                rid, ok, value = self.resp.get()
+            except Exception as e:
+                print(f"⚠️ [RPC] 응답 해석 실패: {e}")
+                continue
+            with self._lock:
+                slot = self._pending.get(rid)
+            if slot is None:
+                continue    # 이미 포기한 요청 또는 재시작 전 요청의 응답
+            slot[1] = (ok, value)
+            slot[0].set()
+
+
+_local = threading.local()
+
+
+def time_left(default):
+    """
+    serve()가 처리 중인 요청의 남은 시간(초)과 default 중 작은 값.
+    RPC 밖(단일 프로세스 실행)에서는 항상 default. 0 이하면 호출 측이 이미 실패로 처리한 요청입니다.
+    """
+    deadline = getattr(_local, 'deadline', None)
+    if deadline is None:
+        return default
+    return min(default, deadline - REPLY_MARGIN - time.time())
+
+
+def serve(req_ring, resp_ring, handlers, workers=4):
+    """
+    요청 링을 처리하는 서버 루프 (반환하지 않음).
+    :param handlers: { 대상 이름: (객체, 허용 메서드 이름 set) }
+    마감시각이 지난 요청은 실행하지 않습니다 (호출 측이 이미 실패로 처리한 주문이 뒤늦게 나가는 것 방지).
+    실행 중에도 마감시각은 time_left()로 보이므로, 핸들러는 전송 직전에 다시 확인하고 HTTP 타임아웃을 줄입니다.
+    """
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rpc")
+
+    def handle(msg):
+        rid, deadline, target, method, args, kwargs = msg
+        if time.time() > deadline:
+            print(f"⌛ [RPC] 마감 지난 요청 버림: {target}.{method}")
+            return
+        obj, allowed = handlers.get(target, (None, ()))
+        if obj is None or method not in allowed:
+            reply = (rid, False, f"허용되지 않은 호출 {target}.{method}")
+        else:
+            _local.deadline = deadline
+            try:
+                reply = (rid, True, getattr(obj, method)(*args, **kwargs))
+            except Exception as e:
+                reply = (rid, False, repr(e))
+            finally:
+                _local.deadline = None
+        try:
+            if not resp_ring.put(reply, timeout=1.0):
+                print(f"⚠️ [RPC] 응답 링 가득 참: {target}.{method}")
+        except ValueError as e:
+            resp_ring.put((rid, False, str(e)), timeout=1.0)
+
+    while True:
+        msg = req_ring.get(timeout=1.0)
+        if msg is not None:
+            pool.submit(handle, msg)
@@ -0,0 +1,177 @@
+# state_journal.py
+import json
+import os
+import threading
+import time
+
+# ==============================================================================
+# ⚙️ 저장 설정
+# ==============================================================================
+STATE_DIR = "state"
+SNAPSHOT_FILE = f"{STATE_DIR}/snapshot.json"
+JOURNAL_FILE = f"{STATE_DIR}/journal.log"
+
+COMPACT_EVERY = 500         # 저널이 이 줄 수를 넘으면 스냅샷으로 압축
+COMPACT_INTERVAL = 60       # 또는 마지막 스냅샷 후 이 시간(초)이 지나면 압축
+
+# ==============================================================================
+# 📒 봇 상태 저널 (append-only 로그 + 주기적 스냅샷)
+# ==============================================================================
+# 상태 모양:
+# {
+#   "day": "YYYY-MM-DD",
+#   "portfolio": { code: {name, qty, buy_price, max_profit_rate, has_partial_sold,
+#                         buy_time, strategy, path} },
+#   "buy_progress": { code: 분할매수 횟수 },
+#   "buy_spent": { code: 분할매수 주문 금액 누적 (주문가 × 수량, 정정 반영) },
+#   "today_blacklist": [code, ...],
+#   "position_tags": { code: 전략 이름 }   # 매수 후 잔고 등록 전까지의 전략 태그
+# }
+# - 상태가 바뀔 때마다 한 줄(JSON)을 저널 끝에 붙입니다. write 후 flush 하므로 kill -9에도 남습니다.
+# - 스냅샷은 임시파일 → fsync → os.replace 로 원자적으로 교체되며, 포함된 seq 이후의 저널만 재생합니다.
+
+
+def empty_state():
+    return {"day": None, "portfolio": {}, "buy_progress": {}, "buy_spent": {}, "today_blacklist": [], "position_tags": {}}
+
+
+def apply_op(state, entry):
+    """저널 한 줄을 상태에 반영합니다."""
+    op = entry.get("op")
+    code = entry.get("code")
+    portfolio = state["portfolio"]
+
+    if op == "pos_set":
+        portfolio[code] = dict(entry["data"])
+        state.setdefault("position_tags", {}).pop(code, None)
+    elif op == "pos_update":
+        if code in portfolio:
+            portfolio[code].update(entry["data"])
+    elif op == "pos_del":
+        portfolio.pop(code, None)
+    elif op == "progress":
+        state["buy_progress"][code] = entry["count"]
+        if "money" in entry:
+            state.setdefault("buy_spent", {})[code] = entry["money"]
+    elif op == "tag":
+        state.setdefault("position_tags", {})[code] = entry["strategy"]
+    elif op == "blacklist_add":
+        if code not in state["today_blacklist"]:
+            state["today_blacklist"].append(code)
+    elif op == "daily_reset":
+        state["day"] = entry.get("day")
+        state["buy_progress"] = {}
+        state["buy_spent"] = {}
+        state["today_blacklist"] = []
+    return state
+
+
+class StateJournal:
+    def __init__(self, snapshot_file=SNAPSHOT_FILE, journal_file=JOURNAL_FILE):
+        self.snapshot_file = snapshot_file
+        self.journal_file = journal_file
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._lines_since_snapshot = 0
+        self._last_snapshot_time = time.time()
+
+        state_dir = os.path.dirname(journal_file)
+        if state_dir and not os.path.exists(state_dir):
+            os.makedirs(state_dir)
+        self._fp = None
+
+    # ------------------------------------------------------------------
+    # 📥 복구
+    # ------------------------------------------------------------------
+    def load(self):
+        """스냅샷 + 이후 저널을 재생해 마지막 상태를 반환합니다. (없으면 None)"""
+        state = None
+        snap_seq = 0
+
+        if os.path.exists(self.snapshot_file):
+            try:
+                with open(self.snapshot_file, 'r', encoding='utf-8') as f:
+                    snap = json.load(f)
+                state = snap["state"]
+                snap_seq = snap.get("seq", 0)
+            except Exception as e:
+                print(f"⚠️ [State] 스냅샷 손상, 저널만으로 복구 시도: {e}")
+
+        replayed = 0
+        self._seq = snap_seq
+        if os.path.exists(self.journal_file):
+            with open(self.journal_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break  # kill -9로 잘린 마지막 줄
+                    if entry.get("seq", 0) <= snap_seq:
+                        continue
+                    if state is None:
+                        state = empty_state()
+                    apply_op(state, entry)
+                    self._seq = entry["seq"]
+                    replayed += 1
+
+        self._lines_since_snapshot = replayed
+        if state is not None:
+            print(f"📥 [State] 상태 복구 (스냅샷 seq {snap_seq} + 저널 {replayed}건)")
+        return state
+
+    # ------------------------------------------------------------------
+    # ✍️ 기록
+    # ------------------------------------------------------------------
+    def record(self, op, code=None, **fields):
+        entry = {"op": op}
+        if code is not None:
+            entry["code"] = code
+        entry.update(fields)
+
+        with self._lock:
+            self._seq += 1
+            entry["seq"] = self._seq
+            try:
+                if self._fp is None:
+                    self._fp = open(self.journal_file, 'a', encoding='utf-8')
+                self._fp.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+                self._fp.flush()
+                self._lines_since_snapshot += 1
+            except Exception as e:
+                print(f"❌ [State] 저널 기록 실패: {e}")
+
+    def needs_compaction(self):
+        return (self._lines_since_snapshot >= COMPACT_EVERY or
+                (self._lines_since_snapshot > 0 and time.time() - self._last_snapshot_time >= COMPACT_INTERVAL))
+
+    def snapshot(self, state_provider):
+        """
+        현재 상태를 원자적으로 스냅샷 저장하고 저널을 비웁니다.
+        :param state_provider: 상태 dict를 만들어 반환하는 함수 (저널 락 안에서 호출되므로
+                               그 사이 기록이 끼어들어 스냅샷에서 빠지는 일이 없음)
+        """
+        with self._lock:
+            tmp = self.snapshot_file + ".tmp"
+            try:
+                state = state_provider()
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump({"seq": self._seq, "saved_at": time.time(), "state": state},
+                              f, ensure_ascii=False, default=str)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, self.snapshot_file)
+
+                # 스냅샷에 seq가 들어 있으므로 이 사이에 죽어도 중복 재생되지 않음
+                if self._fp is not None:
+                    self._fp.close()
+                self._fp = open(self.journal_file, 'w', encoding='utf-8')
+                self._lines_since_snapshot = 0
+                self._last_snapshot_time = time.time()
+            except Exception as e:
+                print(f"❌ [State] 스냅샷 저장 실패: {e}")
+
+    def close(self):
+        with self._lock:
+            if self._fp is not None:
+                self._fp.close()
+                self._fp = None
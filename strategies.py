@@ -0,0 +1,394 @@
+# strategies.py
+import time
+
+import config
+import execution
+import candidate_tracker
+import daily_history
+import selection_filter
+import log_pipeline
+
+# ==============================================================================
+# 🧩 전략 플러그인 인터페이스
+# ==============================================================================
+# 한 프로세스(TradingBot) 안에서 여러 전략이 돌아갑니다.
+# - 시세/조건검색은 bot.market 하나를, 잔고 조회는 계좌별 bot.account를 함께 씁니다. (전략을 늘려도 API 부하는 그대로)
+# - 매수한 종목은 전략 이름(name)으로 태깅되어 Position.strategy / 매매로그 strategy 컬럼에 남고,
+#   보유 중 매도 판단은 그 종목을 산 전략의 manage_position()이 맡습니다.
+# - 예산은 계좌 순자산 × 계좌 투자비중(ASSET_WEIGHT) × 전략 비중(STRATEGY_WEIGHTS)으로 전략마다 따로 계산합니다.
+
+
+class Strategy:
+    name = "BASE"
+    gap_exit_rate = None    # 장전 예상체결가 기준 시초 청산 갭 (None이면 장전 청산 준비 안 함)
+
+    def __init__(self, bot, weight=1.0):
+        self.bot = bot
+        self.settings = bot.settings
+        self.weight = weight
+
+    def budget(self, balance):
+        """이 전략이 쓸 수 있는 총 금액"""
+        return int(balance * self.bot.asset_weight * self.weight)
+
+    def positions(self):
+        """이 전략이 관리하는 보유 종목 (게시된 스냅샷 기준)"""
+        return {c: p for c, p in self.bot.portfolio.snapshot().items() if p.strategy == self.name}
+
+    def reset_day(self):
+        """하루 시작 시 전략 내부 상태 초기화"""
+        pass
+
+    def on_tick(self, now):
+        """메인 루프에서 매 주기 호출 (종목 선정/매수)"""
+        pass
+
+    def before_manage(self, now):
+        """감시 루프에서 종목별 판단 전에 한 번 호출 (타임컷 등). True면 이번 주기 종목별 판단 생략"""
+        return False
+
+    def manage_position(self, pos, quote, now, real_holdings):
+        """보유 종목 1건의 매도 판단 (감시 루프에서 호출)"""
+        pass
+
+    def status(self):
+        """/info 에 덧붙일 한 줄 요약 (없으면 None)"""
+        return None
+
+
+# ==============================================================================
+# 🌙 종가베팅 전략 (15:00 후보 추적 → 15:15 분할 매수 → 익일 09:00~10:00 청산)
+# ==============================================================================
+class JonggaStrategy(Strategy):
+    name = "JONGGA"
+    COND_NAME = "jongga"
+
+    def __init__(self, bot, weight=1.0):
+        super().__init__(bot, weight)
+        self.gap_exit_rate = self.settings.GAP_DOWN_PANIC
+        # 🧮 선정 규칙 (비용 순: 로컬 검사 → 조건검색 행/캐시된 시가 → 시세 조회 → 시세 규칙)
+        self.filter = selection_filter.FilterPipeline(
+            self.settings, exclude=bot.exclude_list, blacklist=bot.today_blacklist,
+            day_open=bot.market.day_open, history=daily_history.get_history, bars=bot.bars)
+        # 🎯 매수 전 후보 추적 (대기 시간에 미리 선정 → 매수 시각엔 API 호출 없이 바로 사용)
+        #    상세조회는 예상 거래대금 순으로, 통과 종목이 충분하면 나머지는 생략
+        self.tracker = candidate_tracker.CandidateTracker(
+            bot.market, self.prescreen, self.evaluate, cond_name=self.COND_NAME,
+            quote=bot.market.quote, order=selection_filter.estimated_value,
+            limit=self.settings.MAX_STOCKS + selection_filter.DETAIL_SPARE)
+        self.reset_day()
+
+    def reset_day(self):
+        self.tracker.reset()
+        self.filter.reset()
+        self.filter.split_limit = 0
+        self.last_scan_summary = None
+        self.target_stocks = []
+        self.invest_per_stock = 0
+        self.next_select_time = 0   # 선정 실패 시 재시도 시각
+        self.next_split_time = 0    # 분할 매수 집행 다음 확인 시각
+        self.executor = None        # 선정이 끝나면 만들어지는 분할 매수 집행기
+        self.last_time_cut = 0
+        self.last_wait_log = None
+        self.publish_candidates()
+
+    # ------------------------------------------------------------------
+    # 🕵️ 종목 선정 (규칙은 selection_filter.JONGGA_RULES — analyze_fail.py / test_logic.py와 공용)
+    # ------------------------------------------------------------------
+    def prescreen(self, code, name, stock=None):
+        """상세조회 전 로컬 검사 (블랙리스트/제외종목/종목 유형, 조건검색 행이 있으면 예산/예상 등락률 — API 호출 없음)"""
+        return self.filter.prescreen(code, name, stock)
+
+    def evaluate(self, stock, info):
+        """상세시세 기준 선정 조건. 통과하면 후보 dict, 아니면 None"""
+        return self.filter.evaluate(stock['stck_shrn_iscd'], stock['hts_kor_isnm'], info)
+
+    def scan_summary(self, codes=None):
+        """이번 스캔(조건검색 편입 종목)의 규칙별 탈락 수 — '왜 안 샀나'를 재조회 없이 답함"""
+        codes = self.tracker.members if codes is None else codes
+        return selection_filter.format_stats(self.filter.scan_stats(codes))
+
+    def _log_scan(self, codes=None):
+        summary = self.scan_summary(codes)
+        if summary != self.last_scan_summary:
+            self.last_scan_summary = summary
+            print(f"🧮 [{self.name} 선정 필터] {summary}")
+
+    def status(self):
+        if self.last_scan_summary:
+            return f"🧮 {self.name} 선정: {self.last_scan_summary}"
+        return None
+
+    def publish_candidates(self):
+        """추적 중인 후보와 판정 상태를 공유메모리 게시판에 올림 (진단 도구용)"""
+        board = self.bot.board
+        if not board:
+            return
+        targets = {t['code'] for t in self.target_stocks}
+        rows = []
+        for code, stock in self.tracker.members.items():
+            verdict = self.filter.verdicts.get(code)
+            if code in targets:
+                state = "target"
+            elif verdict is None:
+                state = "pending"
+            else:
+                state = "pass" if verdict.passed else "reject"
+            src = (verdict.candidate if verdict else None) or {}
+            rows.append({'code': code, 'name': stock['hts_kor_isnm'], 'state': state,
+                         'reason': verdict.rule if verdict and verdict.rule else "",
+                         'price': src.get('price', stock.get('price', 0)),
+                         'trade_amt': src.get('trade_amt', 0), 'wick_ratio': src.get('wick_ratio', 0.0)})
+        board.publish_candidates(self.name, rows)
+
+    def get_targets(self):
+        # 1. 조건검색식 조회 (거래대금 Top, 프로그램 100억 등 조건 만족군)
+        candidates = self.bot.market.fetch_condition_stocks(self.COND_NAME)
+        if not candidates:
+            print(f"⚠️ 조건검색 '{self.COND_NAME}' 결과 없음")
+            return []
+
+        # 2. 필터링 및 정보 수집 (로컬 규칙 탈락 종목은 시세 조회 안 함, 시세는 공용 캐시)
+        #    예상 거래대금 순으로 상세조회하고 통과 종목이 충분하면 나머지는 조회하지 않음
+        filtered = self.filter.select(candidates, self.bot.market.quote,
+                                      limit=self.settings.MAX_STOCKS + selection_filter.DETAIL_SPARE)
+        self._log_scan([c['stck_shrn_iscd'] for c in candidates])
+
+        # ✅ [조건 4] 거래대금(trade_amt)이 가장 큰 순서로 정렬 (내림차순)
+        filtered.sort(key=lambda x: x['trade_amt'], reverse=True)
+        return filtered[:self.settings.MAX_STOCKS]
+
+    def split_limit(self, balance):
+        """1회 분할 매수 한도액 (종목당 할당금 / 분할 횟수)"""
+        s = self.settings
+        return int(int(self.budget(balance) / s.MAX_STOCKS) / s.SPLIT_BUY_CNT)
+
+    def _select_targets(self):
+        """후보 + 예산 심사로 target_stocks 확정. 실패하면 1분 뒤 재시도"""
+        s = self.settings
+        bot = self.bot
+        print("🎯 [Targeting] 종가베팅 종목 선정 및 예산 심사 시작...")
+
+        # 1. 일단 조건 만족하는 모든 후보를 가져옴 (3개 제한 없음)
+        #    대기 시간에 추적해둔 최신 판정이 있으면 API 호출 없이 사용, 없으면(오래됨/추적 전) 지금 다시 판정
+        all_candidates = self.tracker.ranked() if self.tracker.is_ready() else None
+        if not all_candidates:
+            all_candidates = self.get_targets()
+
+        if not all_candidates:
+            print("❌ 조건 만족 종목 없음")
+            self.next_select_time = time.time() + 60
+            return
+
+        # 2. 자금 계산 (대기 시간에 받아둔 잔고가 2분 이내면 재사용)
+        balance = bot.account.balance(max_age=120)
+
+        # 예수금이 너무 적으면 진행 불가
+        if balance < 100000: # 최소 10만원은 있어야 함
+            print("❌ 예수금 부족으로 매수 포기")
+            self.next_select_time = time.time() + 60
+            return
+
+        # 종목당 총 할당금 (예: 100만원 / 3 = 33만원)
+        self.invest_per_stock = int(self.budget(balance) / s.MAX_STOCKS)
+
+        # 1회 분할 매수 한도액 (예: 33만원 / 3분할 = 11만원)
+        split_limit = self.split_limit(balance)
+
+        print(f"💰 [{self.name}] 종목당 할당: {self.invest_per_stock:,}원 (1회 분할한도: {split_limit:,}원)")
+
+        # 3. 예산 심사 (비싼 종목 거르고 다음 순위 픽업)
+        final_picks = []
+        for stock in all_candidates:
+            # 목표 개수(3개) 다 채웠으면 중단
+            if len(final_picks) >= s.MAX_STOCKS:
+                break
+
+            # 🚨 [핵심] 가격 조건 심사
+            # "주가가 1회 분할한도보다 비싼가?"
+            if stock['price'] > split_limit:
+                print(f"⏩ [PASS] {stock['name']} ({stock['price']:,}원) -> 분할한도 초과로 제외 (다음 순위 검색)")
+                continue # 이거 안 사고 다음 종목으로 넘어감
+
+            final_picks.append(stock)
+
+        # 4. 최종 확정
+        if not final_picks:
+            print("❌ 모든 후보가 예산 초과로 매수 불가")
+            self.next_select_time = time.time() + 60
+            return
+
+        self.target_stocks = final_picks
+        self.publish_candidates()
+        msg = "🎯 [종가베팅 최종 선정]\n"
+        for t in self.target_stocks:
+            msg += f"- {t['name']} ({t['price']:,}원)\n"
+            # 🕯️ 장 후반 흐름 (대기 시간에 관측한 시세로 만든 5분봉 — 선정 규칙 'fade'가 본 1분봉 밀림의 참고 표시)
+            bars = bot.bars.summary(t['code'])
+            if bars:
+                print(f"🕯️ [{t['name']}] {bars}")
+        self.bot.notify(msg)
+
+        # 5. 분할 매수 집행기 준비 (도착가 = 지금 1매도호가)
+        self.executor = execution.SplitBuyExecutor(
+            bot, self.name, config.JONGGA_BUY_MINUTE, s.SPLIT_BUY_CNT, schedule=s.EXEC_SCHEDULE)
+        for t in self.target_stocks:
+            quote = bot.market.quote(t['code'], t['name'], max_age=0.5)
+            if quote:
+                self.executor.add(t['code'], t['name'], self.invest_per_stock, quote)
+
+    # ------------------------------------------------------------------
+    # 🏃 매수 (15:00 ~ 15:20)
+    # ------------------------------------------------------------------
+    def on_tick(self, now):
+        bot = self.bot
+
+        # ⏱️ 매수 시작 1초 전이면 서버 시각 15:15:00에 맞춰 깨어나 바로 1회차 진행
+        buy_start = now.replace(hour=config.JONGGA_BUY_HOUR, minute=config.JONGGA_BUY_MINUTE, second=0, microsecond=0)
+        if 0 < (buy_start - now).total_seconds() <= 1.0 and bot.is_buy_active:
+            now = bot.clock.sleep_until(buy_start, label=f"{self.name} 매수 시작")
+
+        if now.hour == config.JONGGA_START_HOUR and now.minute < config.JONGGA_BUY_MINUTE:
+            if now.second == 0 and self.last_wait_log != now.minute:
+                self.last_wait_log = now.minute
+                print(f"⏳ [{now.strftime('%H:%M:%S')}] 매수 대기 중...")
+
+            # 🎯 대기 시간에 후보/잔고를 미리 준비 (매수 시각에는 API 호출 없이 바로 주문)
+            if bot.is_buy_active and not self.target_stocks:
+                balance = bot.account.balance(max_age=60)
+                if balance:
+                    self.filter.split_limit = self.split_limit(balance)  # 분할한도 초과 종목은 상세조회 생략
+                if self.tracker.poll():
+                    self._log_scan()
+                    self.publish_candidates()
+            return
+
+        # 📊 종가 단일가(15:30)까지 끝난 뒤 집행 결과 보고
+        if (now.hour == config.JONGGA_BUY_HOUR and now.minute >= 31
+                and self.executor and not self.executor.reported):
+            self.executor.report()
+            return
+
+        if not (now.hour == config.JONGGA_BUY_HOUR and config.JONGGA_BUY_MINUTE <= now.minute < 20):
+            return
+        if now.minute == 19 and now.second >= 50:
+            return
+
+        # [A] 종목 선정 (아직 안 했으면 최초 1회 실행)
+        if not self.target_stocks:
+            if time.time() < self.next_select_time:
+                return
+            self._select_targets()
+            if not self.target_stocks:
+                return
+
+        # [B] 분할 매수 집행 (스케줄 목표 금액만큼 호가 잔량 안에서 주문, 미체결은 정정)
+        if time.time() < self.next_split_time:
+            return
+        if self.executor:
+            self.executor.step(now)
+        self.next_split_time = time.time() + 2
+
+    # ------------------------------------------------------------------
+    # 📉 보유 종목 관리 (익일 09:00 ~ 10:00)
+    # ------------------------------------------------------------------
+    def before_manage(self, now):
+        # ⏰ [타임컷] 10:00 이 전략 보유분 전량 매도 (실패 시 1분 뒤 재시도)
+        if now.hour == config.TIME_CUT_HOUR:
+            if time.time() - self.last_time_cut >= 60:
+                self.last_time_cut = time.time()
+                positions = self.positions()
+                if positions:
+                    self.bot.notify(f"⏰ [{self.bot.mode}] 장 마감 전량 청산 ({self.name})")
+                    self.bot.liquidator.liquidate(positions, "장 마감(Time-Cut)")
+            return True
+        return False
+
+    def manage_position(self, pos, quote, now, real_holdings):
+        s = self.settings
+        bot = self.bot
+        code = pos.code
+
+        cur_price = quote['price']
+        buy_price = pos.buy_price
+        profit_rate = (cur_price - buy_price) / buy_price
+
+        # ========================================================
+        # 🕒 [시간 체크] 장 초반 (09:00 ~ 09:03) 여부 확인
+        # ========================================================
+        is_early_morning = (now.hour == 9 and now.minute < 3)
+
+        # 🚨 [VI 감지] 09:01까지 거래량 없으면 VI로 간주하고 대기
+        if now.hour == 9 and now.minute <= 1:
+            if quote['acml_vol'] == 0:
+                return
+
+        # 📉 [갭하락 칼손절] 장 시작 직후 (-2% 이하 출발 시)
+        if now.hour == 9 and now.minute < 5:
+            if profit_rate <= s.GAP_DOWN_PANIC:
+                if is_early_morning:
+                    # 3분간은 로그만 찍고 매도는 참음
+                    if now.second % 10 == 0:
+                        log_pipeline.print_repeat(f"🛡️ [손절유예] {pos.name} 갭하락({profit_rate*100:.2f}%) 발생했으나 09:03까지 대기")
+                else:
+                    # 3분이 지났는데도 회복 못했으면 매도
+                    bot.sell_stock(code, f"📉갭하락 칼손절({profit_rate*100:.2f}%)")
+                    return
+
+        # 🛡️ 일반 손절 (-2%)
+        if profit_rate <= s.STOP_LOSS_RATE:
+            if is_early_morning:
+                if now.second % 10 == 0:
+                    log_pipeline.print_repeat(f"🛡️ [손절유예] {pos.name} 손절가({profit_rate*100:.2f}%) 도달했으나 09:03까지 대기")
+            else:
+                # 3분이 지났으면 얄짤없이 손절
+                bot.sell_stock(code, f"💧손절({profit_rate*100:.2f}%)")
+                return
+
+        # 절반 익절 (+2%)
+        if not pos.has_partial_sold and profit_rate >= s.PARTIAL_PROFIT_RATE:
+            # 주문가능수량 확인
+            real_stock = real_holdings.get(code) if real_holdings else None
+
+            # ✅ 기준 수량은 봇 기록이 아니라 실잔고
+            if real_stock:
+                total_real_qty = real_stock['qty']
+                sell_qty = int(total_real_qty * s.PARTIAL_SELL_RATIO)
+
+                # 주문 가능 수량이 충분한지 체크
+                if real_stock['ord_psbl'] >= sell_qty and sell_qty > 0:
+                    # 봇 수량을 실잔고(수동합산분 포함)로 맞춘 뒤 청산 집행기로 일부만 매도
+                    # (중복 방지/기록/알림은 집행기가, 남은 수량·has_partial_sold 갱신도 집행기가 처리)
+                    if pos.qty != total_real_qty:
+                        bot.portfolio.update(code, qty=total_real_qty)
+                    bot.liquidator.liquidate([code], f"💰부분익절({profit_rate*100:.2f}%)", qty={code: sell_qty})
+            else:
+                print(f"⚠️ [매도스킵] {pos.name} 잔고 정보 확인 불가")
+
+        # 🎢 [트레일링 스탑] +4% 이상 갔다가 고점대비 1% 빠지면
+        max_p = pos.max_profit_rate
+        if profit_rate > max_p:
+            bot.portfolio.update(code, max_profit_rate=profit_rate)
+            max_p = profit_rate
+
+        if max_p >= s.TS_TRIGGER_RATE:
+            if profit_rate <= (max_p - s.TS_STOP_GAP):
+                bot.sell_stock(code, f"🎢TS익절(최고 {max_p*100:.1f}% -> 현재 {profit_rate*100:.1f}%)")
+
+
+# 전략 이름 → 클래스 (BotConfig.STRATEGY_WEIGHTS 키로 켜고 끔)
+REGISTRY = {
+    JonggaStrategy.name: JonggaStrategy,
+}
+
+
+def build_strategies(bot, weights):
+    """weights: {전략 이름: 예산 비중}. 등록된 순서대로 전략 인스턴스를 만듭니다."""
+    strategies = []
+    for name, weight in weights.items():
+        cls = REGISTRY.get(name)
+        if cls is None:
+            print(f"⚠️ 알 수 없는 전략 '{name}' — 건너뜀")
+            continue
+        strategies.append(cls(bot, weight))
+    return strategies
@@ -1,26 +1,185 @@
 # telegram_notifier.py
 
+import atexit
 import requests
 import time
+import queue
+import threading
 import config
 
+# ==============================================================================
+# ⚙️ 전송 설정
+# ==============================================================================
+MAX_QUEUE_SIZE = 200        # 대기열 최대 길이 (넘치면 가장 오래된 메시지부터 버림)
+COALESCE_WINDOW = 1.0       # 첫 메시지 이후 이 시간(초) 동안 들어온 메시지는 한 번에 묶어서 전송
+MAX_MESSAGE_LEN = 4000      # 텔레그램 제한(4096자)보다 약간 작게
+MIN_SEND_INTERVAL = 1.0     # 같은 채팅방 초당 1건 제한 준수
+REQUEST_TIMEOUT = 10        # POST 타임아웃(초)
+MAX_RETRY = 5               # 전송 실패 시 재시도 횟수
+BACKOFF_BASE = 1.0          # 재시도 대기 시작값(초), 실패마다 2배
+BACKOFF_MAX = 30.0          # 재시도 대기 상한(초)
+
+_queue = queue.Queue(maxsize=MAX_QUEUE_SIZE)
+_worker = None
+_worker_lock = threading.Lock()
+_dropped_count = 0
+_dropped_lock = threading.Lock()
+
 # ==============================================================================
 # 📞 텔레그램 알림 함수
 # ==============================================================================
 
 def send_telegram_message(message):
-    """텔레그램 봇으로 메시지를 전송하는 함수"""
+    """
+    텔레그램 메시지를 전송 대기열에 넣고 즉시 반환합니다. (매매 스레드를 절대 막지 않음)
+    실제 전송은 백그라운드 스레드가 묶음 처리/재시도하며 담당합니다.
+    :return: 대기열 등록 성공 여부
+    """
+    _ensure_worker()
+
+    try:
+        _queue.put_nowait(str(message))
+        return True
+    except queue.Full:
+        pass
+
+    # 대기열이 꽉 찼으면 가장 오래된 메시지를 버리고 최신 메시지를 살림
+    try:
+        _queue.get_nowait()
+        _queue.task_done()      # 버린 메시지도 처리 완료로 (안 하면 flush()가 끝나지 않음)
+        _count_dropped()
+    except queue.Empty:
+        pass
+    try:
+        _queue.put_nowait(str(message))
+        return True
+    except queue.Full:
+        _count_dropped()
+        return False
+
+def _count_dropped():
+    global _dropped_count
+    with _dropped_lock:
+        _dropped_count += 1
+
+def flush(timeout=10):
+    """대기열이 빌 때까지 최대 timeout초 기다립니다. (프로세스 종료 시 atexit으로 호출 — 마지막 알림 유실 방지)"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if _queue.unfinished_tasks == 0:
+            return True
+        time.sleep(0.1)
+    return False
+
+# ==============================================================================
+# 🧵 백그라운드 전송 스레드
+# ==============================================================================
+
+def _ensure_worker():
+    global _worker
+    if _worker is not None and _worker.is_alive():
+        return
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_worker_loop, name="telegram-notifier", daemon=True)
+            _worker.start()
+            atexit.register(flush)
+
+def _worker_loop():
+    global _dropped_count
+    last_sent = 0.0
+
+    while True:
+        first = _queue.get()
+        batch = [first]
+        taken = 1
+
+        # 1. 짧은 시간 안에 몰려온 메시지는 한 건으로 합치기
+        size = len(first)
+        deadline = time.time() + COALESCE_WINDOW
+        while size < MAX_MESSAGE_LEN:
+            remain = deadline - time.time()
+            if remain <= 0:
+                break
+            try:
+                nxt = _queue.get(timeout=remain)
+            except queue.Empty:
+                break
+            taken += 1
+            batch.append(nxt)
+            size += len(nxt) + 2
+
+        with _dropped_lock:
+            dropped, _dropped_count = _dropped_count, 0
+        if dropped > 0:
+            batch.append(f"⚠️ 알림 대기열 초과로 {dropped}건 누락")
+
+        # 2. 전송 간격 제한 준수 (기존 TIME_SLEEP 설정이 더 길면 그 값을 따름)
+        interval = max(MIN_SEND_INTERVAL, getattr(config, 'TIME_SLEEP', 0))
+        for chunk in _split_chunks(batch):
+            wait = interval - (time.time() - last_sent)
+            if wait > 0:
+                time.sleep(wait)
+            _post_with_retry(chunk)
+            last_sent = time.time()
+
+        for _ in range(taken):
+            _queue.task_done()
+
+def _split_chunks(messages):
+    """여러 메시지를 텔레그램 길이 제한에 맞는 덩어리로 묶습니다."""
+    chunks = []
+    current = ""
+    for msg in messages:
+        while len(msg) > MAX_MESSAGE_LEN:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(msg[:MAX_MESSAGE_LEN])
+            msg = msg[MAX_MESSAGE_LEN:]
+        if current and len(current) + len(msg) + 2 > MAX_MESSAGE_LEN:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n\n{msg}" if current else msg
+    if current:
+        chunks.append(current)
+    return chunks
+
+def _post_with_retry(text):
+    """429(속도제한)는 retry_after만큼, 그 외 오류는 지수 백오프로 재시도합니다."""
     url = f"https://api.telegram.org/bot{config.TELEGRAM_BOT_TOKEN}/sendMessage"
     payload = {
         'chat_id': config.TELEGRAM_CHAT_ID,
-        'text': message,
+        'text': text,
         'parse_mode': 'Markdown'
     }
-    try:
-        response = requests.post(url, data=payload)
-        response.raise_for_status() 
-        time.sleep(config.TIME_SLEEP)
-        return True
-    except Exception as e:
-        print(f"[텔레그램] 메시지 전송 실패: {e}")
-        return False
\ No newline at end of file
+    backoff = BACKOFF_BASE
+
+    for attempt in range(1, MAX_RETRY + 1):
+        try:
+            response = requests.post(url, data=payload, timeout=REQUEST_TIMEOUT)
+
+            if response.status_code == 429:
+                retry_after = 0
+                try:
+                    retry_after = int(response.json().get('parameters', {}).get('retry_after', 0))
+                except Exception:
+                    pass
+                time.sleep(max(retry_after, backoff))
+                backoff = min(backoff * 2, BACKOFF_MAX)
+                continue
+
+            # 마크다운 파싱 실패(종목명의 _, * 등)는 일반 텍스트로 재전송
+            if response.status_code == 400 and 'parse_mode' in payload:
+                payload.pop('parse_mode')
+                continue
+
+            response.raise_for_status()
+            return True
+        except Exception as e:
+            print(f"[텔레그램] 메시지 전송 실패 ({attempt}/{MAX_RETRY}): {e}")
+            if attempt < MAX_RETRY:
+                time.sleep(backoff)
+                backoff = min(backoff * 2, BACKOFF_MAX)
+
+    return False
@@ -0,0 +1,92 @@
+# test_analytics.py
+import math
+
+import trade_analytics
+
+# =========================================================
+# 📊 [점검] 라운드트립 묶기 (분할 매수 + 부분/전량 매도)
+#    python3 test_analytics.py   (DB 없음 — 메모리 기록으로 TradeAnalytics.update()를 그대로 돌림)
+# =========================================================
+
+
+class FakeStore:
+    """TradeStore.query(table, after_id=...)만 흉내 (id는 테이블별 증가)"""
+
+    def __init__(self):
+        self.rows = {"buys": [], "sells": []}
+
+    def buy(self, time, code, qty, price, level=1):
+        self._add("buys", {"time": time, "code": code, "name": code, "strategy": "JONGGA",
+                           "level": level, "buy_price": price, "qty": qty, "pg_amt": 0, "gap": 0, "leader": ""})
+
+    def sell(self, time, code, qty, price, avg_price, reason="익절", max_price=0, min_price=0):
+        self._add("sells", {"time": time, "code": code, "name": code, "strategy": "JONGGA", "reason": reason,
+                            "buy_price": avg_price, "sell_price": price, "qty": qty, "profit_rate": 0,
+                            "hold_min": 0, "max_price": max_price, "min_price": min_price,
+                            "entry_pg": 0, "max_pg": 0, "exit_pg": 0})
+
+    def _add(self, table, row):
+        row["id"] = len(self.rows[table]) + 1
+        self.rows[table].append(row)
+
+    def query(self, table, after_id=None, **_):
+        return [r for r in self.rows[table] if r["id"] > (after_id or 0)]
+
+
+def close(a, b):
+    return math.isclose(float(a), float(b), rel_tol=1e-9)
+
+
+def run():
+    store = FakeStore()
+    engine = trade_analytics.TradeAnalytics(store)
+
+    # 1) 분할 매수 10+10 → 10주씩 두 번 매도 = 라운드트립 하나 (두 번째 매도가 빠지면 안 됨)
+    store.buy("2026-01-05 15:16:00", "A", 10, 1000, level=1)
+    store.buy("2026-01-05 15:17:00", "A", 10, 1000, level=2)
+    store.sell("2026-01-06 09:05:00", "A", 10, 1100, 1000, reason="부분익절", max_price=1120)
+    assert engine.update() == 0, "부분 매도에서 라운드트립이 닫힘"
+    store.sell("2026-01-06 10:00:00", "A", 10, 1050, 1000, reason="TS익절", min_price=990)
+    assert engine.update() == 1
+    t = engine.trips.iloc[-1]
+    assert (t["qty"], t["splits"], t["reason"]) == (20, 2, "TS익절"), t
+    assert close(t["exit_price"], 1075) and close(t["pnl"], 1000 + 500), t
+    assert close(t["mfe"], 12) and close(t["mae"], -1), t
+    print("✅ 부분 매도 + 나머지 매도 → 라운드트립 1건 (청산가 수량 가중, 손익 합산)")
+
+    # 2) 같은 update() 안에서 매수 → 부분 매도 → 추가 매수 → 전량 매도
+    store.buy("2026-01-07 15:16:00", "B", 6, 2000)
+    store.sell("2026-01-08 09:10:00", "B", 3, 2200, 2000)
+    store.buy("2026-01-08 15:16:00", "B", 3, 2100, level=2)
+    store.sell("2026-01-09 09:10:00", "B", 6, 2300, 2050)
+    assert engine.update() == 1
+    t = engine.trips.iloc[-1]
+    assert (t["qty"], t["splits"]) == (9, 2), t
+    assert close(t["exit_price"], (3 * 2200 + 6 * 2300) / 9) and close(t["entry_price"], 2050), t
+    print("✅ 부분 매도 사이에 추가 매수 → 보유 0이 될 때 닫힘")
+
+    # 3) 매수 기록 없는 매도(수동 보유분)는 버리고, 뒤따르는 새 라운드트립에 섞이지 않음
+    store.sell("2026-01-09 09:20:00", "C", 5, 500, 480)
+    store.buy("2026-01-09 15:16:00", "C", 4, 510)
+    store.sell("2026-01-10 09:05:00", "C", 4, 520, 510)
+    assert engine.update() == 1
+    t = engine.trips.iloc[-1]
+    assert t["qty"] == 4 and close(t["pnl"], 40), t
+    print("✅ 매수 기록 없는 매도 무시")
+
+    # 4) 수량 없는 예전 매도 기록 → 남은 수량 전부로 봄
+    store.buy("2026-01-12 15:16:00", "D", 7, 300)
+    store.sell("2026-01-13 09:05:00", "D", None, 330, 300)
+    assert engine.update() == 1
+    assert engine.trips.iloc[-1]["qty"] == 7
+    print("✅ 수량 없는 매도 = 전량")
+
+    assert engine._open_buys.empty and engine._open_sells.empty
+    by_day = engine.daily()
+    assert len(by_day) == 4 and close(by_day["pnl"].sum(), 1500 + engine.trips.iloc[1]["pnl"] + 40 + 210)
+    print(f"✅ 일자별 집계 ({len(engine.trips)}건)")
+
+
+if __name__ == "__main__":
+    run()
+    print("🎉 라운드트립 점검 통과")
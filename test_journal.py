@@ -0,0 +1,157 @@
+# test_journal.py
+import datetime
+import json
+import os
+import shutil
+import tempfile
+
+import portfolio as portfolio_model
+import state_journal
+
+# =========================================================
+# 📒 [점검] 상태 저널 재생 / 스냅샷 / 압축 복구
+#    python3 test_journal.py   (API 호출 없음 — 임시 폴더에 저널을 쓰고 다시 읽어 비교)
+# =========================================================
+
+
+class FakeBot:
+    """TradingBot의 상태 부분만 (같은 _export_state 모양, 같은 저널 기록 방식)"""
+
+    def __init__(self, journal):
+        self.journal = journal
+        self.portfolio = portfolio_model.Portfolio(journal=journal)
+        self.buy_progress = {}
+        self.buy_spent = {}
+        self.today_blacklist = set()
+        self.position_tags = {}
+
+    def export_state(self):
+        return {
+            'day': self.day,
+            'portfolio': self.portfolio.to_state(),
+            'buy_progress': dict(self.buy_progress),
+            'buy_spent': dict(self.buy_spent),
+            'today_blacklist': list(self.today_blacklist),
+            'position_tags': dict(self.position_tags),
+        }
+
+    day = datetime.date.today().isoformat()
+
+    # 봇이 하는 기록을 그대로 흉내
+    def buy(self, code, name, qty, price, strategy="JONGGA"):
+        self.position_tags[code] = strategy
+        self.journal.record('tag', code, strategy=strategy)
+        self.buy_progress[code] = self.buy_progress.get(code, 0) + 1
+        self.buy_spent[code] = self.buy_spent.get(code, 0) + qty * price
+        self.journal.record('progress', code, count=self.buy_progress[code], money=self.buy_spent[code])
+        # 잔고 동기화로 등록되면 태그는 빠짐 (apply_op의 pos_set과 같음)
+        self.position_tags.pop(code, None)
+        self.portfolio.set(portfolio_model.Position(code, name, qty, price, strategy=strategy,
+                                                    buy_time=datetime.datetime(2026, 1, 5, 15, 16)))
+
+    def sell(self, code):
+        self.portfolio.remove(code)
+        self.today_blacklist.add(code)
+        self.journal.record('blacklist_add', code)
+
+
+def normalize(state):
+    """JSON 왕복 + 순서 무관 비교용 (블랙리스트는 집합)"""
+    state = json.loads(json.dumps(state, ensure_ascii=False, default=str))
+    state['today_blacklist'] = sorted(state['today_blacklist'])
+    return state
+
+
+def check(label, journal_dir, expected):
+    loaded = state_journal.StateJournal(f"{journal_dir}/snapshot.json", f"{journal_dir}/journal.log").load()
+    got, want = normalize(loaded), normalize(expected)
+    if got != want:
+        for key in want:
+            if got.get(key) != want[key]:
+                print(f"   {key}: 복구 {got.get(key)}\n   {' ' * len(key)}  기대 {want[key]}")
+        raise AssertionError(f"{label}: 복구 상태 불일치")
+    print(f"✅ {label}")
+
+
+def run(tmp):
+    d = f"{tmp}/state"
+    journal = state_journal.StateJournal(f"{d}/snapshot.json", f"{d}/journal.log")
+    bot = FakeBot(journal)
+
+    # 1) 스냅샷 없이 저널만으로 복구 (pos_set / pos_update / pos_del / progress / tag / blacklist)
+    journal.record('daily_reset', day=bot.day)
+    bot.buy("005930", "삼성전자", 10, 71500)
+    bot.buy("000660", "SK하이닉스", 3, 182000)
+    bot.buy("035420", "NAVER", 5, 201000)
+    bot.portfolio.update("005930", qty=15, buy_price=71200)
+    bot.portfolio.update("000660", max_profit_rate=0.034, has_partial_sold=True)
+    bot.sell("035420")
+    bot.position_tags["068270"] = "JONGGA"          # 주문만 나가고 아직 잔고에 없는 종목
+    journal.record('tag', "068270", strategy="JONGGA")
+    check("저널만으로 재생", d, bot.export_state())
+
+    # 2) 스냅샷 + 이후 저널 재생
+    journal.snapshot(bot.export_state)
+    bot.portfolio.update("005930", max_profit_rate=0.021)
+    bot.buy("068270", "셀트리온", 7, 178000)
+    bot.sell("000660")
+    check("스냅샷 + 이후 저널", d, bot.export_state())
+
+    # 3) kill -9로 저널 마지막 줄이 잘림 → 잘린 줄만 버리고 그 앞까지 복구
+    before_cut = bot.export_state()
+    bot.portfolio.update("068270", qty=9)
+    journal.close()
+    with open(f"{d}/journal.log", 'rb+') as f:
+        f.seek(-7, os.SEEK_END)
+        f.truncate()
+    check("잘린 마지막 줄 무시", d, before_cut)
+
+    # 재시작: 봇은 복구한 상태로 바로 스냅샷을 남김 (TradingBot._restore_state — 잘린 줄이 있는 저널은 여기서 비워짐)
+    bot.portfolio.journal = None
+    bot.portfolio.update("068270", qty=7)           # 잘려서 사라진 기록은 메모리에서도 되돌림
+    journal = state_journal.StateJournal(f"{d}/snapshot.json", f"{d}/journal.log")
+    journal.load()
+    journal.snapshot(bot.export_state)
+    bot.journal = bot.portfolio.journal = journal
+
+    # 4) 압축 도중 죽음: 스냅샷은 교체됐는데 저널은 아직 안 비워짐 → 스냅샷 seq 이하 기록은 건너뜀
+    bot.portfolio.update("005930", qty=20)
+    bot.buy_progress["005930"] = 2
+    bot.buy_spent["005930"] += 5 * 71000
+    journal.record('progress', "005930", count=2, money=bot.buy_spent["005930"])
+    stale = open(f"{d}/journal.log", encoding='utf-8').read()
+    journal.snapshot(bot.export_state)
+    with open(f"{d}/journal.log", 'w', encoding='utf-8') as f:
+        f.write(stale)                              # 비워지기 전 저널이 그대로 남은 상황
+    check("압축 중단 후 중복 재생 없음", d, bot.export_state())
+    again = state_journal.StateJournal(f"{d}/snapshot.json", f"{d}/journal.log")
+    again.load()
+    assert again._lines_since_snapshot == 0, "스냅샷에 반영된 저널이 다시 재생됨"
+
+    # 5) 압축 후 계속 기록 → 새 스냅샷 + 새 저널만으로 복구
+    journal = state_journal.StateJournal(f"{d}/snapshot.json", f"{d}/journal.log")
+    journal.load()
+    bot.journal = bot.portfolio.journal = journal
+    journal.snapshot(bot.export_state)
+    bot.portfolio.remove("005930")
+    journal.record('daily_reset', day="2026-01-06")
+    bot.day, bot.buy_progress, bot.buy_spent, bot.today_blacklist = "2026-01-06", {}, {}, set()
+    check("압축 후 추가 기록", d, bot.export_state())
+
+    # 6) Position 복원까지 (TradingBot._restore_state와 같은 경로)
+    state = state_journal.StateJournal(f"{d}/snapshot.json", f"{d}/journal.log").load()
+    restored = {c: portfolio_model.Position.from_state(c, v) for c, v in state['portfolio'].items()}
+    for code, pos in bot.portfolio.snapshot().items():
+        r = restored[code]
+        assert (r.qty, r.buy_price, r.max_profit_rate, r.has_partial_sold, r.buy_time, r.strategy) == \
+               (pos.qty, pos.buy_price, pos.max_profit_rate, pos.has_partial_sold, pos.buy_time, pos.strategy), code
+    print(f"✅ Position 복원 ({len(restored)}종목)")
+
+
+if __name__ == "__main__":
+    tmp = tempfile.mkdtemp(prefix="jongga_journal_")
+    try:
+        run(tmp)
+        print("🎉 상태 저널 점검 통과")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
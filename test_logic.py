@@ -2,13 +2,24 @@ import time
 import sys
 import logging
 from jongga_bot import KisApi, BotConfig  # 기존 봇 파일에서 클래스 임포트
+import quote_board
+import instrument_master
+import selection_filter
 
 # ==========================================
 # ⚙️ 검증 설정 (사용자가 요청한 기준 강제 적용)
 # ==========================================
 TEST_MIN_RATE = 10.0      # 시가 대비 상승률 10% 이상
 TEST_MIN_WICK = 0.1       # 윗꼬리 10% 이상
-TEST_MAX_WICK = 0.3       # 윗꼬리 30% 이하
+TEST_MAX_WICK = 0.3       # 윗꼬리 30% 미만 (봇과 같은 기준)
+
+
+class TestConfig(BotConfig):
+    """봇 설정에 검증 기준만 덮어씀"""
+    MIN_RATE = TEST_MIN_RATE
+    MIN_WICK = TEST_MIN_WICK
+    MAX_WICK = TEST_MAX_WICK
+
 
 def verify_selection_logic():
     print("=" * 80)
@@ -16,11 +27,18 @@ def verify_selection_logic():
     print(f"   👉 기준: 시가대비상승 {TEST_MIN_RATE}%↑ / 윗꼬리 {TEST_MIN_WICK}~{TEST_MAX_WICK}")
     print("=" * 80)
 
-    api = KisApi()
-    
-    # 1. 조건검색식 종목 가져오기
-    print("📡 [1단계] 조건검색식 'jongga' 조회 중...")
-    candidates = api.fetch_condition_stocks("jongga")
+    # 1. 조건검색식 종목 가져오기 (봇이 실행 중이면 게시판에서 — API 호출 없음)
+    board = quote_board.attach()
+    candidates = board.condition_rows() if board else []
+    from_board = bool(candidates)
+    if from_board:
+        print("🪧 [1단계] 실행 중인 봇의 게시판에서 후보 읽음 (API 호출 없음)")
+        fetch_detail = board.quote
+    else:
+        print("📡 [1단계] 조건검색식 'jongga' 조회 중...")
+        api = KisApi()
+        candidates = api.fetch_condition_stocks("jongga")
+        fetch_detail = api.fetch_price_detail
     
     if not candidates:
         print("❌ 조건검색 결과가 없습니다. (장 시간이 아니거나 조건식 문제)")
@@ -29,6 +47,8 @@ def verify_selection_logic():
     print(f"   ✅ 검색된 후보 개수: {len(candidates)}개\n")
 
     passed_stocks = []
+    instrument_master.get_master().ensure_fresh()  # 종목 유형 판정용 (조회 시에는 다운로드하지 않음)
+    pipeline = selection_filter.FilterPipeline(TestConfig)
 
     # 2. 상세 분석 및 필터링
     print(f"📡 [2단계] 후보 종목 상세 분석 시작...")
@@ -39,66 +59,28 @@ def verify_selection_logic():
     for stock in candidates:
         code = stock['stck_shrn_iscd']
         name = stock['hts_kor_isnm']
-        
-        # 제외 종목 필터 (간략화)
-        if name.endswith("우") or "스팩" in name: 
-            continue
 
-        info = api.fetch_price_detail(code, name)
-        if not info: continue
+        # 봇과 같은 규칙 (종목 유형 → 시세 조회 → 상승률/윗꼬리/양봉/상한가/수급)
+        verdict = pipeline.check(code, name, fetch_detail)
+        if verdict.rule in ('type', selection_filter.NO_QUOTE):
+            continue
+        info = verdict.info
 
-        # ------------------------------------------------------------------
-        # 🔍 검증 로직 (봇 로직과 동일하게 구현)
-        # ------------------------------------------------------------------
-        
-        # [데이터 추출]
+        # [계산] 시가 대비 상승률 / 윗꼬리 비율 / 거래대금 (현재가 * 거래량 추정치)
         current_price = info['price']
-        open_price = info['open']
-        high_price = info['high']
-        low_price = info['low']
-        
-        # [계산 1] 시가 대비 상승률
-        if open_price > 0:
-            rate_from_open = ((current_price - open_price) / open_price) * 100
-        else:
-            rate_from_open = 0.0
-
-        # [계산 2] 윗꼬리 비율 (고가-저가 기준)
-        wick_ratio = 0.0
-        if high_price > low_price:
-            upper_wick = high_price - max(current_price, open_price)
-            total_candle = high_price - low_price
-            wick_ratio = upper_wick / total_candle
-
-        # [계산 3] 거래대금 (현재가 * 거래량 추정치)
-        # ※ KisApi 수정 없이 현재 코드를 쓴다고 했으므로 info['acml_vol'] 사용
+        rate_from_open = selection_filter.rate_from_open(info) or 0.0
+        wick_ratio = info['wick_ratio']
         est_trade_amt = current_price * info['acml_vol']
 
-        # ------------------------------------------------------------------
-        # 🛑 필터링 판정
-        # ------------------------------------------------------------------
-        status = "✅통과"
-        fail_reason = ""
-
-        # 1. 시가 대비 10% 상승 미만 탈락
-        if rate_from_open < TEST_MIN_RATE:
-            status = "❌탈락"
-            fail_reason = f"(상승률부족 {rate_from_open:.1f}%)"
-        
-        # 2. 음봉 탈락
-        elif current_price <= open_price:
-            status = "❌탈락"
-            fail_reason = "(음봉)"
-            
-        # 3. 윗꼬리 범위(0.1 ~ 0.3) 벗어나면 탈락
-        elif not (TEST_MIN_WICK <= wick_ratio <= TEST_MAX_WICK):
-            status = "❌탈락"
-            fail_reason = f"(윗꼬리 {wick_ratio:.2f})"
+        if verdict.passed:
+            status, fail_reason = "✅통과", ""
+        else:
+            status, fail_reason = "❌탈락", f"({selection_filter.LABELS[verdict.rule]}: {verdict.detail})"
 
         # 출력
         print(f"{name:<10} | {current_price:>8,} | {rate_from_open:>8.1f}% | {wick_ratio:>6.2f} | {est_trade_amt:>15,} | {status} {fail_reason}")
 
-        if status == "✅통과":
+        if verdict.passed:
             passed_stocks.append({
                 'name': name,
                 'price': current_price,
@@ -107,10 +89,13 @@ def verify_selection_logic():
                 'trade_amt': est_trade_amt
             })
         
-        time.sleep(0.1) # API 부하 방지
+        if not from_board:
+            time.sleep(0.1) # API 부하 방지
 
-    # 3. 최종 순위 선정
     print("-" * 80)
+    print(f"🧮 규칙별 집계: {selection_filter.format_stats(pipeline.scan_stats(c['stck_shrn_iscd'] for c in candidates))}")
+
+    # 3. 최종 순위 선정
     print(f"📡 [3단계] 최종 선정 (거래대금 순 정렬)")
     
     if passed_stocks:
@@ -1,7 +1,9 @@
 import requests
 import json
+import time
 import config
 import token_manager
+import quote_board
 
 # ==========================================
 # ⚙️ 설정
@@ -13,14 +15,13 @@ MODE = "REAL"           # 실전투자 서버 사용 (데이터 정확도 위함
 # ==========================================
 # 📡 API 호출 함수 (봇 로직 축소판)
 # ==========================================
-def check_hyundai_wick():
-    print(f"🔍 [{TARGET_NAME}({TARGET_CODE})] 시세 조회 및 윗꼬리 계산 시작...\n")
-
+def fetch_ohlcv_from_api():
+    """KIS 현재가 조회로 (현재가, 시가, 고가, 저가, 거래량). 실패 시 None"""
     # 1. 토큰 발급
     access_token = token_manager.get_access_token(MODE)
     if not access_token:
         print("❌ 토큰 발급 실패")
-        return
+        return None
 
     # 2. 헤더 설정
     base_url = "https://openapi.koreainvestment.com:9443"  # 실전 서버
@@ -40,23 +41,38 @@ def check_hyundai_wick():
         "FID_INPUT_ISCD": TARGET_CODE
     }
 
-    try:
-        res = requests.get(url, headers=headers, params=params)
-        res_json = res.json()
+    res = requests.get(url, headers=headers, params=params)
+    res_json = res.json()
 
-        if res_json['rt_cd'] != '0':
-            print(f"❌ API 호출 실패: {res_json['msg1']}")
-            return
+    if res_json['rt_cd'] != '0':
+        print(f"❌ API 호출 실패: {res_json['msg1']}")
+        return None
+
+    output = res_json['output']
 
-        output = res_json['output']
+    # 4. 데이터 파싱 (OHLCV)
+    # API는 문자열로 주므로 int/float 변환 필수
+    return (int(output['stck_prpr']),   # 현재가(종가)
+            int(output['stck_oprc']),   # 시가
+            int(output['stck_hgpr']),   # 고가
+            int(output['stck_lwpr']),   # 저가
+            int(output['acml_vol']))    # 거래량
 
-        # 4. 데이터 파싱 (OHLCV)
-        # API는 문자열로 주므로 int/float 변환 필수
-        stck_prpr = int(output['stck_prpr'])  # 현재가(종가)
-        stck_oprc = int(output['stck_oprc'])  # 시가
-        stck_hgpr = int(output['stck_hgpr'])  # 고가
-        stck_lwpr = int(output['stck_lwpr'])  # 저가
-        acml_vol  = int(output['acml_vol'])   # 거래량
+def check_hyundai_wick():
+    print(f"🔍 [{TARGET_NAME}({TARGET_CODE})] 시세 조회 및 윗꼬리 계산 시작...\n")
+
+    try:
+        # 봇이 이 종목을 보고 있으면 공유메모리 게시판 시세 사용 (토큰 발급/API 호출 없음)
+        board = quote_board.attach()
+        quote = board.quote(TARGET_CODE) if board else None
+        if quote:
+            print(f"🪧 실행 중인 봇의 게시판 시세 사용 ({time.time() - quote['ts']:.1f}초 전 조회)")
+            ohlcv = (quote['price'], quote['open'], quote['high'], quote['low'], quote['acml_vol'])
+        else:
+            ohlcv = fetch_ohlcv_from_api()
+        if not ohlcv:
+            return
+        stck_prpr, stck_oprc, stck_hgpr, stck_lwpr, acml_vol = ohlcv
 
         print(f"📊 [OHLCV 데이터]")
         print(f" - 현재가(Close): {stck_prpr:,}원")
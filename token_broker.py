@@ -0,0 +1,94 @@
+# token_broker.py
+import json
+import os
+import socket
+import socketserver
+import threading
+
+import token_manager
+
+# ==============================================================================
+# 🔑 토큰 브로커 (유닉스 소켓 — 봇/진단 도구/테스트 스크립트가 토큰 하나를 공유)
+# ==============================================================================
+# 실행: nohup python3 -u token_broker.py > token_broker.log 2>&1 &   (restart_bot.sh가 없으면 띄움)
+# 브로커가 없으면 token_manager는 파일 잠금으로 직접 처리하므로 필수는 아닙니다.
+
+
+class TokenBroker:
+    """key(REAL / MOCK / 'REAL:계좌명')별 토큰을 메모리에 들고 있다가 나눠주고, 재발급은 key마다 한 번씩만"""
+
+    def __init__(self):
+        self.tokens = {}    # key -> {"access_token", "expired_at"}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self.issued = 0
+        self.served = 0
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def get(self, mode, appkey, appsecret, key, revoked=None):
+        """revoked: 요청한 쪽에서 서버가 거절한 토큰 — 들고 있는 토큰이 그것이면 재발급"""
+        info = self.tokens.get(key)
+        if not token_manager._usable(info, revoked):
+            with self._key_lock(key):
+                info = self.tokens.get(key)
+                if not token_manager._usable(info, revoked):
+                    info = token_manager.load_or_issue(mode, appkey, appsecret, key, revoked)
+                    if info is None:
+                        return None
+                    self.tokens[key] = info
+                    self.issued += 1
+        self.served += 1
+        return info
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            req = json.loads(self.rfile.readline())
+            mode = req.get("mode") or "MOCK"
+            info = self.server.broker.get(mode, req.get("appkey"), req.get("appsecret"), req.get("key") or mode,
+                                          req.get("revoked"))
+            res = {"info": {"access_token": info["access_token"], "expired_at": info["expired_at"]}} \
+                if info else {"error": "토큰 발급 실패 (브로커 로그 확인)"}
+        except Exception as e:
+            res = {"error": str(e)}
+        self.wfile.write(json.dumps(res).encode('utf-8') + b"\n")
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def _already_running(path):
+    """소켓 파일이 있으면 실제로 떠 있는 브로커인지 확인 (죽은 브로커가 남긴 파일은 지움)"""
+    if not os.path.exists(path):
+        return False
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+            return True
+        except OSError:
+            os.unlink(path)
+            return False
+
+
+def serve(path=token_manager.BROKER_SOCKET):
+    if _already_running(path):
+        print(f"ℹ️ [토큰 브로커] 이미 실행 중 ({path})")
+        return
+    server = _Server(path, _Handler)
+    os.chmod(path, 0o600)     # 앱키가 오가므로 같은 사용자만
+    server.broker = TokenBroker()
+    print(f"🔑 [토큰 브로커] 시작 ({os.path.abspath(path)})")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    serve()
@@ -1,17 +1,35 @@
 import requests
 import json
 import datetime
+import fcntl
 import os
+import socket
+import threading
+import time
 import config
 
 # 💾 토큰을 저장할 통합 파일명
 TOKEN_FILE = "kis_token.json"
+LOCK_FILE = TOKEN_FILE + ".lock"     # 프로세스 간 발급 직렬화용 (flock)
+BROKER_SOCKET = "kis_token.sock"     # token_broker.py 가 여는 유닉스 소켓
+BROKER_TIMEOUT = 20                  # 브로커 응답 대기(초) — 발급 중이면 그만큼 걸림
+EXPIRY_MARGIN = 60                   # 만료 이 시간(초) 전부터는 재발급
+ISSUE_INTERVAL = 61                  # KIS 토큰 발급은 1분당 1회 (어기면 EGW00133)
+
+_TIME_FMT = "%Y-%m-%d %H:%M:%S"
+
+# 프로세스 안 메모리 캐시 (key -> (토큰, 만료 datetime)) — API 호출마다 파일/소켓을 읽지 않음
+_cache = {}
+_cache_lock = threading.Lock()
+# 서버가 무효/만료로 거절한 토큰 (key -> 토큰) — 파일/브로커에 같은 토큰이 남아 있어도 다시 쓰지 않음
+_revoked = {}
+
 
 def load_token_data():
     """JSON 파일에서 전체 토큰 데이터를 읽어옵니다."""
     if not os.path.exists(TOKEN_FILE):
         return {}
-    
+
     try:
         with open(TOKEN_FILE, 'r', encoding='utf-8') as f:
             return json.load(f)
@@ -19,53 +37,150 @@ def load_token_data():
         return {}
 
 def save_token_data(mode, token, expired_at):
-    """토큰 정보를 JSON 파일에 저장합니다. (기존 데이터 유지)"""
+    """토큰 정보를 JSON 파일에 저장합니다. (기존 데이터 유지, 임시 파일 → 교체로 원자적 기록)"""
     data = load_token_data()
-    
+
     data[mode] = {
         "access_token": token,
-        "expired_at": expired_at
+        "expired_at": expired_at,
+        "issued_at": time.time(),
     }
-    
-    with open(TOKEN_FILE, 'w', encoding='utf-8') as f:
+    _write_token_file(data)
+
+def _write_token_file(data):
+    tmp = f"{TOKEN_FILE}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
         json.dump(data, f, indent=4, ensure_ascii=False)
+    os.replace(tmp, TOKEN_FILE)
+
+def _is_fresh(info):
+    """만료 EXPIRY_MARGIN초 전까지만 재사용 (안전마진)"""
+    expired_at = info and info.get("expired_at")
+    if not expired_at:
+        return False
+    expired_at = datetime.datetime.strptime(expired_at, _TIME_FMT)
+    return datetime.datetime.now() < expired_at - datetime.timedelta(seconds=EXPIRY_MARGIN)
+
+def _remember(key, info):
+    _cache[key] = (info["access_token"], datetime.datetime.strptime(info["expired_at"], _TIME_FMT))
+    _revoked.pop(key, None)
+    return info["access_token"]
 
-def get_access_token(mode="MOCK"):
+def _usable(info, revoked=None):
+    """만료 전이고, 서버가 거절한 토큰이 아님"""
+    return _is_fresh(info) and info.get("access_token") != revoked
+
+def invalidate(token):
+    """
+    서버가 토큰을 거절(EGW00121/EGW00123)했을 때 api_guard가 호출. 그 토큰을 쓰던 캐시를 비우고,
+    다음 get_access_token()이 브로커/파일에 같은 토큰이 있으면 받지 않고 재발급하게 합니다.
+    :return: 비운 key 목록
+    """
+    with _cache_lock:
+        keys = [k for k, (t, _) in _cache.items() if t == token]
+        for k in keys:
+            _cache.pop(k, None)
+            _revoked[k] = token
+    if keys:
+        print(f"🔑 [{', '.join(keys)}] 서버가 거절한 토큰 폐기 → 재발급")
+    return keys
+
+def get_access_token(mode="MOCK", appkey=None, appsecret=None, cache_key=None):
     """
     접근 토큰을 반환합니다.
-    1. 파일에 저장된 토큰이 유효하면 -> 그대로 사용 (API 호출 X)
-    2. 없거나 만료되었으면 -> API 호출하여 재발급 후 파일 저장
+    1. 메모리에 있는 토큰이 유효하면 -> 그대로 사용
+    2. 토큰 브로커(token_broker.py)가 떠 있으면 -> 브로커에게 받음 (모든 프로세스가 같은 토큰 공유)
+    3. 없으면 -> 파일 잠금 후 저장된 토큰 확인, 없거나 만료면 재발급 후 원자적 저장
     :param mode: "REAL" (실전) 또는 "MOCK" (모의)
+    :param appkey/appsecret: 추가 계좌용 앱키 (없으면 config의 기본 계좌 앱키)
+    :param cache_key: 토큰 파일에 저장할 이름 (없으면 mode)
     """
-    
-    # [1] 파일에서 저장된 토큰 확인
-    saved_data = load_token_data()
-    
-    if mode in saved_data:
-        token_info = saved_data[mode]
-        expired_at_str = token_info.get("expired_at")
-        
-        if expired_at_str:
-            expired_at = datetime.datetime.strptime(expired_at_str, "%Y-%m-%d %H:%M:%S")
-            # 만료 1분 전까지만 재사용 (안전마진)
-            if datetime.datetime.now() < expired_at - datetime.timedelta(seconds=60):
-                # print(f"✅ [{mode}] 기존 토큰 유효 (만료: {expired_at_str})") # 너무 자주 뜨면 주석 처리
-                return token_info["access_token"]
-
-    # [2] 토큰 재발급 요청 (유효하지 않을 경우)
-    return issue_new_token(mode)
-
-def issue_new_token(mode):
-    print(f"🔄 [{mode}] 새로운 토큰 발급 요청 중...")
-    
+    key = cache_key or mode
+
+    cached = _cache.get(key)
+    if cached and datetime.datetime.now() < cached[1] - datetime.timedelta(seconds=EXPIRY_MARGIN):
+        return cached[0]
+
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached and datetime.datetime.now() < cached[1] - datetime.timedelta(seconds=EXPIRY_MARGIN):
+            return cached[0]
+        revoked = _revoked.get(key)
+        try:
+            info = request_from_broker(mode, appkey, appsecret, key, revoked)
+        except OSError:
+            # 브로커 없음(소켓 없음/응답 없음) → 이 프로세스가 직접 (파일 잠금으로 다른 프로세스와 직렬화)
+            info = load_or_issue(mode, appkey, appsecret, key, revoked)
+        if info:
+            return _remember(key, info)
+        return None
+
+def request_from_broker(mode, appkey, appsecret, key, revoked=None):
+    """브로커에게 토큰 요청. 브로커가 없으면 OSError, 발급 실패면 None (revoked: 서버가 거절한 토큰)"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(BROKER_TIMEOUT)
+        sock.connect(BROKER_SOCKET)
+        req = {"mode": mode, "appkey": appkey, "appsecret": appsecret, "key": key, "revoked": revoked}
+        sock.sendall(json.dumps(req).encode('utf-8') + b"\n")
+        raw = b""
+        while not raw.endswith(b"\n"):
+            chunk = sock.recv(4096)
+            if not chunk:
+                break
+            raw += chunk
+    if not raw:
+        raise ConnectionError("브로커 응답 없음")
+    res = json.loads(raw)
+    if res.get("error"):
+        print(f"❌ [{key}] 토큰 브로커: {res['error']}")
+        return None
+    return res.get("info")
+
+def load_or_issue(mode, appkey=None, appsecret=None, cache_key=None, revoked=None):
+    """
+    파일 잠금(flock) 안에서 저장된 토큰을 확인하고, 없거나 만료면 한 번만 재발급합니다.
+    여러 프로세스가 동시에 불러도 발급은 한 번 — 나머지는 잠금을 기다렸다가 새 토큰을 읽습니다.
+    저장된 토큰이 revoked(서버가 거절한 토큰)와 같으면 만료로 보고 재발급합니다.
+    반환: {"access_token", "expired_at"} 또는 None
+    """
+    key = cache_key or mode
+    with open(LOCK_FILE, 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            info = load_token_data().get(key)
+            if _usable(info, revoked):
+                return info
+            # 직전 발급 시도가 1분이 안 됐으면 다시 시도하지 않음 (EGW00133 방지)
+            last = (info or {}).get("issued_at", 0)
+            if time.time() - last < ISSUE_INTERVAL:
+                print(f"⏳ [{key}] 토큰 발급 1분 제한 — {ISSUE_INTERVAL - (time.time() - last):.0f}초 후 재시도")
+                return None
+            token = issue_new_token(mode, appkey, appsecret, cache_key)
+            if token is None:
+                _mark_attempt(key)
+                return None
+            return load_token_data().get(key)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+def _mark_attempt(key):
+    """발급 실패도 시각을 남겨 1분 안에 다시 요청하지 않게 함 (기존 토큰은 유지)"""
+    data = load_token_data()
+    data.setdefault(key, {})["issued_at"] = time.time()
+    _write_token_file(data)
+
+def issue_new_token(mode, appkey=None, appsecret=None, cache_key=None):
+    key = cache_key or mode
+    print(f"🔄 [{key}] 새로운 토큰 발급 요청 중...")
+
     if mode == "REAL":
         url = "https://openapi.koreainvestment.com:9443/oauth2/tokenP"
-        appkey = config.REAL_API_KEY
-        appsecret = config.REAL_API_SECRET
+        appkey = appkey or config.REAL_API_KEY
+        appsecret = appsecret or config.REAL_API_SECRET
     else: # MOCK
         url = "https://openapivts.koreainvestment.com:29443/oauth2/tokenP"
-        appkey = config.MOCK_API_KEY
-        appsecret = config.MOCK_API_SECRET
+        appkey = appkey or config.MOCK_API_KEY
+        appsecret = appsecret or config.MOCK_API_SECRET
 
     headers = {"content-type": "application/json"}
     body = {
@@ -75,33 +190,33 @@ def issue_new_token(mode):
     }
 
     try:
-        res = requests.post(url, headers=headers, data=json.dumps(body))
-        
+        res = requests.post(url, headers=headers, data=json.dumps(body), timeout=10)
+
         if res.status_code == 200:
             data = res.json()
             access_token = data['access_token']
             expires_in = int(data['expires_in']) # 유효기간(초)
-            
+
             # 만료 시간 계산
             expired_at = datetime.datetime.now() + datetime.timedelta(seconds=expires_in)
-            expired_at_str = expired_at.strftime("%Y-%m-%d %H:%M:%S")
-            
+            expired_at_str = expired_at.strftime(_TIME_FMT)
+
             # [3] 파일에 저장
-            save_token_data(mode, access_token, expired_at_str)
-            
-            print(f"✅ [{mode}] 토큰 발급 완료 (만료: {expired_at_str})")
+            save_token_data(key, access_token, expired_at_str)
+
+            print(f"✅ [{key}] 토큰 발급 완료 (만료: {expired_at_str})")
             return access_token
         else:
             print(f"❌ 토큰 발급 실패: {res.json()}")
             return None
-            
+
     except Exception as e:
         print(f"❌ 토큰 요청 중 에러 발생: {e}")
         return None
 
 if __name__ == "__main__":
-    # 테스트 실행
+    # 테스트 실행 (봇/브로커가 떠 있어도 같은 토큰을 받아옴 — 새로 발급하지 않음)
     print("--- REAL 모드 테스트 ---")
     print(get_access_token("REAL"))
     print("\n--- MOCK 모드 테스트 ---")
-    print(get_access_token("MOCK"))
\ No newline at end of file
+    print(get_access_token("MOCK"))
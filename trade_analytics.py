@@ -0,0 +1,208 @@
+# trade_analytics.py
+import pandas as pd
+import numpy as np
+
+import trade_store
+
+# ==============================================================================
+# 📊 매매 분석 엔진
+# ==============================================================================
+# - 분할 매수(1~4차)와 부분/전량 매도를 보유 수량이 0이 될 때까지 묶어 하나의 라운드트립(진입→청산)으로 만듭니다.
+# - 라운드트립별 손익, 보유시간, MAE/MFE, 주문가 대비 체결 슬리피지를 계산합니다.
+# - 계산은 전부 pandas 벡터 연산이며, update()는 새로 추가된 기록만 읽어 반영합니다.
+
+TRIP_COLUMNS = [
+    "code", "name", "strategy", "reason", "day",
+    "entry_time", "exit_time", "hold_min", "splits",
+    "qty", "avg_ask", "entry_price", "exit_price",
+    "pnl", "pnl_rate", "mae", "mfe", "slippage_bp",
+]
+
+
+class TradeAnalytics:
+    def __init__(self, store=None):
+        self.store = store or trade_store.get_store()
+        self.trips = pd.DataFrame(columns=TRIP_COLUMNS)
+        self._open_buys = pd.DataFrame()   # 아직 매도와 짝지어지지 않은 매수
+        self._open_sells = pd.DataFrame()  # 아직 닫히지 않은 라운드트립의 부분 매도
+        self._last_buy_id = 0
+        self._last_sell_id = 0
+
+    # ------------------------------------------------------------------
+    # 🔄 증분 갱신
+    # ------------------------------------------------------------------
+    def update(self):
+        """마지막으로 읽은 id 이후의 매수/매도만 가져와 라운드트립을 갱신합니다."""
+        new_buys = pd.DataFrame(self.store.query("buys", after_id=self._last_buy_id))
+        new_sells = pd.DataFrame(self.store.query("sells", after_id=self._last_sell_id))
+
+        if not new_buys.empty:
+            self._last_buy_id = int(new_buys["id"].max())
+            new_buys["time"] = pd.to_datetime(new_buys["time"])
+            self._open_buys = pd.concat([self._open_buys, new_buys], ignore_index=True)
+        if new_sells.empty:
+            return 0
+
+        self._last_sell_id = int(new_sells["id"].max())
+        new_sells["time"] = pd.to_datetime(new_sells["time"])
+
+        sells = new_sells if self._open_sells.empty else pd.concat([self._open_sells, new_sells], ignore_index=True)
+        closed, self._open_buys, self._open_sells = match_round_trips(self._open_buys, sells)
+        if not closed.empty:
+            self.trips = closed if self.trips.empty else pd.concat([self.trips, closed], ignore_index=True)
+        return len(closed)
+
+    # ------------------------------------------------------------------
+    # 📈 집계
+    # ------------------------------------------------------------------
+    def daily(self):
+        return summarize(self.trips, "day")
+
+    def by_strategy(self):
+        return summarize(self.trips, "strategy")
+
+    def by_reason(self):
+        return summarize(self.trips, "reason")
+
+
+def _trip_numbers(codes, is_sell, qty):
+    """
+    종목별 시간순 이벤트에 라운드트립 번호를 매깁니다. 보유 수량(매수 합 - 매도 합)이 0 이하가 되는
+    매도에서 라운드트립이 끝나고, 다음 이벤트부터 새 번호입니다. (부분 매도는 같은 라운드트립에 남음)
+    수량이 없는 매도(예전 기록)는 남은 수량 전부를 판 것으로 봅니다.
+    :return: (라운드트립 번호, 라운드트립을 끝낸 이벤트 여부, 매도별 청산 수량)
+    """
+    n = len(codes)
+    trip = np.zeros(n, dtype=np.int64)
+    closes = np.zeros(n, dtype=bool)
+    sold = qty.astype(float).copy()
+    cur_code, num, held = None, 0, 0.0
+    for i in range(n):
+        if codes[i] != cur_code:
+            cur_code, num, held = codes[i], 0, 0.0
+        trip[i] = num
+        if not is_sell[i]:
+            held += 0.0 if np.isnan(qty[i]) else qty[i]
+            continue
+        if np.isnan(qty[i]):
+            sold[i] = held
+        held -= sold[i]
+        if held <= 0:
+            closes[i] = True
+            num, held = num + 1, 0.0    # 기록보다 많이 판 수량(수동 매수분 등)은 다음으로 넘기지 않음
+    return trip, closes, sold
+
+
+def match_round_trips(buys, sells):
+    """
+    매수/매도를 종목별 시간순으로 합친 뒤, 누적 매도 수량이 누적 매수 수량에 닿는 매도에서
+    라운드트립을 닫습니다. 라운드트립 안의 매도가 여러 건이면(부분 익절 등) 수량 가중 평균 청산가로 묶습니다.
+    :return: (완료된 라운드트립 DataFrame, 아직 청산되지 않은 매수 DataFrame, 같은 라운드트립의 부분 매도 DataFrame)
+    """
+    if sells.empty:
+        return pd.DataFrame(columns=TRIP_COLUMNS), buys, sells
+
+    b = buys.assign(is_sell=0)
+    s = sells.assign(is_sell=1)
+    events = pd.concat([b, s], ignore_index=True, sort=False)
+    events = events.sort_values(["code", "time", "is_sell"], kind="mergesort").reset_index(drop=True)
+
+    trip, closes, sold = _trip_numbers(events["code"].to_numpy(), events["is_sell"].to_numpy(),
+                                       pd.to_numeric(events["qty"], errors="coerce").to_numpy(dtype=float))
+    events["trip"] = trip
+    events["sold"] = sold
+    # 마지막으로 닫힌 라운드트립 이후의 이벤트는 아직 열린 포지션
+    last_closed = events[closes].groupby("code")["trip"].max()
+    events["closed"] = events["trip"] <= events["code"].map(last_closed).fillna(-1)
+
+    closed_ev = events[events["closed"]]
+    still_open = events[~events["closed"]]
+    open_buys = still_open[still_open["is_sell"] == 0][buys.columns].reset_index(drop=True)
+    open_sells = still_open[still_open["is_sell"] == 1][sells.columns].reset_index(drop=True)
+
+    cb = closed_ev[closed_ev["is_sell"] == 0].copy()
+    cs = closed_ev[closed_ev["is_sell"] == 1].copy()
+    if cb.empty or cs.empty:
+        return pd.DataFrame(columns=TRIP_COLUMNS), open_buys, open_sells
+
+    cb["notional"] = cb["buy_price"].astype(float) * cb["qty"].astype(float)
+    entry = cb.groupby(["code", "trip"]).agg(
+        entry_time=("time", "min"),
+        splits=("level", "count"),
+        buy_qty=("qty", "sum"),
+        notional=("notional", "sum"),
+    )
+
+    # 매도 여러 건 → 청산가는 시세가 있는 매도의 수량 가중 평균, 사유/평단은 마지막 매도 기준
+    px = pd.to_numeric(cs["sell_price"], errors="coerce")
+    priced = px > 0
+    cs["exit_notional"] = np.where(priced, px * cs["sold"], 0.0)
+    cs["priced_qty"] = np.where(priced, cs["sold"], 0.0)
+    cs["max_price"] = pd.to_numeric(cs["max_price"], errors="coerce").replace(0, np.nan)
+    cs["min_price"] = pd.to_numeric(cs["min_price"], errors="coerce").replace(0, np.nan)
+    exits = cs.groupby(["code", "trip"]).agg(
+        name=("name", "last"),
+        strategy=("strategy", "last"),
+        reason=("reason", "last"),
+        exit_time=("time", "max"),
+        fill_price=("buy_price", "last"),
+        qty=("sold", "sum"),
+        exit_notional=("exit_notional", "sum"),
+        priced_qty=("priced_qty", "sum"),
+        max_price=("max_price", "max"),
+        min_price=("min_price", "min"),
+    )
+
+    t = entry.join(exits, how="inner").reset_index()
+
+    # 매수 로그의 가격은 주문가, 매도 로그의 Buy_Price는 계좌 평단(실제 체결가)
+    t["avg_ask"] = t["notional"] / t["buy_qty"].where(t["buy_qty"] > 0)
+    fill = pd.to_numeric(t["fill_price"], errors="coerce")
+    t["entry_price"] = fill.where(fill > 0, t["avg_ask"])
+    t["exit_price"] = t["exit_notional"] / t["priced_qty"].where(t["priced_qty"] > 0)
+
+    t["pnl"] = (t["exit_price"] - t["entry_price"]) * t["qty"]
+    t["pnl_rate"] = (t["exit_price"] / t["entry_price"] - 1.0) * 100
+    t["hold_min"] = (t["exit_time"] - t["entry_time"]).dt.total_seconds() / 60.0
+
+    # MAE/MFE: 보유 중 최저/최고가 기준 (%) — 0 또는 결측이면 NaN
+    t["mfe"] = (t["max_price"] / t["entry_price"] - 1.0) * 100
+    t["mae"] = (t["min_price"] / t["entry_price"] - 1.0) * 100
+
+    # 슬리피지: 실제 평단이 주문가보다 얼마나 불리했는지 (bp)
+    t["slippage_bp"] = np.where(fill > 0, (fill / t["avg_ask"] - 1.0) * 1e4, np.nan)
+    t["day"] = t["exit_time"].dt.strftime("%Y-%m-%d")
+
+    return t[TRIP_COLUMNS], open_buys, open_sells
+
+
+def summarize(trips, key):
+    """라운드트립을 key(일자/전략/청산사유)별로 집계합니다."""
+    if trips.empty:
+        return pd.DataFrame()
+    t = trips.copy()
+    t["win"] = (t["pnl"] > 0).astype(float)
+    g = t.groupby(key)
+    out = g.agg(
+        trades=("code", "count"),
+        win_rate=("win", "mean"),
+        pnl=("pnl", "sum"),
+        avg_rate=("pnl_rate", "mean"),
+        avg_hold_min=("hold_min", "mean"),
+        avg_mae=("mae", "mean"),
+        avg_mfe=("mfe", "mean"),
+        avg_slippage_bp=("slippage_bp", "mean"),
+    )
+    out["win_rate"] = out["win_rate"] * 100
+    return out.round(2)
+
+
+if __name__ == "__main__":
+    engine = TradeAnalytics()
+    n = engine.update()
+    print(f"📊 라운드트립 {n}건 분석")
+    if n:
+        pd.set_option("display.width", 200)
+        print("\n[일자별]");      print(engine.daily())
+        print("\n[전략별]");      print(engine.by_strategy())
+        print("\n[청산사유별]");  print(engine.by_reason())
@@ -0,0 +1,354 @@
+# trade_store.py
+import atexit
+import csv
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+# ==============================================================================
+# ⚙️ 저장소 설정
+# ==============================================================================
+LOG_DIR = "logs"
+DB_FILE = f"{LOG_DIR}/trades.db"
+BUY_LOG_FILE = f"{LOG_DIR}/buy_log.csv"
+SELL_LOG_FILE = f"{LOG_DIR}/sell_log.csv"
+
+FLUSH_INTERVAL = 1.0    # 모아서 기록하는 주기(초)
+MAX_BATCH = 500         # 한 번에 기록하는 최대 건수
+
+# CSV 헤더 (기존 엑셀 분석 파일과 동일한 컬럼 순서 유지)
+BUY_HEADER = [
+    "Time", "Code", "Name", "Strategy", "Level",
+    "Buy_Price", "Qty", "Program_Amt_Entry",
+    "Gap_Rate", "Leader_Name"
+]
+SELL_HEADER = [
+    "Time", "Code", "Name", "Strategy", "Reason",
+    "Buy_Price", "Sell_Price", "Qty", "Profit_Rate(%)", "Hold_Min(분)",
+    "Max_Price_During_Hold", "Min_Price_During_Hold",
+    "Entry_PG_Amt", "Max_PG_Amt_During_Hold",
+    "Exit_PG_Amt"
+]
+
+# DB 컬럼 (CSV 헤더와 1:1 대응, day는 날짜 조회용 인덱스 컬럼)
+BUY_COLUMNS = ["time", "code", "name", "strategy", "level",
+               "buy_price", "qty", "pg_amt", "gap", "leader"]
+SELL_COLUMNS = ["time", "code", "name", "strategy", "reason",
+                "buy_price", "sell_price", "qty", "profit_rate", "hold_min",
+                "max_price", "min_price", "entry_pg", "max_pg", "exit_pg"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buys (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    day TEXT NOT NULL,
+    time TEXT NOT NULL, code TEXT, name TEXT, strategy TEXT, level INTEGER,
+    buy_price REAL, qty INTEGER, pg_amt REAL, gap REAL, leader TEXT
+);
+CREATE TABLE IF NOT EXISTS sells (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    day TEXT NOT NULL,
+    time TEXT NOT NULL, code TEXT, name TEXT, strategy TEXT, reason TEXT,
+    buy_price REAL, sell_price REAL, qty INTEGER, profit_rate REAL, hold_min INTEGER,
+    max_price REAL, min_price REAL, entry_pg REAL, max_pg REAL, exit_pg REAL
+);
+CREATE INDEX IF NOT EXISTS idx_buys_day ON buys(day);
+CREATE INDEX IF NOT EXISTS idx_buys_code ON buys(code, time);
+CREATE INDEX IF NOT EXISTS idx_buys_strategy ON buys(strategy, day);
+CREATE INDEX IF NOT EXISTS idx_sells_day ON sells(day);
+CREATE INDEX IF NOT EXISTS idx_sells_code ON sells(code, time);
+CREATE INDEX IF NOT EXISTS idx_sells_strategy ON sells(strategy, day);
+"""
+
+_TABLES = {
+    "buys": (BUY_COLUMNS, BUY_HEADER, BUY_LOG_FILE),
+    "sells": (SELL_COLUMNS, SELL_HEADER, SELL_LOG_FILE),
+}
+
+# ==============================================================================
+# 💾 매매 기록 저장소
+# ==============================================================================
+class TradeStore:
+    """
+    매매 기록을 SQLite(WAL) + CSV에 함께 남기는 저장소.
+    - 매매 스레드는 append()로 대기열에 넣기만 하고 바로 돌아갑니다.
+    - 기록 스레드가 파일을 계속 열어둔 채 FLUSH_INTERVAL마다 모아서 기록하고 fsync 합니다.
+    - 날짜/종목/전략 조회는 DB 인덱스를 타므로 CSV 전체를 읽지 않습니다.
+    """
+
+    def __init__(self, db_file=DB_FILE, buy_csv=BUY_LOG_FILE, sell_csv=SELL_LOG_FILE):
+        self.db_file = db_file
+        self.csv_files = {"buys": buy_csv, "sells": sell_csv}
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopped = False
+
+        log_dir = os.path.dirname(db_file)
+        if log_dir and not os.path.exists(log_dir):
+            os.makedirs(log_dir)
+
+        conn = self._connect()
+        try:
+            is_new = conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name='buys'").fetchone()[0] == 0
+            conn.executescript(_SCHEMA)
+            if is_new:
+                self._import_csv(conn)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_file, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _import_csv(self, conn):
+        """DB를 처음 만들 때 기존 CSV 기록을 한 번만 옮겨옵니다."""
+        for table, (columns, _, _) in _TABLES.items():
+            path = self.csv_files[table]
+            if not os.path.exists(path):
+                continue
+            with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+                reader = csv.reader(f)
+                next(reader, None)  # 헤더
+                rows = []
+                for r in reader:
+                    if not r:
+                        continue
+                    r = (r + [None] * len(columns))[:len(columns)]
+                    rows.append([r[0][:10]] + [v if v != '' else None for v in r])
+            self._insert(conn, table, rows)
+            print(f"📁 [TradeStore] 기존 CSV {len(rows)}건 이관: {path}")
+
+    def _insert(self, conn, table, rows):
+        columns = _TABLES[table][0]
+        sql = (f"INSERT INTO {table} (day, {', '.join(columns)}) "
+               f"VALUES ({', '.join(['?'] * (len(columns) + 1))})")
+        conn.executemany(sql, rows)
+
+    # ------------------------------------------------------------------
+    # ✍️ 기록 (매매 스레드에서 호출)
+    # ------------------------------------------------------------------
+    def append(self, table, values):
+        """values: CSV 컬럼 순서대로 정렬된 한 행 (첫 값은 'YYYY-MM-DD HH:MM:SS')"""
+        self._ensure_writer()
+        self._queue.put((table, values))
+
+    def _ensure_writer(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped = False
+                self._thread = threading.Thread(target=self._writer_loop, name="trade-store", daemon=True)
+                self._thread.start()
+
+    def _open_csv(self, table):
+        header = _TABLES[table][1]
+        path = self.csv_files[table]
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        f = open(path, 'a', encoding='utf-8-sig' if is_new else 'utf-8', newline='')
+        writer = csv.writer(f)
+        if is_new:
+            writer.writerow(header)
+            print(f"📁 [Log] 신규 로그 파일 생성: {path}")
+        return f, writer
+
+    def _next_batch(self):
+        """대기열에서 FLUSH_INTERVAL 동안 최대 MAX_BATCH건. 아무것도 없으면 빈 리스트"""
+        try:
+            batch = [self._queue.get(timeout=FLUSH_INTERVAL)]
+        except queue.Empty:
+            return []
+        deadline = time.time() + FLUSH_INTERVAL
+        while len(batch) < MAX_BATCH:
+            remain = deadline - time.time()
+            if remain <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remain))
+            except queue.Empty:
+                break
+        return batch
+
+    def _commit_rows(self, conn, pending):
+        for table, rows in pending.items():
+            if rows:
+                self._insert(conn, table, [[str(r[0])[:10]] + list(r) for r in rows])
+        conn.commit()
+
+    def _commit_each(self, conn, pending):
+        """한 행씩 넣어 문제 행(값 형식 등)만 빼고 저장. 저장된 행만 반환 (일시 오류는 그대로 올림)"""
+        saved = {table: [] for table in pending}
+        for table, rows in pending.items():
+            for r in rows:
+                try:
+                    self._commit_rows(conn, {table: [r]})
+                    saved[table].append(r)
+                except sqlite3.OperationalError:
+                    conn.rollback()
+                    raise
+                except Exception as e:
+                    conn.rollback()
+                    print(f"❌ [Log Error] 매매 기록 1건 버림 ({table}): {e} — {r}")
+        return saved
+
+    def _writer_loop(self):
+        """
+        DB 커밋이 성공한 행만 CSV에 씁니다 (두 기록이 어긋나지 않게).
+        database is locked 같은 일시 오류면 버리지 않고 다음 주기에 같은 묶음을 다시 시도합니다.
+        """
+        conn = self._connect()
+        csv_handles = {}
+        pending = {table: [] for table in _TABLES}  # 아직 DB에 커밋되지 않은 행
+        taken = 0                                   # 꺼냈지만 아직 저장 완료(task_done) 처리 안 한 건수
+        stop_requested = False
+        failures = 0
+
+        while True:
+            batch = self._next_batch()
+            if not batch and not taken:
+                if self._stopped or stop_requested:
+                    break
+                continue
+            taken += len(batch)
+            for entry in batch:
+                if entry is None:
+                    stop_requested = True
+                    continue
+                table, values = entry
+                pending[table].append(values)
+
+            if any(pending.values()):
+                try:
+                    try:
+                        self._commit_rows(conn, pending)
+                    except sqlite3.OperationalError:
+                        raise
+                    except Exception as e:
+                        conn.rollback()
+                        print(f"❌ [Log Error] 매매 기록 저장 실패: {e} → 한 건씩 다시 저장")
+                        pending = self._commit_each(conn, pending)
+                except sqlite3.OperationalError as e:
+                    try:
+                        conn.rollback()
+                    except Exception:
+                        pass
+                    failures += 1
+                    if failures == 1 or failures % 30 == 0:
+                        print(f"⚠️ [Log Error] 매매 기록 저장 지연 ({e}) — {sum(map(len, pending.values()))}건 재시도 중 ({failures}회)")
+                    continue
+                if failures:
+                    print(f"✅ [TradeStore] 매매 기록 저장 재개 ({failures}회 재시도 후)")
+                    failures = 0
+
+                for table, rows in pending.items():
+                    if not rows:
+                        continue
+                    try:
+                        if table not in csv_handles:
+                            csv_handles[table] = self._open_csv(table)
+                        f, writer = csv_handles[table]
+                        writer.writerows(rows)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    except Exception as e:
+                        print(f"❌ [Log Error] CSV 기록 실패 ({table}, DB에는 저장됨): {e}")
+                pending = {table: [] for table in _TABLES}
+
+            for _ in range(taken):
+                self._queue.task_done()
+            taken = 0
+            if stop_requested:
+                break
+
+        for f, _ in csv_handles.values():
+            f.close()
+        conn.close()
+
+    def flush(self, timeout=10):
+        """대기 중인 기록이 모두 저장될 때까지 기다립니다."""
+        deadline = time.time() + timeout
+        while self._queue.unfinished_tasks > 0 and time.time() < deadline:
+            time.sleep(0.05)
+        return self._queue.unfinished_tasks == 0
+
+    def close(self):
+        if self._thread is not None and self._thread.is_alive():
+            self._stopped = True
+            self._queue.put(None)
+            self._thread.join(timeout=10)
+
+    # ------------------------------------------------------------------
+    # 🔎 조회 (인덱스 사용)
+    # ------------------------------------------------------------------
+    def query(self, table, day=None, start_day=None, end_day=None, code=None, strategy=None, after_id=None):
+        """
+        조건에 맞는 기록을 dict 리스트로 반환합니다.
+        :param day: 'YYYY-MM-DD' 하루
+        :param start_day/end_day: 기간 (양 끝 포함)
+        :param after_id: 이 id 이후 기록만 (증분 조회용)
+        """
+        if table not in _TABLES:
+            raise ValueError(f"unknown table: {table}")
+
+        where, params = [], []
+        if day is not None:
+            where.append("day = ?"); params.append(day)
+        if start_day is not None:
+            where.append("day >= ?"); params.append(start_day)
+        if end_day is not None:
+            where.append("day <= ?"); params.append(end_day)
+        if code is not None:
+            where.append("code = ?"); params.append(code)
+        if strategy is not None:
+            where.append("strategy = ?"); params.append(strategy)
+        if after_id is not None:
+            where.append("id > ?"); params.append(after_id)
+
+        sql = f"SELECT * FROM {table}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY id"
+
+        conn = self._connect()
+        try:
+            conn.row_factory = sqlite3.Row
+            return [dict(r) for r in conn.execute(sql, params)]
+        finally:
+            conn.close()
+
+    def export_csv(self, table, path, **filters):
+        """DB 기록을 기존 CSV 형식(엑셀 호환)으로 내보냅니다."""
+        columns, header, _ = _TABLES[table]
+        rows = self.query(table, **filters)
+        with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            for r in rows:
+                writer.writerow([r[c] if r[c] is not None else '' for c in columns])
+        return len(rows)
+
+# ==============================================================================
+# 🔗 전역 저장소 (계좌당 하나 — 기본 계좌는 logs/, 추가 계좌는 logs/<계좌이름>/)
+# ==============================================================================
+_stores = {}
+_store_lock = threading.Lock()
+
+def get_store(account=None):
+    store = _stores.get(account)
+    if store is None:
+        with _store_lock:
+            store = _stores.get(account)
+            if store is None:
+                if account is None:
+                    store = TradeStore()
+                else:
+                    d = f"{LOG_DIR}/{account}"
+                    store = TradeStore(f"{d}/trades.db", f"{d}/buy_log.csv", f"{d}/sell_log.csv")
+                _stores[account] = store
+                atexit.register(store.close)
+    return store